@@ -0,0 +1 @@
+"""Api package exposing the smart home over HTTP and WebSocket"""
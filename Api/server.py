@@ -0,0 +1,501 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Api.websocket import (CLOSE, PING, PONG, TEXT, WebSocketError, accept_key,
+                           encode_frame, MessageReader)
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+from Devices.events import DeviceEvent, Subscription
+from Telemetry.metrics import metrics
+
+REQUEST_SECONDS = metrics.histogram("api.request_seconds")
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard json module is used without it
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+# (type key, location key); None matches anything
+FilterKey = Tuple[Optional[str], Optional[str]]
+
+
+class HttpError(Exception):
+    """An error to report to the client with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _WebSocketClient:
+    __slots__ = ('writer', 'filter_key', 'lagged', 'dropped')
+
+    def __init__(self, writer: asyncio.StreamWriter, filter_key: FilterKey):
+        self.writer = writer
+        self.filter_key = filter_key
+        self.lagged = False
+        self.dropped = 0
+
+
+class ApiServer:
+    """Headless HTTP and WebSocket API over a DeviceManager
+
+    HTTP endpoints (JSON in and out):
+        GET  /health
+        GET  /metrics                        snapshot of Telemetry.metrics
+        GET  /devices?type=light&location=Bedroom
+        GET  /devices/<device_id>
+        POST /devices/<device_id>/commands   {"action": "set_brightness", "args": [40]}
+        POST /commands                       [{"device_id": ..., "action": ..., "args": [...]}, ...]
+
+    WebSocket at /ws (optionally /ws?type=...&location=...): the server
+    sends {"type": "snapshot", "devices": [...]} on connect, then
+    {"type": "events", "events": [...]} for each batch of device events. A
+    client may send {"id": 1, "commands": [...]} and gets back
+    {"type": "results", "id": 1, "results": [...]}.
+
+    Commands run on a CommandDispatcher, so commands for one device keep
+    their order and a batch runs concurrently across devices. Each event
+    batch is encoded once per distinct subscriber filter and the same frame
+    is written to every matching client. A client whose socket buffer backs
+    up past MAX_CLIENT_BUFFER misses frames and is then sent
+    {"type": "resync"}, telling it to fetch /devices again.
+    """
+
+    MAX_BODY = 1 << 20
+    MAX_BATCH = 1000
+    MAX_CLIENT_BUFFER = 1 << 20
+    RESYNC_FRAME = encode_frame(TEXT, dumps({"type": "resync"}))
+
+    def __init__(self, device_manager: Optional[DeviceManager] = None, host: str = "127.0.0.1",
+                 port: int = 8080, dispatcher: Optional[CommandDispatcher] = None):
+        self.device_manager = device_manager or DeviceManager()
+        self.host = host
+        self.port = port
+        self._owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or CommandDispatcher(self.device_manager)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscription: Optional[Subscription] = None
+        self._thread: Optional[threading.Thread] = None
+        # filter key -> connected WebSocket clients using it
+        self._clients: Dict[FilterKey, Set[_WebSocketClient]] = {}
+        # Encoded snapshot per filter key, valid until the next event
+        self._snapshots: Dict[FilterKey, bytes] = {}
+        # device_id -> (type key, location key), kept current from events so
+        # removals can still be matched against filters
+        self._device_keys: Dict[str, Tuple[str, str]] = {}
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.sockets[0].getsockname()[:2]
+
+    @property
+    def client_count(self) -> int:
+        return sum(len(clients) for clients in self._clients.values())
+
+    async def start(self):
+        """Start listening; events are streamed from here on"""
+        self._loop = asyncio.get_running_loop()
+        for device in self.device_manager.get_all_devices():
+            self._remember(device.device_id, device.to_record())
+        self._subscription = self.device_manager.events.subscribe(
+            self._on_events, max_queue=100000, batch_size=1024)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=4096)
+
+    async def stop(self):
+        """Stop listening and disconnect every client"""
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+        if self._server is not None:
+            self._server.close()
+        for clients in list(self._clients.values()):
+            for client in list(clients):
+                client.writer.write(encode_frame(CLOSE, b'\x03\xe9'))  # 1001 going away
+                client.writer.close()
+        self._clients.clear()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self._owns_dispatcher:
+            self.dispatcher.shutdown(wait=False)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"API listening on http://{self.address[0]}:{self.address[1]}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def start_in_thread(self) -> 'ApiServer':
+        """Run the server on its own event loop thread, e.g. next to the Tk GUI or in tests"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="api-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self):
+        """Stop a server started with start_in_thread"""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    # HTTP
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+
+                if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self._serve_websocket(reader, writer, headers, query)
+                    return
+
+                start = time.perf_counter() if metrics.enabled else None
+                try:
+                    status, payload = await self._route(method, path, query, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    print(f"Error handling {method} {path}: {e}")
+                    status, payload = 500, {"error": "Internal server error"}
+                if start is not None:
+                    REQUEST_SECONDS.observe(time.perf_counter() - start)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Parse one request; returns None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "Request headers too large")
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > self.MAX_BODY:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        return method.upper(), url.path, dict(parse_qsl(url.query)), headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool = True):
+        body = payload if isinstance(payload, bytes) else dumps(payload)
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+
+    async def _route(self, method: str, path: str, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+
+        if parts == ['health']:
+            self._require(method, 'GET')
+            return 200, {"status": "ok", "devices": len(self.device_manager.get_all_devices())}
+
+        if parts == ['metrics']:
+            self._require(method, 'GET')
+            return 200, metrics.snapshot()
+
+        if parts == ['devices']:
+            self._require(method, 'GET')
+            devices = self.device_manager.find_devices(query.get('type'), query.get('location'))
+            return 200, {"devices": [device.to_record() for device in devices]}
+
+        if len(parts) == 2 and parts[0] == 'devices':
+            self._require(method, 'GET')
+            device = self.device_manager.get_device(parts[1])
+            if device is None:
+                raise HttpError(404, "Device not found")
+            return 200, device.to_record()
+
+        if len(parts) == 3 and parts[0] == 'devices' and parts[2] == 'commands':
+            self._require(method, 'POST')
+            command = self._parse_body(body)
+            if not isinstance(command, dict):
+                raise HttpError(400, "Expected a JSON object")
+            command = dict(command, device_id=parts[1])
+            return 200, (await self.run_commands([command]))[0]
+
+        if parts == ['commands']:
+            self._require(method, 'POST')
+            commands = self._parse_body(body)
+            if not isinstance(commands, list):
+                raise HttpError(400, "Expected a JSON array of commands")
+            return 200, {"results": await self.run_commands(commands)}
+
+        raise HttpError(404, "Not found")
+
+    @staticmethod
+    def _require(method: str, allowed: str):
+        if method != allowed:
+            raise HttpError(405, f"Use {allowed}")
+
+    @staticmethod
+    def _parse_body(body: bytes) -> Any:
+        try:
+            return loads(body)
+        except ValueError:
+            raise HttpError(400, "Invalid JSON")
+
+    async def run_commands(self, commands: List[Any]) -> List[Dict[str, Any]]:
+        """Run a batch of {"device_id", "action", "args"} commands and return their results in order"""
+        if len(commands) > self.MAX_BATCH:
+            raise HttpError(413, f"At most {self.MAX_BATCH} commands per batch")
+        # Validate the whole batch first so a bad command never leaves it half run
+        for command in commands:
+            if not isinstance(command, dict) or not isinstance(command.get('device_id'), str) \
+                    or not isinstance(command.get('action'), str) \
+                    or not isinstance(command.get('args', []), list):
+                raise HttpError(400, "Each command needs a device_id, an action and optional args list")
+        futures = [asyncio.wrap_future(self.dispatcher.execute(command['device_id'], command['action'],
+                                                               *command.get('args', [])))
+                   for command in commands]
+        return [result._asdict() for result in await asyncio.gather(*futures)]
+
+    # WebSocket
+
+    def _filter_key(self, query: Dict[str, str]) -> FilterKey:
+        device_type = query.get('type')
+        if device_type:
+            # Unknown types keep their name so they match nothing
+            device_type = self.device_manager.normalize_type(device_type) or device_type.lower()
+        location = query.get('location')
+        return device_type or None, location.lower() if location else None
+
+    def _remember(self, device_id: str, record: Dict[str, Any]):
+        self._device_keys[device_id] = (record.get('type', ''), record.get('location', '').lower())
+
+    def _snapshot(self, filter_key: FilterKey) -> bytes:
+        frame = self._snapshots.get(filter_key)
+        if frame is None:
+            devices = self.device_manager.find_devices(*filter_key)
+            frame = encode_frame(TEXT, dumps({"type": "snapshot",
+                                              "devices": [device.to_record() for device in devices]}))
+            self._snapshots[filter_key] = frame
+        return frame
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               headers: Dict[str, str], query: Dict[str, str]):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self._write_response(writer, 400, {"error": "Missing Sec-WebSocket-Key"}, keep_alive=False)
+            return
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept_key(key).encode() + b"\r\n\r\n")
+
+        client = _WebSocketClient(writer, self._filter_key(query))
+        writer.write(self._snapshot(client.filter_key))
+        self._clients.setdefault(client.filter_key, set()).add(client)
+        messages = MessageReader(reader)
+        try:
+            while True:
+                opcode, payload = await messages.read()
+                if opcode == CLOSE:
+                    writer.write(encode_frame(CLOSE, payload[:2]))
+                    break
+                if opcode == PING:
+                    writer.write(encode_frame(PONG, payload))
+                elif opcode == TEXT:
+                    reply = await self._handle_ws_message(payload)
+                    writer.write(encode_frame(TEXT, dumps(reply)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, WebSocketError):
+            pass
+        finally:
+            clients = self._clients.get(client.filter_key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self._clients[client.filter_key]
+
+    async def _handle_ws_message(self, payload: bytes) -> Dict[str, Any]:
+        try:
+            message = loads(payload)
+        except ValueError:
+            return {"type": "error", "error": "Invalid JSON"}
+        if not isinstance(message, dict):
+            return {"type": "error", "error": "Expected a JSON object"}
+        commands = message.get('commands')
+        if commands is None:
+            commands = [message]
+        try:
+            if not isinstance(commands, list):
+                raise HttpError(400, "commands must be a list")
+            results = await self.run_commands(commands)
+        except HttpError as e:
+            return {"type": "error", "id": message.get('id'), "error": e.message}
+        return {"type": "results", "id": message.get('id'), "results": results}
+
+    def _on_events(self, events: List[DeviceEvent]):
+        """EventBus callback; hands the batch to the event loop"""
+        resync = False
+        if self._subscription is not None and self._subscription.dropped:
+            self._subscription.dropped = 0
+            resync = True
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._broadcast, events, resync)
+
+    def _broadcast(self, events: List[DeviceEvent], resync: bool = False):
+        """Write a batch of events to every subscribed WebSocket client"""
+        self._snapshots.clear()
+        keys = []
+        for event in events:
+            if event.kind == "added":
+                self._remember(event.device_id, event.changes)
+            elif event.kind == "changed" and 'location' in event.changes:
+                device_type = self._device_keys.get(event.device_id, ('', ''))[0]
+                self._device_keys[event.device_id] = (device_type, event.changes['location'].lower())
+            keys.append(self._device_keys.get(event.device_id, ('', '')))
+            if event.kind == "removed":
+                self._device_keys.pop(event.device_id, None)
+        if not self._clients:
+            return
+        if resync:
+            for clients in self._clients.values():
+                for client in clients:
+                    self._send(client, self.RESYNC_FRAME)
+
+        encoded = [event._asdict() for event in events]
+        for filter_key, clients in list(self._clients.items()):
+            device_type, location = filter_key
+            if device_type is None and location is None:
+                selected = encoded
+            else:
+                selected = [event for event, (event_type, event_location) in zip(encoded, keys)
+                            if (device_type is None or event_type == device_type)
+                            and (location is None or event_location == location)]
+            if not selected:
+                continue
+            frame = encode_frame(TEXT, dumps({"type": "events", "events": selected}))
+            for client in clients:
+                self._send(client, frame)
+
+    def _send(self, client: _WebSocketClient, frame: bytes):
+        transport = client.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > self.MAX_CLIENT_BUFFER:
+            client.lagged = True
+            client.dropped += 1
+            return
+        if client.lagged:
+            client.lagged = False
+            client.writer.write(self.RESYNC_FRAME)
+        client.writer.write(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart home HTTP/WebSocket API")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--metrics', action='store_true', help="record metrics, served at GET /metrics")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+    try:
+        asyncio.run(ApiServer(host=args.host, port=args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
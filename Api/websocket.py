@@ -0,0 +1,118 @@
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from typing import List, Optional, Tuple
+
+# RFC 6455 opcodes
+CONTINUATION = 0x0
+TEXT = 0x1
+BINARY = 0x2
+CLOSE = 0x8
+PING = 0x9
+PONG = 0xA
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+class WebSocketError(Exception):
+    """Raised for protocol violations by the peer"""
+    pass
+
+
+def accept_key(key: str) -> str:
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1(key.encode() + _GUID).digest()).decode()
+
+
+def new_key() -> str:
+    """A random Sec-WebSocket-Key for client handshakes"""
+    return base64.b64encode(os.urandom(16)).decode()
+
+
+def _mask(payload: bytes, mask: bytes) -> bytes:
+    # XOR the whole payload at once as one big integer instead of byte by byte
+    length = len(payload)
+    repeated = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+
+
+def encode_frame(opcode: int, payload: bytes, masked: bool = False) -> bytes:
+    """Encode a single final frame; servers send unmasked frames, clients masked ones"""
+    length = len(payload)
+    mask_bit = 0x80 if masked else 0
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+    if masked:
+        mask = os.urandom(4)
+        return header + mask + _mask(payload, mask)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """
+    Read one frame
+    Returns: (final: bool, opcode: int, unmasked payload: bytes)
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > MAX_MESSAGE_SIZE:
+        raise WebSocketError("Frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = _mask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class MessageReader:
+    """Reads complete messages from one connection, joining fragments
+
+    Control frames (CLOSE, PING, PONG) may arrive between the fragments of a
+    message; they are returned as they arrive and the partial message is
+    kept until its remaining fragments follow.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+        self._fragments: List[bytes] = []
+        self._opcode: Optional[int] = None
+        self._size = 0
+
+    async def read(self) -> Tuple[int, bytes]:
+        """
+        Read the next control frame or complete data message
+        Returns: (opcode: int, payload: bytes)
+        """
+        while True:
+            final, opcode, payload = await read_frame(self.reader)
+            if opcode >= CLOSE:
+                if not final:
+                    raise WebSocketError("Fragmented control frame")
+                return opcode, payload
+            if opcode == CONTINUATION:
+                if self._opcode is None:
+                    raise WebSocketError("Continuation frame without a message")
+            elif self._opcode is not None:
+                raise WebSocketError("New message before the previous one finished")
+            else:
+                self._opcode = opcode
+            self._size += len(payload)
+            if self._size > MAX_MESSAGE_SIZE:
+                raise WebSocketError("Message too large")
+            self._fragments.append(payload)
+            if final:
+                message = self._opcode, b''.join(self._fragments)
+                self._fragments, self._opcode, self._size = [], None, 0
+                return message
@@ -0,0 +1 @@
+"""Automation package for rules and schedules driving smart home devices"""
@@ -0,0 +1,221 @@
+import operator
+import os
+import sys
+from datetime import datetime, time as dtime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+from Devices.events import DeviceEvent, Subscription, caused_by
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+def run_device_action(device_manager: DeviceManager, dispatcher: Optional[CommandDispatcher],
+                      device_id: str, action: str, args: Tuple = ()) -> bool:
+    """Run one device method, through the dispatcher when one is given"""
+    if dispatcher is not None:
+        dispatcher.submit(device_id, action, *args)
+        return True
+    device = device_manager.get_device(device_id)
+    method = getattr(device, action, None) if device is not None else None
+    if action not in DeviceManager.BULK_ACTIONS or method is None:
+        print(f"Cannot run {action} on {device_id}")
+        return False
+    return bool(method(*args))
+
+
+class Trigger(NamedTuple):
+    """Fires when a device attribute changes to a value matching op/value
+
+    With op "changed" the trigger fires on any new value of the attribute.
+    """
+    device_id: str
+    attribute: str
+    op: str = "=="
+    value: Any = None
+
+
+class Action(NamedTuple):
+    """A device method to invoke when a rule fires"""
+    device_id: str
+    action: str
+    args: Tuple = ()
+
+
+class TimeWindow(NamedTuple):
+    """Daily time window; wraps past midnight when start > end"""
+    start: dtime
+    end: dtime
+
+    @classmethod
+    def parse(cls, start: str, end: str) -> 'TimeWindow':
+        """Build a window from "HH:MM" strings, e.g. TimeWindow.parse("22:00", "06:00")"""
+        return cls(dtime.fromisoformat(start), dtime.fromisoformat(end))
+
+    def contains(self, moment: datetime) -> bool:
+        now = moment.time()
+        if self.start <= self.end:
+            return self.start <= now < self.end
+        return now >= self.start or now < self.end
+
+
+class Rule(NamedTuple):
+    """When trigger matches (inside time_window, if any), run actions"""
+    rule_id: str
+    trigger: Trigger
+    actions: Tuple[Action, ...]
+    time_window: Optional[TimeWindow] = None
+
+
+class RulesEngine:
+    """Evaluates automation rules against device change events
+
+    Rules are compiled into an index keyed by (device_id, attribute), so an
+    event only touches rules watching the attributes it changed. Equality
+    triggers are further bucketed by their expected value and matched with a
+    single dict lookup; other operators are checked one by one within their
+    (device_id, attribute) bucket.
+
+    Changes made by a rule's actions carry the chain of rules that caused
+    them (DeviceEvent.cause). A rule never fires on a change its own
+    actions led to, so rules that trigger each other cannot loop, and
+    chains longer than MAX_CASCADE_DEPTH are cut off.
+
+    Example: "when front_door unlocks after 22:00, turn on living_room_light"
+        Rule("night_entry", Trigger("front_door", "locked", "==", False),
+             (Action("living_room_light", "turn_on"),),
+             TimeWindow.parse("22:00", "06:00"))
+    """
+
+    # Longest chain of rules triggering rules
+    MAX_CASCADE_DEPTH = 8
+
+    def __init__(self, device_manager: DeviceManager, dispatcher: Optional[CommandDispatcher] = None):
+        self.device_manager = device_manager
+        self.dispatcher = dispatcher
+        self._rules: Dict[str, Rule] = {}
+        # (device_id, attribute) -> {expected value: [rules]}
+        self._equality_index: Dict[Tuple[str, str], Dict[Any, List[Rule]]] = {}
+        # (device_id, attribute) -> [(predicate, rule)]
+        self._predicate_index: Dict[Tuple[str, str], List[Tuple[Callable[[Any], bool], Rule]]] = {}
+        self._subscription: Optional[Subscription] = None
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def add_rule(self, rule: Rule):
+        """Compile and index a rule, replacing any rule with the same ID"""
+        trigger = rule.trigger
+        if trigger.op != "changed" and trigger.op not in OPERATORS:
+            raise ValueError(f"Unknown trigger operator: {trigger.op}")
+        if rule.rule_id in self._rules:
+            self.remove_rule(rule.rule_id)
+
+        key = (trigger.device_id, trigger.attribute)
+        if trigger.op == "==":
+            self._equality_index.setdefault(key, {}).setdefault(trigger.value, []).append(rule)
+        else:
+            if trigger.op == "changed":
+                predicate = lambda value: True
+            else:
+                compare, expected = OPERATORS[trigger.op], trigger.value
+                predicate = lambda value, compare=compare, expected=expected: compare(value, expected)
+            self._predicate_index.setdefault(key, []).append((predicate, rule))
+        self._rules[rule.rule_id] = rule
+
+    def add_rules(self, rules: Iterable[Rule]):
+        for rule in rules:
+            self.add_rule(rule)
+
+    def remove_rule(self, rule_id: str) -> bool:
+        """Remove a rule from the engine and its indexes"""
+        rule = self._rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        key = (rule.trigger.device_id, rule.trigger.attribute)
+        if rule.trigger.op == "==":
+            buckets = self._equality_index[key]
+            bucket = buckets[rule.trigger.value]
+            bucket.remove(rule)
+            if not bucket:
+                del buckets[rule.trigger.value]
+            if not buckets:
+                del self._equality_index[key]
+        else:
+            entries = [entry for entry in self._predicate_index[key] if entry[1] is not rule]
+            if entries:
+                self._predicate_index[key] = entries
+            else:
+                del self._predicate_index[key]
+        return True
+
+    def match(self, device_id: str, changes: Dict[str, Any], now: Optional[datetime] = None) -> List[Rule]:
+        """Return the rules fired by a device change, without running them"""
+        matched = []
+        for attribute, value in changes.items():
+            key = (device_id, attribute)
+            buckets = self._equality_index.get(key)
+            if buckets:
+                try:
+                    matched.extend(buckets.get(value, ()))
+                except TypeError:
+                    pass  # Unhashable values cannot match an equality trigger
+            for predicate, rule in self._predicate_index.get(key, ()):
+                try:
+                    if predicate(value):
+                        matched.append(rule)
+                except TypeError:
+                    pass  # Incomparable types never match
+
+        if matched and any(rule.time_window is not None for rule in matched):
+            now = now or datetime.now()
+            matched = [rule for rule in matched if rule.time_window is None or rule.time_window.contains(now)]
+        return matched
+
+    def run(self, rule: Rule):
+        """Execute a rule's actions, through the dispatcher when one is set"""
+        for action in rule.actions:
+            run_device_action(self.device_manager, self.dispatcher,
+                              action.device_id, action.action, action.args)
+
+    def handle_events(self, events: List[DeviceEvent]):
+        """Evaluate a batch of events and run every rule they fire"""
+        for event in events:
+            if event.kind != "changed":
+                continue
+            chain = event.cause
+            if len(chain) >= self.MAX_CASCADE_DEPTH:
+                print(f"Stopping rule cascade {' -> '.join(chain)}: deeper than {self.MAX_CASCADE_DEPTH}")
+                continue
+            for rule in self.match(event.device_id, event.changes,
+                                   datetime.fromtimestamp(event.timestamp)):
+                if rule.rule_id in chain:
+                    continue  # Caused by this rule's own actions
+                with caused_by(chain + (rule.rule_id,)):
+                    self.run(rule)
+
+    def start(self):
+        """Start reacting to the device manager's change events"""
+        if self._subscription is None:
+            self._subscription = self.device_manager.events.subscribe(self.handle_events,
+                                                                      kinds=("changed",))
+
+    def stop(self):
+        """Stop reacting to change events"""
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
@@ -0,0 +1,339 @@
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Automation.rules import run_device_action
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+from FileLogic.journal import JournalStore
+
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_SETS = {
+    "daily": frozenset(range(7)),
+    "weekdays": frozenset(range(5)),
+    "weekends": frozenset((5, 6)),
+}
+
+
+class Schedule(NamedTuple):
+    """A time of day repeated on a set of weekdays (0 = Monday)"""
+    at: dtime
+    days: FrozenSet[int] = DAY_SETS["daily"]
+
+    @classmethod
+    def parse(cls, at: str, days: str = "daily") -> 'Schedule':
+        """
+        Build a schedule from "HH:MM" and a day spec
+        days is "daily", "weekdays", "weekends" or a list such as "mon,wed,fri" or "mon-thu"
+        """
+        spec = days.strip().lower()
+        if spec in DAY_SETS:
+            return cls(dtime.fromisoformat(at), DAY_SETS[spec])
+
+        selected = set()
+        for part in spec.split(','):
+            first, _, last = part.strip().partition('-')
+            try:
+                start = WEEKDAY_NAMES.index(first)
+                end = WEEKDAY_NAMES.index(last) if last else start
+            except ValueError:
+                raise ValueError(f"Unknown day spec: {days}")
+            selected.update(range(start, end + 1) if start <= end else
+                            itertools.chain(range(start, 7), range(end + 1)))
+        return cls(dtime.fromisoformat(at), frozenset(selected))
+
+    def next_after(self, timestamp: float) -> float:
+        """Epoch seconds of the first occurrence strictly after timestamp"""
+        if not self.days:
+            raise ValueError("Schedule has no days")
+        candidate = datetime.combine(datetime.fromtimestamp(timestamp).date(), self.at)
+        for offset in range(8):
+            moment = candidate + timedelta(days=offset)
+            if moment.weekday() in self.days and moment.timestamp() > timestamp:
+                return moment.timestamp()
+        raise ValueError("Schedule has no future occurrence")  # Unreachable with non-empty days
+
+
+class Job(NamedTuple):
+    """A device action to run at next_run, then again per schedule if one is set"""
+    job_id: str
+    device_id: str
+    action: str
+    args: Tuple = ()
+    schedule: Optional[Schedule] = None
+    next_run: float = 0.0  # Epoch seconds
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {"job_id": self.job_id, "device_id": self.device_id, "action": self.action,
+                  "args": list(self.args), "next_run": self.next_run}
+        if self.schedule is not None:
+            record["at"] = self.schedule.at.strftime("%H:%M:%S")
+            record["days"] = sorted(self.schedule.days)
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any],
+                    schedules: Optional[Dict[Tuple, Schedule]] = None) -> 'Job':
+        """Rebuild a job; pass a shared schedules dict to reuse identical Schedule objects"""
+        schedule = None
+        at = record.get("at")
+        if at is not None:
+            key = (at, tuple(record["days"]))
+            schedule = schedules.get(key) if schedules is not None else None
+            if schedule is None:
+                schedule = Schedule(dtime.fromisoformat(at), frozenset(key[1]))
+                if schedules is not None:
+                    schedules[key] = schedule
+        return cls._make((record["job_id"], record["device_id"], record["action"],
+                          tuple(record.get("args", ())), schedule, record["next_run"]))
+
+
+class Scheduler:
+    """Runs timed device actions from a background thread
+
+    Pending jobs sit in a binary heap ordered by next_run, so adding a job
+    is O(log n) and the thread only ever looks at the head. Cancelling is
+    O(1): the job is dropped from the job table and its heap entry is
+    skipped when it surfaces. Stale entries are purged in one pass once
+    they outnumber the live ones.
+
+    Jobs are persisted to a JournalStore together with their precomputed
+    next_run, so startup is a single heapify of the stored jobs; only jobs
+    whose run time passed while the app was closed are recomputed. Jobs
+    overdue by less than ``misfire_grace`` seconds still run once.
+
+    Example: "thermostat to 19°C at 23:00 on weekdays"
+        scheduler.schedule_daily("night_heat", "living_room_thermostat",
+                                 "set_temperature", "23:00", "weekdays", args=(19,))
+    """
+
+    JOBS_FILE = os.path.join(os.path.dirname(__file__), 'schedules.json')
+    MAX_SLEEP = 30.0  # Re-check the clock at least this often (suspend, clock changes)
+
+    def __init__(self, device_manager: DeviceManager, dispatcher: Optional[CommandDispatcher] = None,
+                 jobs_file: Optional[str] = None, misfire_grace: float = 60.0):
+        self.device_manager = device_manager
+        self.dispatcher = dispatcher
+        self.misfire_grace = misfire_grace
+        self._store = JournalStore(jobs_file or self.JOBS_FILE, key_field='job_id')
+
+        self._jobs: Dict[str, Job] = {}
+        # Heap of (next_run, seq, job_id); an entry is live while _live[job_id] == seq
+        self._heap: List[Tuple[float, int, str]] = []
+        self._live: Dict[str, int] = {}
+        self._stale = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._load_jobs()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _load_jobs(self):
+        """Restore persisted jobs, recomputing only the ones that were missed"""
+        try:
+            records = self._store.load()
+        except Exception as e:
+            print(f"Error loading schedules: {e}")
+            return
+
+        now = time.time()
+        cutoff = now - self.misfire_grace
+        updated, expired = [], []
+        schedules: Dict[Tuple, Schedule] = {}
+        for record in records:
+            try:
+                job = Job.from_record(record, schedules)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Error loading schedule {record.get('job_id')}: {e}")
+                continue
+            if job.next_run < cutoff:
+                if job.schedule is None:
+                    expired.append(job.job_id)
+                    continue
+                job = job._replace(next_run=job.schedule.next_after(now))
+                updated.append(job.to_record())
+            self._jobs[job.job_id] = job
+
+        seq = self._seq
+        self._heap = [(job.next_run, next(seq), job.job_id) for job in self._jobs.values()]
+        self._live = {job_id: entry_seq for _, entry_seq, job_id in self._heap}
+        heapq.heapify(self._heap)
+
+        if updated:
+            self._store.put_many(updated)
+        if expired:
+            self._store.delete_many(expired)
+
+    def _push(self, job: Job):
+        """Add or replace a job in the table and heap; caller holds _cond"""
+        if job.job_id in self._live:
+            self._stale += 1
+        entry = (job.next_run, next(self._seq), job.job_id)
+        self._jobs[job.job_id] = job
+        self._live[job.job_id] = entry[1]
+        heapq.heappush(self._heap, entry)
+
+    def _purge_stale(self):
+        """Rebuild the heap without cancelled entries once they dominate it"""
+        if self._stale > 1024 and self._stale * 2 > len(self._heap):
+            live = self._live
+            self._heap = [entry for entry in self._heap if live.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _prepare(self, job: Job, now: float) -> Job:
+        if job.action not in DeviceManager.BULK_ACTIONS:
+            raise ValueError(f"Unsupported action: {job.action}")
+        if not job.next_run:
+            if job.schedule is None:
+                raise ValueError(f"Job {job.job_id} needs a schedule or a next_run")
+            job = job._replace(next_run=job.schedule.next_after(now))
+        return job
+
+    def add_job(self, job: Job) -> Job:
+        """Schedule a job, replacing any job with the same ID; returns it with next_run filled in"""
+        return self.add_jobs([job])[0]
+
+    def add_jobs(self, jobs: Iterable[Job]) -> List[Job]:
+        """Schedule many jobs with a single journal append"""
+        now = time.time()
+        prepared = [self._prepare(job, now) for job in jobs]
+        with self._cond:
+            head = self._heap[0][0] if self._heap else None
+            for job in prepared:
+                self._push(job)
+            self._store.put_many([job.to_record() for job in prepared])
+            if head is None or (prepared and min(job.next_run for job in prepared) < head):
+                self._cond.notify()
+        return prepared
+
+    def schedule_daily(self, job_id: str, device_id: str, action: str, at: str,
+                       days: str = "daily", args: Tuple = ()) -> Job:
+        """Run action at "HH:MM" on the given days, e.g. days="weekdays" """
+        return self.add_job(Job(job_id, device_id, action, tuple(args), Schedule.parse(at, days)))
+
+    def schedule_once(self, job_id: str, device_id: str, action: str,
+                      run_at: Union[datetime, float], args: Tuple = ()) -> Job:
+        """Run action once at a datetime or epoch timestamp"""
+        if isinstance(run_at, datetime):
+            run_at = run_at.timestamp()
+        return self.add_job(Job(job_id, device_id, action, tuple(args), None, run_at))
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a pending job"""
+        with self._cond:
+            if self._jobs.pop(job_id, None) is None:
+                return False
+            del self._live[job_id]
+            self._stale += 1
+            self._store.delete(job_id)
+            self._purge_stale()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def get_all_jobs(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def next_run_time(self) -> Optional[float]:
+        """Epoch seconds of the earliest pending job, if any"""
+        with self._cond:
+            self._drop_stale_head()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale_head(self):
+        heap, live = self._heap, self._live
+        while heap and live.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+            self._stale -= 1
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        Run every job due at or before now and reschedule recurring ones
+        Returns: the number of jobs run
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            heap, live = self._heap, self._live
+            rescheduled, finished = [], []
+            while heap and heap[0][0] <= now:
+                run_at, seq, job_id = heapq.heappop(heap)
+                if live.get(job_id) != seq:
+                    self._stale -= 1
+                    continue
+                job = self._jobs[job_id]
+                due.append(job)
+                if job.schedule is None:
+                    del self._jobs[job_id]
+                    del live[job_id]
+                    finished.append(job_id)
+                else:
+                    job = job._replace(next_run=job.schedule.next_after(max(now, run_at)))
+                    del live[job_id]  # Its entry is already off the heap
+                    self._push(job)
+                    rescheduled.append(job.to_record())
+            if rescheduled:
+                self._store.put_many(rescheduled)
+            if finished:
+                self._store.delete_many(finished)
+
+        for job in due:
+            try:
+                run_device_action(self.device_manager, self.dispatcher,
+                                  job.device_id, job.action, job.args)
+            except Exception as e:
+                print(f"Error running scheduled job {job.job_id}: {e}")
+        return len(due)
+
+    def _run_forever(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._drop_stale_head()
+                delay = self._heap[0][0] - time.time() if self._heap else self.MAX_SLEEP
+                if delay > 0:
+                    self._cond.wait(min(delay, self.MAX_SLEEP))
+                    continue
+            self.run_pending()
+
+    def start(self):
+        """Start running due jobs on a background thread"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run_forever, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread; pending jobs stay scheduled"""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def close(self):
+        """Stop the thread and close the job journal"""
+        self.stop()
+        self._store.close()
@@ -1,15 +1,54 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, TYPE_CHECKING
 from datetime import datetime
+from functools import lru_cache
+import time
+
+if TYPE_CHECKING:
+    from .transport import DeviceTransport
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Called as listener(device, {attribute: new_value, ...}) after each change
+ChangeListener = Callable[['Device', Dict[str, Any]], None]
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """Epoch seconds for a stored last_updated string; now if missing or invalid"""
+    if value:
+        try:
+            return _parse_timestamp(value)
+        except (TypeError, ValueError):
+            pass
+    return time.time()
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(value: str) -> float:
+    """Cached because devices saved together share the same second; errors are not cached"""
+    # fromisoformat accepts TIMESTAMP_FORMAT and is much faster than strptime
+    return datetime.fromisoformat(value).timestamp()
+
 
 class Device(ABC):
-    """Abstract base class for all smart home devices"""
+    """Abstract base class for all smart home devices
+
+    Devices use __slots__ to avoid a per-instance __dict__, keep
+    last_updated as a float epoch, and cache their serialized record until
+    the next state change.
+    """
+    __slots__ = ('_device_id', '_name', '_location', '_status', '_last_updated',
+                 '_change_listener', '_record_cache', '_transport')
+
     def __init__(self, device_id: str, name: str, location: str):
         self._device_id = device_id
         self._name = name
         self._location = location
         self._status = False  # False = off, True = on
-        self._last_updated = datetime.now()
+        self._last_updated = time.time()
+        self._change_listener: Optional[ChangeListener] = None
+        self._record_cache: Optional[Dict[str, Any]] = None
+        self._transport: Optional['DeviceTransport'] = None
 
     @property
     def device_id(self) -> str:
@@ -29,7 +68,48 @@ class Device(ABC):
 
     @property
     def last_updated(self) -> datetime:
-        return self._last_updated
+        return datetime.fromtimestamp(self._last_updated)
+
+    def _format_last_updated(self) -> str:
+        return time.strftime(TIMESTAMP_FORMAT, time.localtime(self._last_updated))
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'Device':
+        """Rebuild a device from its persisted record
+
+        Fields are restored directly, without calling turn_on/turn_off, so
+        loading neither sends commands nor notifies listeners, and
+        last_updated keeps its stored value.
+        """
+        device = cls.__new__(cls)
+        device._device_id = record['device_id']
+        device._name = record['name']
+        device._location = record['location']
+        device._status = record.get('status') == "ON"
+        device._last_updated = parse_timestamp(record.get('last_updated'))
+        device._change_listener = None
+        device._record_cache = None
+        device._transport = None
+        device._restore_details(record)
+        return device
+
+    def _restore_details(self, record: Dict[str, Any]):
+        """Restore type-specific fields in from_record"""
+        pass
+
+    def set_name(self, name: str) -> bool:
+        """Rename the device"""
+        if not name:
+            return False
+        self._update(name=name)
+        return True
+
+    def set_location(self, location: str) -> bool:
+        """Move the device to another location"""
+        if not location:
+            return False
+        self._update(location=location)
+        return True
 
     @abstractmethod
     def turn_on(self) -> bool:
@@ -42,21 +122,79 @@ class Device(ABC):
         pass
 
     @abstractmethod
-    def get_status_details(self) -> Dict[str, Any]:
-        """Get detailed status of the device"""
+    def _status_details(self) -> Dict[str, Any]:
+        """Build the detailed status of the device"""
         pass
 
-    def update_timestamp(self):
-        """Update the last_updated timestamp"""
-        self._last_updated = datetime.now()
+    def get_status_details(self) -> Dict[str, Any]:
+        """Get detailed status of the device"""
+        details = dict(self.to_record())
+        del details['type']
+        return details
+
+    def to_record(self) -> Dict[str, Any]:
+        """Get the persisted form of the device, cached until the next change
+
+        The returned dict is shared and must not be mutated.
+        """
+        if self._record_cache is None:
+            record = self._status_details()
+            record['type'] = self.__class__.__name__.lower()
+            self._record_cache = record
+        return self._record_cache
+
+    def attach_transport(self, transport: Optional['DeviceTransport']):
+        """Deliver future commands through transport; None keeps them local"""
+        self._transport = transport
+
+    def _send(self, command: str, **params) -> bool:
+        """Deliver a command to the physical device before changing local state"""
+        if self._transport is None:
+            return True
+        success, _ = self._transport.send(self._device_id, command, params)
+        return success
+
+    def set_change_listener(self, listener: Optional[ChangeListener]):
+        """Register a callback invoked with (device, changes) after every state change"""
+        self._change_listener = listener
+
+    def _update(self, **values):
+        """Set attributes by name (stored as _<name>) and report the ones whose value changed
+
+        Re-asserting the current state, e.g. turning on a light that is
+        already on, notifies nobody.
+        """
+        changes = {}
+        for attribute, value in values.items():
+            slot = '_' + attribute
+            if getattr(self, slot) != value:
+                setattr(self, slot, value)
+                changes[attribute] = value
+        if changes:
+            self.update_timestamp(**changes)
+
+    def update_timestamp(self, **changes):
+        """Update the last_updated timestamp and notify the change listener
+
+        Keyword arguments name the attributes that changed and their new values.
+        """
+        self._last_updated = time.time()
+        self._record_cache = None
+        if self._change_listener is not None:
+            self._change_listener(self, changes)
 
 
 class Light(Device):
     """Smart Light device"""
+    __slots__ = ('_brightness',)
+
     def __init__(self, device_id: str, name: str, location: str, brightness: int = 100):
         super().__init__(device_id, name, location)
         self._brightness = min(max(brightness, 0), 100)  # Ensure brightness is between 0-100
 
+    def _restore_details(self, record: Dict[str, Any]):
+        self._brightness = min(max(record.get('brightness', 100), 0), 100)
+
     @property
     def brightness(self) -> int:
         return self._brightness
@@ -64,39 +202,48 @@ class Light(Device):
     def set_brightness(self, level: int) -> bool:
         """Set brightness level (0-100)"""
         if 0 <= level <= 100:
-            self._brightness = level
-            self.update_timestamp()
+            if not self._send("set_brightness", level=level):
+                return False
+            self._update(brightness=level)
             return True
         return False
 
     def turn_on(self) -> bool:
-        self._status = True
-        self.update_timestamp()
+        if not self._send("turn_on"):
+            return False
+        self._update(status=True)
         return True
 
     def turn_off(self) -> bool:
-        self._status = False
-        self.update_timestamp()
+        if not self._send("turn_off"):
+            return False
+        self._update(status=False)
         return True
 
-    def get_status_details(self) -> Dict[str, Any]:
+    def _status_details(self) -> Dict[str, Any]:
         return {
             "device_id": self._device_id,
             "name": self._name,
             "location": self._location,
             "status": "ON" if self._status else "OFF",
             "brightness": self._brightness,
-            "last_updated": self._last_updated.strftime("%Y-%m-%d %H:%M:%S")
+            "last_updated": self._format_last_updated()
         }
 
 
 class Thermostat(Device):
     """Smart Thermostat device"""
+    __slots__ = ('_temperature', '_mode')
+
     def __init__(self, device_id: str, name: str, location: str, temperature: float = 22.0):
         super().__init__(device_id, name, location)
         self._temperature = temperature
         self._mode = "HEAT"  # HEAT, COOL, or OFF
 
+    def _restore_details(self, record: Dict[str, Any]):
+        self._temperature = record.get('temperature', 22.0)
+        self._mode = record.get('mode', "HEAT" if self._status else "OFF")
+
     @property
     def temperature(self) -> float:
         return self._temperature
@@ -108,32 +255,34 @@ class Thermostat(Device):
     def set_temperature(self, temp: float) -> bool:
         """Set target temperature"""
         if 10 <= temp <= 30:  # Reasonable temperature range
-            self._temperature = temp
-            self.update_timestamp()
+            if not self._send("set_temperature", temp=temp):
+                return False
+            self._update(temperature=temp)
             return True
         return False
 
     def set_mode(self, mode: str) -> bool:
         """Set thermostat mode"""
         if mode in ["HEAT", "COOL", "OFF"]:
-            self._mode = mode
-            self.update_timestamp()
+            if not self._send("set_mode", mode=mode):
+                return False
+            self._update(mode=mode)
             return True
         return False
 
     def turn_on(self) -> bool:
-        self._status = True
-        self._mode = "HEAT"  # Default to heat mode when turning on
-        self.update_timestamp()
+        if not self._send("turn_on"):
+            return False
+        self._update(status=True, mode="HEAT")  # Default to heat mode when turning on
         return True
 
     def turn_off(self) -> bool:
-        self._status = False
-        self._mode = "OFF"
-        self.update_timestamp()
+        if not self._send("turn_off"):
+            return False
+        self._update(status=False, mode="OFF")
         return True
 
-    def get_status_details(self) -> Dict[str, Any]:
+    def _status_details(self) -> Dict[str, Any]:
         return {
             "device_id": self._device_id,
             "name": self._name,
@@ -141,39 +290,45 @@ class Thermostat(Device):
             "status": "ON" if self._status else "OFF",
             "temperature": self._temperature,
             "mode": self._mode,
-            "last_updated": self._last_updated.strftime("%Y-%m-%d %H:%M:%S")
+            "last_updated": self._format_last_updated()
         }
 
 
 class SmartLock(Device):
     """Smart Lock device"""
+    __slots__ = ('_locked',)
+
     def __init__(self, device_id: str, name: str, location: str):
         super().__init__(device_id, name, location)
         self._locked = True  # True = locked, False = unlocked
 
+    def _restore_details(self, record: Dict[str, Any]):
+        self._locked = record.get('status', "LOCKED") == "LOCKED"
+        self._status = self._locked
+
     @property
     def locked(self) -> bool:
         return self._locked
 
     def turn_on(self) -> bool:
         """Lock the door"""
-        self._status = True
-        self._locked = True
-        self.update_timestamp()
+        if not self._send("turn_on"):
+            return False
+        self._update(status=True, locked=True)
         return True
 
     def turn_off(self) -> bool:
         """Unlock the door"""
-        self._status = False
-        self._locked = False
-        self.update_timestamp()
+        if not self._send("turn_off"):
+            return False
+        self._update(status=False, locked=False)
         return True
 
-    def get_status_details(self) -> Dict[str, Any]:
+    def _status_details(self) -> Dict[str, Any]:
         return {
             "device_id": self._device_id,
             "name": self._name,
             "location": self._location,
             "status": "LOCKED" if self._locked else "UNLOCKED",
-            "last_updated": self._last_updated.strftime("%Y-%m-%d %H:%M:%S")
+            "last_updated": self._format_last_updated()
         } 
\ No newline at end of file
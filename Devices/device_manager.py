@@ -1,22 +1,117 @@
-from typing import Dict, List, Optional, Type
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type, Union
 from .device import Device, Light, Thermostat, SmartLock
-import json
+from .events import EventBus
+from .rwlock import ReadWriteLock
+from .transport import DeviceTransport
+from FileLogic.coalescer import WriteCoalescer
+from FileLogic.journal import JournalStore
+from FileLogic.sqlite_store import SqliteStore, TableSchema
+from Telemetry.metrics import metrics
+import atexit
 import os
+import threading
+import time
+
+# Devices table of the SQLite backend; queries by type and location use the indexes
+DEVICE_TABLE = TableSchema(
+    table="devices",
+    key_field="device_id",
+    columns=("device_id", "type", "name", "location", "status", "brightness",
+             "temperature", "mode", "last_updated"),
+    derived=(("location_key", lambda record: record['location'].lower()),),
+    indexes=(("type", "location_key"), ("location_key",)),
+)
+
+LOAD_SECONDS = metrics.histogram("devices.load_seconds")
+SAVE_SECONDS = metrics.histogram("devices.save_seconds")
+FLUSH_SECONDS = metrics.histogram("devices.flush_seconds")
+DEVICES_LOADED = metrics.counter("devices.loaded")
+RECORDS_FLUSHED = metrics.counter("devices.flushed_records")
 
 class DeviceManager:
-    """Singleton class to manage all smart home devices"""
+    """Singleton class to manage all smart home devices
+
+    Concurrency model:
+    - Construction is thread-safe: the first DeviceManager() call creates and
+      loads the instance under a class-level lock, later calls return it.
+      That instance is the default home; DeviceManager.create() builds
+      independent managers for other homes (see Devices/home_registry.py).
+    - The registry (devices and the type/location indexes) is guarded by a
+      ReadWriteLock. Queries take it shared, so they run in parallel;
+      add/remove/move take it exclusively. Journal writes happen inside the
+      exclusive section so they reach disk in the same order as the changes.
+    - get_all_devices() returns a copy of an immutable snapshot that is
+      rebuilt lazily after a write, so callers can iterate without holding
+      any lock while other threads add or remove devices.
+    - Device state itself (brightness, mode, ...) is not locked here;
+      CommandDispatcher serializes commands per device. Device methods must
+      never be called while holding the registry lock, because their change
+      notifications may need it.
+
+    Devices are persisted either as devices.json plus a journal ("json", the
+    default) or in a WAL-mode SQLite table ("sqlite"). The backend is chosen
+    by the first construction, DeviceManager(backend="sqlite"), or by the
+    BACKEND class attribute; FileLogic/migrate.py copies existing JSON data.
+    """
     _instance = None
+    _instance_lock = threading.RLock()
+
+    # Device state changes are coalesced before being journaled: a batch is
+    # written once changes stop for FLUSH_DELAY seconds, at most
+    # FLUSH_MAX_DELAY seconds after the first change, or as soon as
+    # FLUSH_MAX_BATCH devices are dirty.
+    FLUSH_DELAY = 0.25
+    FLUSH_MAX_DELAY = 2.0
+    FLUSH_MAX_BATCH = 500
+
+    # Device methods that apply() may invoke on a group of devices
+    BULK_ACTIONS = ("turn_on", "turn_off", "set_brightness", "set_temperature",
+                    "set_mode", "set_name", "set_location")
+
+    DEVICES_FILE = os.path.join(os.path.dirname(__file__), 'devices.json')
+    DATABASE_FILE = os.path.join(os.path.dirname(__file__), 'devices.db')
+    BACKEND = "json"
 
-    def __new__(cls):
+    def __new__(cls, backend: Optional[str] = None):
         if cls._instance is None:
-            cls._instance = super(DeviceManager, cls).__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(DeviceManager, cls).__new__(cls)
+                    instance._initialized = False
+                    cls._instance = instance
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
         if self._initialized:
             return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self._initialize(backend or self.BACKEND)
+            self._initialized = True
 
+    @classmethod
+    def create(cls, path: Optional[str] = None, backend: Optional[str] = None) -> 'DeviceManager':
+        """Create a manager independent of the process-wide instance
+
+        path is the devices JSON file or SQLite database, depending on the
+        backend, and defaults to the class's DEVICES_FILE/DATABASE_FILE.
+        Two managers must never share a path.
+        """
+        instance = super(DeviceManager, cls).__new__(cls)
+        instance._initialize(backend or cls.BACKEND, path)
+        instance._initialized = True
+        return instance
+
+    def _initialize(self, backend: str, path: Optional[str] = None):
+        """Set up state and load devices; runs once per instance"""
+        self._lock = ReadWriteLock()
+        # Taken under _lock before a store write so writes reach the store in
+        # the order of the changes they record; held alone during the I/O
+        self._store_lock = threading.Lock()
+        # Publishes "added", "removed" and "changed" DeviceEvents
+        self.events = EventBus()
+        self._snapshot: Optional[Tuple[Device, ...]] = None
         self._devices: Dict[str, Device] = {}
         self._device_types: Dict[str, Type[Device]] = {
             "light": Light,
@@ -24,57 +119,170 @@ class DeviceManager:
             "lock": SmartLock,
             "smartlock": SmartLock  # Backward compatibility
         }
-        self._devices_file = os.path.join(os.path.dirname(__file__), 'devices.json')
+        # Secondary indexes: normalized key -> {device_id: device}
+        self._type_index: Dict[str, Dict[str, Device]] = {}
+        self._location_index: Dict[str, Dict[str, Device]] = {}
+        self._indexed_locations: Dict[str, str] = {}
+        self._transport: Optional[DeviceTransport] = None
+        if backend == "json":
+            self._devices_file = path or self.DEVICES_FILE
+            self._store = JournalStore(self._devices_file, key_field='device_id')
+        elif backend == "sqlite":
+            self._devices_file = path or self.DATABASE_FILE
+            self._store = SqliteStore(self._devices_file, DEVICE_TABLE)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        self.backend = backend
+        self._dirty = WriteCoalescer(self._flush_dirty, delay=self.FLUSH_DELAY,
+                                     max_delay=self.FLUSH_MAX_DELAY, max_batch=self.FLUSH_MAX_BATCH)
         self._load_devices()
-        self._initialized = True
+        atexit.register(self.close)
 
     def _load_devices(self):
-        """Load devices from JSON file"""
-        if os.path.exists(self._devices_file):
-            try:
-                with open(self._devices_file, 'r') as f:
-                    devices_data = json.load(f)
-                    for device_data in devices_data:
-                        device_type = device_data.pop('type')
-                        # Store status and last_updated for later use
-                        status = device_data.pop('status', 'OFF')
-                        last_updated = device_data.pop('last_updated', None)
-                        
-                        if device_type in self._device_types:
-                            device_class = self._device_types[device_type]
-                            device = device_class(**device_data)
-                            
-                            # Set the correct status based on the loaded data
-                            if device_type == "lock":
-                                # For locks, status "LOCKED" means ON, "UNLOCKED" means OFF
-                                if status == "LOCKED":
-                                    device.turn_on()
-                                else:
-                                    device.turn_off()
-                            else:
-                                # For other devices, status "ON" means ON, "OFF" means OFF
-                                if status == "ON":
-                                    device.turn_on()
-                                else:
-                                    device.turn_off()
-                            
-                            self._devices[device.device_id] = device
-            except Exception as e:
-                print(f"Error loading devices: {e}")
+        """Load devices from the snapshot and replay the journal
+
+        The snapshot is parsed incrementally and each record is turned into a
+        device by its type's from_record, which restores every stored field
+        directly.
+        """
+        start = time.perf_counter() if metrics.enabled else None
+        device_types = self._device_types
+        try:
+            with self._lock.write():
+                for record in self._store.iter_load(stream=True):
+                    device_class = device_types.get(record.get('type'))
+                    if device_class is None:
+                        print(f"Skipping device {record.get('device_id')}: unknown type {record.get('type')}")
+                        continue
+                    try:
+                        device = device_class.from_record(record)
+                    except (KeyError, TypeError, ValueError) as e:
+                        print(f"Skipping device {record.get('device_id')}: {e}")
+                        continue
+                    self._register_device(device)
+        except Exception as e:
+            print(f"Error loading devices: {e}")
+        if start is not None:
+            LOAD_SECONDS.observe(time.perf_counter() - start)
+            DEVICES_LOADED.inc(len(self._devices))
+
+    def _device_record(self, device: Device) -> Dict:
+        """Serialize a device into a persistence record"""
+        return device.to_record()
 
     def _save_devices(self):
-        """Save devices to JSON file"""
-        devices_data = []
-        for device in self._devices.values():
-            device_dict = device.get_status_details()
-            device_dict['type'] = device.__class__.__name__.lower()
-            devices_data.append(device_dict)
+        """Write a fresh snapshot of every device"""
+        start = time.perf_counter() if metrics.enabled else None
+        try:
+            with self._lock.read():
+                records = [self._device_record(device) for device in self._devices.values()]
+            self._store.rewrite(records)
+        except Exception as e:
+            print(f"Error saving devices: {e}")
+        if start is not None:
+            SAVE_SECONDS.observe(time.perf_counter() - start)
 
+    def _save_device(self, device: Device):
+        """Append a single device record to the journal"""
         try:
-            with open(self._devices_file, 'w') as f:
-                json.dump(devices_data, f, indent=4)
+            with self._store_lock:
+                self._store.put(self._device_record(device))
+        except Exception as e:
+            print(f"Error saving device {device.device_id}: {e}")
+
+    @staticmethod
+    def _location_key(location: str) -> str:
+        return location.lower()
+
+    def _type_key(self, device_type: str) -> Optional[str]:
+        """Normalize a device type name or alias to its indexed key"""
+        device_class = self._device_types.get(device_type.lower())
+        return device_class.__name__.lower() if device_class else None
+
+    def _register_device(self, device: Device):
+        """Add a device to the registry and its indexes; caller holds the write lock"""
+        device_id = device.device_id
+        self._snapshot = None
+        location_key = self._location_key(device.location)
+        self._devices[device_id] = device
+        self._type_index.setdefault(device.__class__.__name__.lower(), {})[device_id] = device
+        self._location_index.setdefault(location_key, {})[device_id] = device
+        self._indexed_locations[device_id] = location_key
+        device.set_change_listener(self._on_device_changed)
+        device.attach_transport(self._transport)
+        if self.events.has_subscribers:
+            self.events.publish("added", device_id, device.to_record())
+
+    def _unregister_device(self, device_id: str) -> Device:
+        """Remove a device from the registry and its indexes; caller holds the write lock"""
+        self._snapshot = None
+        device = self._devices.pop(device_id)
+        device.set_change_listener(None)
+        self._discard_from_index(self._type_index, device.__class__.__name__.lower(), device_id)
+        self._discard_from_index(self._location_index, self._indexed_locations.pop(device_id), device_id)
+        self.events.publish("removed", device_id)
+        return device
+
+    @staticmethod
+    def _discard_from_index(index: Dict[str, Dict[str, Device]], key: str, device_id: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(device_id, None)
+            if not bucket:
+                del index[key]
+
+    def _on_device_changed(self, device: Device, changes: Dict[str, Any]):
+        """Keep indexes current, queue the device for persistence and publish the change"""
+        device_id = device.device_id
+        if 'location' in changes:
+            location_key = self._location_key(device.location)
+            with self._lock.write():
+                indexed = self._indexed_locations.get(device_id)
+                if indexed is not None and indexed != location_key:
+                    self._discard_from_index(self._location_index, indexed, device_id)
+                    self._location_index.setdefault(location_key, {})[device_id] = device
+                    self._indexed_locations[device_id] = location_key
+        self._mark_dirty(device)
+        self.events.publish("changed", device_id, changes)
+
+    def _mark_dirty(self, device: Device):
+        """Queue a changed device for the next coalesced write"""
+        self._dirty.mark(device.device_id)
+
+    def _flush_dirty(self, device_ids: List[str]):
+        """Journal the current state of every dirty device in one batch"""
+        start = time.perf_counter() if metrics.enabled else None
+        with self._lock.read():
+            records = [self._device_record(self._devices[device_id])
+                       for device_id in device_ids if device_id in self._devices]
+            # Keeps a removal from reaching the store before these records
+            self._store_lock.acquire()
+        try:
+            self._store.put_many(records)
         except Exception as e:
             print(f"Error saving devices: {e}")
+        finally:
+            self._store_lock.release()
+        if start is not None:
+            FLUSH_SECONDS.observe(time.perf_counter() - start)
+            RECORDS_FLUSHED.inc(len(records))
+
+    def set_transport(self, transport: Optional[DeviceTransport]):
+        """Route commands of every current and future device through transport"""
+        with self._lock.write():
+            self._transport = transport
+            for device in self._devices.values():
+                device.attach_transport(transport)
+
+    def flush(self):
+        """Persist pending device state changes immediately"""
+        self._dirty.flush()
+
+    def close(self):
+        """Flush pending changes and compact the journal"""
+        atexit.unregister(self.close)
+        self.flush()
+        self._store.close()
 
     def add_device(self, device_type: str, device_id: str, name: str, location: str, **kwargs) -> Optional[Device]:
         """Add a new device"""
@@ -86,34 +294,209 @@ class DeviceManager:
 
         device_class = self._device_types[device_type]
         device = device_class(device_id=device_id, name=name, location=location, **kwargs)
-        self._devices[device_id] = device
-        self._save_devices()
+        with self._lock.write():
+            if device_id in self._devices:
+                return None
+            self._register_device(device)
+            self._save_device(device)
         return device
 
     def remove_device(self, device_id: str) -> bool:
         """Remove a device"""
-        if device_id in self._devices:
-            del self._devices[device_id]
-            self._save_devices()
-            return True
-        return False
+        with self._lock.write():
+            if device_id not in self._devices:
+                return False
+            self._unregister_device(device_id)
+            try:
+                with self._store_lock:
+                    self._store.delete(device_id)
+            except Exception as e:
+                print(f"Error removing device {device_id}: {e}")
+        return True
+
+    def add_devices(self, items: Iterable[Union[Mapping[str, Any], Tuple]]) -> List[Tuple[str, bool, str]]:
+        """
+        Add several devices and persist them with a single journal write
+        Each item is either a (device_type, device_id, name, location) tuple
+        or a mapping with those keys plus any extra constructor arguments.
+        Returns: [(device_id, success: bool, message: str), ...]
+        """
+        results = []
+        created = []
+        batch_ids = set()
+        for item in items:
+            if isinstance(item, Mapping):
+                kwargs = dict(item)
+                # Pop both keys so neither is passed on to the constructor
+                device_type = kwargs.pop('device_type', None)
+                alias = kwargs.pop('type', None)
+                device_type = device_type or alias
+                device_id = kwargs.pop('device_id', None)
+                name = kwargs.pop('name', None)
+                location = kwargs.pop('location', None)
+            elif isinstance(item, (tuple, list)) and len(item) == 4:
+                device_type, device_id, name, location = item
+                kwargs = {}
+            else:
+                device_id = item[1] if isinstance(item, (tuple, list)) and len(item) > 1 else None
+                results.append((device_id, False,
+                                "Expected a (device_type, device_id, name, location) tuple or a mapping"))
+                continue
+
+            if not device_id or not name or not location:
+                results.append((device_id, False, "Device ID, name and location are required"))
+                continue
+            if not isinstance(device_type, str) or not isinstance(device_id, str):
+                results.append((device_id, False, "Device type and ID must be strings"))
+                continue
+            if device_type not in self._device_types:
+                results.append((device_id, False, f"Unknown device type: {device_type}"))
+                continue
+            if device_id in self._devices or device_id in batch_ids:
+                results.append((device_id, False, "Device ID already exists"))
+                continue
+
+            try:
+                device = self._device_types[device_type](device_id=device_id, name=name,
+                                                         location=location, **kwargs)
+            except TypeError as e:
+                results.append((device_id, False, str(e)))
+                continue
+
+            batch_ids.add(device_id)
+            created.append((len(results), device))
+            results.append((device_id, True, "Device added"))
+
+        added = []
+        with self._lock.write():
+            for position, device in created:
+                # Another thread may have added the same ID since validation
+                if device.device_id in self._devices:
+                    results[position] = (device.device_id, False, "Device ID already exists")
+                    continue
+                self._register_device(device)
+                added.append(device)
+            if added:
+                try:
+                    with self._store_lock:
+                        self._store.put_many([self._device_record(device) for device in added])
+                except Exception as e:
+                    print(f"Error saving devices: {e}")
+        return results
+
+    def remove_devices(self, device_ids: Iterable[str]) -> List[Tuple[str, bool, str]]:
+        """
+        Remove several devices and persist the removals with a single journal write
+        A single ID string removes that one device.
+        Returns: [(device_id, success: bool, message: str), ...]
+        """
+        if isinstance(device_ids, str):
+            device_ids = [device_ids]
+        results = []
+        removed = []
+        with self._lock.write():
+            for device_id in device_ids:
+                if device_id in self._devices:
+                    self._unregister_device(device_id)
+                    removed.append(device_id)
+                    results.append((device_id, True, "Device removed"))
+                else:
+                    results.append((device_id, False, "Device not found"))
+
+            if removed:
+                try:
+                    with self._store_lock:
+                        self._store.delete_many(removed)
+                except Exception as e:
+                    print(f"Error removing devices: {e}")
+        return results
+
+    def find_devices(self, device_type: Optional[str] = None, location: Optional[str] = None) -> List[Device]:
+        """Get devices matching an optional type and an optional location"""
+        if device_type and location:
+            return self.get_devices_by_type_and_location(device_type, location)
+        if device_type:
+            return self.get_devices_by_type(device_type)
+        if location:
+            return self.get_devices_by_location(location)
+        return self.get_all_devices()
+
+    def apply(self, ids_or_query: Union[Iterable[str], Mapping[str, str]], action: str,
+              **kwargs) -> List[Tuple[str, bool, str]]:
+        """
+        Invoke a device method on a group of devices, e.g.
+        apply({"type": "light", "location": "Bedroom"}, "turn_off")
+        The group is either an iterable of device IDs (a single ID string is
+        one device) or a query mapping with optional "type" and "location"
+        keys. State changes are persisted once.
+        Returns: [(device_id, success: bool, message: str), ...]
+        """
+        if action not in self.BULK_ACTIONS:
+            raise ValueError(f"Unsupported action: {action}")
+
+        if isinstance(ids_or_query, str):
+            ids_or_query = [ids_or_query]
+        if isinstance(ids_or_query, Mapping):
+            targets = [(device.device_id, device) for device in
+                       self.find_devices(ids_or_query.get('type'), ids_or_query.get('location'))]
+        else:
+            targets = [(device_id, self.get_device(device_id)) for device_id in ids_or_query]
+
+        results = []
+        with self._dirty.hold():
+            for device_id, device in targets:
+                method = getattr(device, action, None)
+                if method is None:
+                    message = "Device not found" if device is None else f"{action} not supported"
+                    results.append((device_id, False, message))
+                    continue
+                try:
+                    success = bool(method(**kwargs))
+                except TypeError as e:
+                    results.append((device_id, False, str(e)))
+                    continue
+                results.append((device_id, success, "OK" if success else f"{action} rejected"))
+        return results
+
+    def normalize_type(self, device_type: str) -> Optional[str]:
+        """The record type for a device type or alias ("lock" -> "smartlock"), None if unknown"""
+        return self._type_key(device_type)
 
     def get_device(self, device_id: str) -> Optional[Device]:
         """Get a device by ID"""
+        # A single dict lookup is atomic, so no lock is needed
         return self._devices.get(device_id)
 
     def get_all_devices(self) -> List[Device]:
         """Get all devices"""
-        return list(self._devices.values())
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock.read():
+                snapshot = self._snapshot = tuple(self._devices.values())
+        return list(snapshot)
 
     def get_devices_by_type(self, device_type: str) -> List[Device]:
         """Get all devices of a specific type"""
-        if device_type not in self._device_types:
+        type_key = self._type_key(device_type)
+        if type_key is None:
             return []
-        return [device for device in self._devices.values() 
-                if device.__class__.__name__.lower() == device_type]
+        with self._lock.read():
+            return list(self._type_index.get(type_key, {}).values())
 
     def get_devices_by_location(self, location: str) -> List[Device]:
         """Get all devices in a specific location"""
-        return [device for device in self._devices.values() 
-                if device.location.lower() == location.lower()] 
\ No newline at end of file
+        with self._lock.read():
+            return list(self._location_index.get(self._location_key(location), {}).values())
+
+    def get_devices_by_type_and_location(self, device_type: str, location: str) -> List[Device]:
+        """Get all devices of a specific type in a specific location"""
+        type_key = self._type_key(device_type)
+        if type_key is None:
+            return []
+        with self._lock.read():
+            by_type = self._type_index.get(type_key, {})
+            by_location = self._location_index.get(self._location_key(location), {})
+            # Walk the smaller bucket and probe the larger one
+            if len(by_type) <= len(by_location):
+                return [device for device_id, device in by_type.items() if device_id in by_location]
+            return [device for device_id, device in by_location.items() if device_id in by_type] 
\ No newline at end of file
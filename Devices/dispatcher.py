@@ -0,0 +1,188 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .device_manager import DeviceManager
+from .events import caused_by, current_cause
+from Telemetry.metrics import metrics
+
+COMMAND_SECONDS = metrics.histogram("commands.seconds")
+COMMANDS_SUCCEEDED = metrics.counter("commands.succeeded")
+COMMANDS_FAILED = metrics.counter("commands.failed")
+
+
+class CommandResult(NamedTuple):
+    """Outcome of a dispatched device command"""
+    command_id: int
+    device_id: str
+    action: str
+    success: bool
+    message: str
+
+
+class _Command(NamedTuple):
+    command_id: int
+    device_id: str
+    action: str
+    args: Tuple
+    kwargs: Dict[str, Any]
+    callback: Optional[Callable[[CommandResult], None]]
+    future: Optional[Future] = None
+    # Event cause of the submitting thread, restored while the command runs
+    cause: Tuple[str, ...] = ()
+
+
+class CommandDispatcher:
+    """Runs device commands on a worker pool, off the Tk main thread
+
+    Commands for the same device run one at a time in submission order;
+    commands for different devices run concurrently, so a slow device only
+    delays its own queue. Each device queue is drained by at most one worker
+    at a time, which yields back to the pool after ``max_batch`` commands so
+    a busy device cannot starve the others.
+
+    Results are put on the thread-safe ``results`` queue. GUI code should
+    call ``attach`` to poll that queue with ``root.after`` and handle results
+    on the Tk thread.
+    """
+
+    def __init__(self, device_manager: DeviceManager, max_workers: int = 4, max_batch: int = 16):
+        self.device_manager = device_manager
+        self.max_batch = max_batch
+        self.results: "queue.Queue[Tuple[CommandResult, Optional[Callable]]]" = queue.Queue()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="device-command")
+        self._queues: Dict[str, Deque[_Command]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._root = None
+        self._after_id = None
+
+    def submit(self, device_id: str, action: str, *args,
+               callback: Optional[Callable[[CommandResult], None]] = None, **kwargs) -> int:
+        """
+        Queue a command such as submit("bedroom_light", "set_brightness", 40)
+        The optional callback receives the CommandResult on the polling thread.
+        Returns: the command ID
+        """
+        command = _Command(next(self._ids), device_id, action, args, kwargs, callback, cause=current_cause())
+        self._enqueue(command)
+        return command.command_id
+
+    def execute(self, device_id: str, action: str, *args, **kwargs) -> Future:
+        """
+        Queue a command like submit, but deliver its result through a Future
+        The Future is resolved on the worker thread and the result never goes
+        through the results queue, so callers outside Tk (e.g. asyncio via
+        asyncio.wrap_future) need no polling.
+        """
+        future: Future = Future()
+        self._enqueue(_Command(next(self._ids), device_id, action, args, kwargs, None, future, current_cause()))
+        return future
+
+    def _enqueue(self, command: _Command):
+        device_id = command.device_id
+        with self._lock:
+            pending = self._queues.get(device_id)
+            if pending is None:
+                # No worker owns this device yet
+                self._queues[device_id] = deque([command])
+                try:
+                    self._executor.submit(self._drain, device_id)
+                except RuntimeError:
+                    # Shut down; don't leave a queue that no worker drains
+                    del self._queues[device_id]
+                    raise
+            else:
+                pending.append(command)
+
+    def _drain(self, device_id: str):
+        """Run queued commands for one device in order"""
+        for _ in range(self.max_batch):
+            with self._lock:
+                pending = self._queues[device_id]
+                if not pending:
+                    del self._queues[device_id]
+                    return
+                command = pending.popleft()
+            start = time.perf_counter() if metrics.enabled else None
+            result = self._execute(command)
+            if start is not None:
+                COMMAND_SECONDS.observe(time.perf_counter() - start)
+                (COMMANDS_SUCCEEDED if result.success else COMMANDS_FAILED).inc()
+            self._deliver(command, result)
+
+        # Yield the worker; the device keeps its queue and goes to the back
+        try:
+            self._executor.submit(self._drain, device_id)
+        except RuntimeError:
+            # shutdown() was called; fail the rest rather than leave it queued
+            with self._lock:
+                pending = self._queues.pop(device_id, ())
+            for command in pending:
+                self._deliver(command, CommandResult(command.command_id, device_id, command.action,
+                                                     False, "Dispatcher is shut down"))
+
+    def _deliver(self, command: _Command, result: CommandResult):
+        if command.future is not None:
+            command.future.set_result(result)
+        else:
+            self.results.put((result, command.callback))
+
+    def _execute(self, command: _Command) -> CommandResult:
+        def result(success: bool, message: str) -> CommandResult:
+            return CommandResult(command.command_id, command.device_id, command.action, success, message)
+
+        if command.action not in DeviceManager.BULK_ACTIONS:
+            return result(False, f"Unsupported action: {command.action}")
+        device = self.device_manager.get_device(command.device_id)
+        if device is None:
+            return result(False, "Device not found")
+        method = getattr(device, command.action, None)
+        if method is None:
+            return result(False, f"{command.action} not supported")
+
+        try:
+            with caused_by(command.cause):
+                success = bool(method(*command.args, **command.kwargs))
+        except Exception as e:
+            return result(False, str(e))
+        return result(success, "OK" if success else f"{command.action} rejected")
+
+    def poll(self) -> List[CommandResult]:
+        """Collect finished commands without blocking, running their callbacks"""
+        finished = []
+        while True:
+            try:
+                command_result, callback = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            if callback is not None:
+                callback(command_result)
+            finished.append(command_result)
+
+    def attach(self, root, handler: Optional[Callable[[CommandResult], None]] = None,
+               interval_ms: int = 30):
+        """Poll for results from the Tk event loop every interval_ms"""
+        def tick():
+            for command_result in self.poll():
+                if handler is not None:
+                    handler(command_result)
+            self._after_id = root.after(interval_ms, tick)
+
+        self._root = root
+        self._after_id = root.after(interval_ms, tick)
+
+    def shutdown(self, wait: bool = True):
+        """Stop polling, stop accepting work and release the worker threads"""
+        if self._after_id is not None:
+            try:
+                self._root.after_cancel(self._after_id)
+            except Exception:
+                pass  # The window is already gone
+            self._after_id = None
+        self._executor.shutdown(wait=wait)
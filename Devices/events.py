@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+_context = threading.local()
+
+
+class DeviceEvent(NamedTuple):
+    """A single device change published on the EventBus"""
+    kind: str  # "changed", "added" or "removed"
+    device_id: str
+    changes: Dict[str, Any]  # attribute -> new value, empty for removals
+    timestamp: float
+    # IDs of the automation rules whose actions led to this change, outermost first
+    cause: Tuple[str, ...] = ()
+
+
+def current_cause() -> Tuple[str, ...]:
+    """The cause stamped on events published from this thread right now"""
+    return getattr(_context, 'cause', ())
+
+
+@contextmanager
+def caused_by(cause: Tuple[str, ...]) -> Iterator[None]:
+    """Stamp events published from this thread meanwhile with cause"""
+    previous = current_cause()
+    _context.cause = cause
+    try:
+        yield
+    finally:
+        _context.cause = previous
+
+
+class Subscription:
+    """A subscriber's bounded event queue
+
+    When the queue is full the oldest events are dropped and counted in
+    ``dropped``; a subscriber that sees drops should resynchronize from the
+    DeviceManager instead of trusting the events alone.
+    """
+
+    def __init__(self, bus: 'EventBus', callback: Optional[Callable[[List[DeviceEvent]], None]],
+                 max_queue: int, batch_size: int, kinds: Optional[Iterable[str]]):
+        self._bus = bus
+        self.callback = callback
+        self.batch_size = batch_size
+        self.kinds = frozenset(kinds) if kinds else None
+        self.dropped = 0
+        self._queue: Deque[DeviceEvent] = deque(maxlen=max_queue)
+        self._root = None
+        self._after_id = None
+
+    def _offer(self, event: DeviceEvent):
+        if self.kinds is not None and event.kind not in self.kinds:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(event)
+
+    def poll(self, max_events: Optional[int] = None) -> List[DeviceEvent]:
+        """Take up to max_events (default: batch_size) queued events without blocking"""
+        events = []
+        limit = max_events or self.batch_size
+        try:
+            while len(events) < limit:
+                events.append(self._queue.popleft())
+        except IndexError:
+            pass
+        return events
+
+    def attach(self, root, handler: Callable[[List[DeviceEvent]], None], interval_ms: int = 50):
+        """Deliver batches to handler from the Tk event loop every interval_ms"""
+        def tick():
+            events = self.poll()
+            while events:
+                handler(events)
+                events = self.poll()
+            self._after_id = root.after(interval_ms, tick)
+
+        self._root = root
+        self._after_id = root.after(interval_ms, tick)
+
+    def close(self):
+        """Stop receiving events"""
+        self._bus.unsubscribe(self)
+        if self._after_id is not None:
+            try:
+                self._root.after_cancel(self._after_id)
+            except Exception:
+                pass  # The window is already gone
+            self._after_id = None
+
+
+class EventBus:
+    """Fans device change events out to subscribers
+
+    Publishing only appends to each subscriber's bounded queue, so the
+    mutation hot path never waits on a slow consumer. Subscribers either
+    poll their queue (e.g. from the Tk loop via Subscription.attach) or
+    register a callback, which a background delivery thread invokes with
+    batches of up to ``batch_size`` events.
+    """
+
+    def __init__(self):
+        self._subscriptions: tuple = ()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._delivery_thread = None
+
+    def subscribe(self, callback: Optional[Callable[[List[DeviceEvent]], None]] = None,
+                  max_queue: int = 10000, batch_size: int = 256,
+                  kinds: Optional[Iterable[str]] = None) -> Subscription:
+        """Register a subscriber, optionally limited to some event kinds"""
+        subscription = Subscription(self, callback, max_queue, batch_size, kinds)
+        with self._lock:
+            # Copy-on-write so publish can iterate without locking
+            self._subscriptions = self._subscriptions + (subscription,)
+            if callback is not None and self._delivery_thread is None:
+                self._delivery_thread = threading.Thread(target=self._deliver_forever,
+                                                         name="event-delivery", daemon=True)
+                self._delivery_thread.start()
+        return subscription
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Whether publish would deliver anywhere; lets callers skip building payloads"""
+        return bool(self._subscriptions)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, kind: str, device_id: str, changes: Optional[Dict[str, Any]] = None):
+        """Publish one event to every subscriber"""
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = DeviceEvent(kind, device_id, changes or {}, time.time(), current_cause())
+        for subscription in subscriptions:
+            subscription._offer(event)
+        if self._delivery_thread is not None:
+            self._wakeup.set()
+
+    def _deliver_forever(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            for subscription in self._subscriptions:
+                if subscription.callback is None:
+                    continue
+                events = subscription.poll()
+                while events:
+                    try:
+                        subscription.callback(events)
+                    except Exception as e:
+                        print(f"Error in event subscriber: {e}")
+                    events = subscription.poll()
@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .device import Device
+from .device_manager import DeviceManager
+
+DEFAULT_HOME = "default"
+_HOME_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$')
+
+
+def check_home_id(home_id: str):
+    """Reject home IDs that are not safe as a directory name"""
+    if not isinstance(home_id, str) or not _HOME_ID.match(home_id):
+        raise ValueError(f"Invalid home ID: {home_id!r}")
+
+
+def shard_of(home_id: str, shards: int) -> int:
+    """Stable shard for a home; hash() of a str differs between processes"""
+    return zlib.crc32(home_id.encode()) % shards
+
+
+class HomeRegistry:
+    """One DeviceManager per home, created on first use
+
+    Each home stores its devices under <root>/<home_id>/ with the chosen
+    backend, so homes are fully independent: separate registries, indexes,
+    journals and event buses. When default_manager is given it is served as
+    DEFAULT_HOME instead of a directory under root; default_registry() does
+    this with DeviceManager(), so existing DeviceManager() callers and the
+    registry share the default home. root defaults to a homes directory next
+    to DeviceManager.DEVICES_FILE, or HOMES_DIR when a subclass sets it.
+
+    Loading a large home only blocks callers of that home.
+    """
+    HOMES_DIR: Optional[str] = None
+
+    def __init__(self, root: Optional[str] = None, backend: Optional[str] = None,
+                 default_manager: Optional[DeviceManager] = None):
+        self.root = root or self.HOMES_DIR or os.path.join(
+            os.path.dirname(os.path.abspath(DeviceManager.DEVICES_FILE)), 'homes')
+        self.backend = backend or DeviceManager.BACKEND
+        self._homes: Dict[str, DeviceManager] = {}
+        if default_manager is not None:
+            self._homes[DEFAULT_HOME] = default_manager
+        self._lock = threading.Lock()
+        self._home_locks: Dict[str, threading.Lock] = {}
+
+    def home_path(self, home_id: str) -> str:
+        """Storage path of a home's devices"""
+        check_home_id(home_id)
+        filename = 'devices.db' if self.backend == "sqlite" else 'devices.json'
+        return os.path.join(self.root, home_id, filename)
+
+    def get(self, home_id: str = DEFAULT_HOME) -> DeviceManager:
+        """The manager of a home, loading it on first use"""
+        manager = self._homes.get(home_id)
+        if manager is not None:
+            return manager
+        path = self.home_path(home_id)
+        with self._lock:
+            home_lock = self._home_locks.setdefault(home_id, threading.Lock())
+        with home_lock:
+            manager = self._homes.get(home_id)
+            if manager is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                manager = DeviceManager.create(path, self.backend)
+                with self._lock:
+                    self._homes[home_id] = manager
+        return manager
+
+    def is_loaded(self, home_id: str) -> bool:
+        return home_id in self._homes
+
+    def homes(self) -> List[str]:
+        """IDs of loaded homes and of homes stored under root"""
+        home_ids = set(self._homes)
+        if os.path.isdir(self.root):
+            filename = os.path.basename(self.home_path(DEFAULT_HOME))
+            for entry in os.listdir(self.root):
+                if _HOME_ID.match(entry) and os.path.exists(os.path.join(self.root, entry, filename)):
+                    home_ids.add(entry)
+        return sorted(home_ids)
+
+    def close_home(self, home_id: str) -> bool:
+        """Flush and unload a home; it is reloaded on next use"""
+        with self._lock:
+            manager = self._homes.pop(home_id, None)
+        if manager is None:
+            return False
+        manager.close()
+        return True
+
+    def close(self):
+        """Flush and unload every home"""
+        for home_id in list(self._homes):
+            self.close_home(home_id)
+
+
+_default_registry: Optional[HomeRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def default_registry() -> HomeRegistry:
+    """The process-wide registry whose default home is DeviceManager()"""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = HomeRegistry(default_manager=DeviceManager())
+    return _default_registry
+
+
+# Registry of the shard worker process this module runs in, if any
+_worker_registry: Optional[HomeRegistry] = None
+
+
+def _init_worker(root: Optional[str], backend: Optional[str]):
+    global _worker_registry
+    _worker_registry = HomeRegistry(root, backend)
+
+
+def _portable(value: Any) -> Any:
+    """Replace devices in a result by their records so it can be sent back"""
+    if isinstance(value, Device):
+        return value.to_record()
+    if isinstance(value, list):
+        return [_portable(item) for item in value]
+    return value
+
+
+def _call_home(home_id: str, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    manager = _worker_registry.get(home_id)
+    return _portable(getattr(manager, method)(*args, **kwargs))
+
+
+def _close_worker():
+    _worker_registry.close()
+
+
+class HomeShardPool:
+    """Spreads homes over worker processes so one hub can use every CPU core
+
+    Each shard is a single-process executor hosting its own HomeRegistry,
+    and every home is pinned to one shard by shard_of(), so a home's
+    manager lives in exactly one process and its calls run in submission
+    order. Calls name a DeviceManager method and return a Future; devices
+    in results come back as their records.
+    """
+    METHODS = ("add_device", "add_devices", "remove_device", "remove_devices", "apply",
+               "get_device", "get_all_devices", "get_devices_by_type", "get_devices_by_location",
+               "get_devices_by_type_and_location", "find_devices", "normalize_type", "flush")
+
+    def __init__(self, shards: Optional[int] = None, root: Optional[str] = None,
+                 backend: Optional[str] = None):
+        self.shards = shards or os.cpu_count() or 1
+        # Forking would copy the parent's locks and timer threads mid-use
+        context = multiprocessing.get_context("spawn")
+        self._executors = [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker,
+                                               initargs=(root, backend))
+                           for _ in range(self.shards)]
+
+    def submit(self, home_id: str, method: str, *args, **kwargs) -> Future:
+        """Run a DeviceManager method on a home in its shard"""
+        if method not in self.METHODS:
+            raise ValueError(f"Unsupported method: {method}")
+        check_home_id(home_id)
+        executor = self._executors[shard_of(home_id, self.shards)]
+        return executor.submit(_call_home, home_id, method, args, kwargs)
+
+    def call(self, home_id: str, method: str, *args, **kwargs) -> Any:
+        """Like submit(), but wait for the result"""
+        return self.submit(home_id, method, *args, **kwargs).result()
+
+    def close(self):
+        """Flush every home in every shard and stop the workers"""
+        closing = [executor.submit(_close_worker) for executor in self._executors]
+        for future in closing:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error closing shard: {e}")
+        for executor in self._executors:
+            executor.shutdown()
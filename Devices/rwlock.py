@@ -0,0 +1,48 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer
+
+    Waiting writers block new readers, so a steady stream of reads cannot
+    starve a write. The lock is not reentrant: a thread holding it in either
+    mode must not acquire it again.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """Hold the lock in shared mode for the duration of the block"""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock in exclusive mode for the duration of the block"""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -0,0 +1,192 @@
+import json
+import random
+import socket
+import socketserver
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Address = Union[Tuple[str, int], str]
+
+
+class DeviceTransport(ABC):
+    """Abstract channel for delivering commands to physical devices"""
+
+    @abstractmethod
+    def send(self, device_id: str, command: str, params: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        Deliver a command to a device
+        Returns: (success: bool, message: str)
+        """
+        pass
+
+    def close(self):
+        """Release any resources held by the transport"""
+        pass
+
+
+class LocalSimulatorTransport(DeviceTransport):
+    """In-process transport that simulates device latency and failures"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, device_id: str, command: str, params: Dict[str, Any]) -> Tuple[bool, str]:
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return False, f"Simulated failure for {command} on {device_id}"
+        return True, "OK"
+
+
+class SocketTransport(DeviceTransport):
+    """Newline-delimited JSON over TCP or a Unix socket, with a connection pool
+
+    ``address`` is a (host, port) tuple for TCP or a filesystem path for a
+    Unix socket. Up to ``pool_size`` connections are opened lazily and reused
+    across commands; callers block while every connection is busy.
+    Each request is ``{"device_id", "command", "params"}`` and each reply is
+    ``{"success", "message"}``.
+    """
+
+    def __init__(self, address: Address, pool_size: int = 4, timeout: float = 5.0):
+        self.address = address
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        self._idle: List[Tuple[socket.socket, Any]] = []
+        self._open = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        return sock, sock.makefile('rb')
+
+    def _acquire(self) -> Tuple[socket.socket, Any]:
+        with self._available:
+            while not self._idle and self._open >= self.pool_size:
+                self._available.wait()
+            if self._closed:
+                raise ConnectionError("Transport is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return self._connect()
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _release(self, connection: Tuple[socket.socket, Any]):
+        with self._available:
+            if not self._closed:
+                self._idle.append(connection)
+                self._available.notify()
+                return
+        # Checked out while close() ran, so close() never saw it
+        self._discard(connection)
+
+    def _discard(self, connection: Optional[Tuple[socket.socket, Any]]):
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def send(self, device_id: str, command: str, params: Dict[str, Any]) -> Tuple[bool, str]:
+        request = json.dumps({"device_id": device_id, "command": command, "params": params},
+                             separators=(',', ':')).encode() + b'\n'
+        try:
+            connection = self._acquire()
+        except Exception as e:
+            return False, f"Connection failed: {e}"
+
+        try:
+            connection[0].sendall(request)
+            line = connection[1].readline()
+            if not line:
+                raise ConnectionError("Connection closed by device")
+            reply = json.loads(line)
+        except Exception as e:
+            self._discard(connection)
+            return False, f"Transport error: {e}"
+
+        self._release(connection)
+        return bool(reply.get("success")), reply.get("message", "")
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for sock, rfile in idle:
+            rfile.close()
+            sock.close()
+            self._discard(None)
+
+
+class SimulatorServer:
+    """Local stand-in for a device bridge that speaks the SocketTransport protocol
+
+    Each connection is served on its own thread and every request is answered
+    through a LocalSimulatorTransport, so latency and failures can be tuned.
+    """
+
+    def __init__(self, simulator: Optional[LocalSimulatorTransport] = None,
+                 address: Address = ("127.0.0.1", 0)):
+        self.simulator = simulator or LocalSimulatorTransport()
+        simulator = self.simulator
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                        success, message = simulator.send(request["device_id"], request["command"],
+                                                          request.get("params", {}))
+                    except (ValueError, KeyError) as e:
+                        success, message = False, f"Bad request: {e}"
+                    reply = json.dumps({"success": success, "message": message}).encode() + b'\n'
+                    self.wfile.write(reply)
+
+        base = socketserver.ThreadingUnixStreamServer if isinstance(address, str) \
+            else socketserver.ThreadingTCPServer
+
+        class Server(base):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server(address, Handler)
+        self._thread = None
+
+    @property
+    def address(self) -> Address:
+        return self._server.server_address
+
+    def start(self) -> 'SimulatorServer':
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self._server.shutdown()
+        self._server.server_close()
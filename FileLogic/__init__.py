@@ -0,0 +1 @@
+"""FileLogic package for persistence backends"""
@@ -0,0 +1,100 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, List
+
+
+class WriteCoalescer:
+    """Collects dirty keys and flushes them together in debounced batches
+
+    A flush happens once no new key has been marked for ``delay`` seconds,
+    but never later than ``max_delay`` seconds after the first pending mark,
+    or immediately once ``max_batch`` distinct keys are pending. Marking the
+    same key repeatedly only produces one entry in the next batch.
+    """
+
+    def __init__(self, flush_callback: Callable[[List[Hashable]], None],
+                 delay: float = 0.25, max_delay: float = 2.0, max_batch: int = 500):
+        self.flush_callback = flush_callback
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+
+        self._pending: Dict[Hashable, None] = {}
+        self._lock = threading.Lock()
+        # Serializes callbacks so an older batch never lands after a newer one
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._held = 0
+        self._first_mark = 0.0
+        self._last_mark = 0.0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def mark(self, key: Hashable):
+        """Mark key as dirty and schedule a flush"""
+        with self._lock:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_mark = now
+            self._pending[key] = None
+            self._last_mark = now
+
+            if self._held:
+                return
+            if len(self._pending) < self.max_batch:
+                if self._timer is None:
+                    self._schedule(self.delay)
+                return
+
+        self.flush()
+
+    def _schedule(self, wait: float):
+        """Start the flush timer; caller must hold the lock"""
+        self._timer = threading.Timer(wait, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending or self._held:
+                return
+            now = time.monotonic()
+            # Keep waiting while keys are still arriving, up to max_delay
+            quiet_at = self._last_mark + self.delay
+            deadline = self._first_mark + self.max_delay
+            if now < quiet_at and now < deadline:
+                self._schedule(min(quiet_at, deadline) - now)
+                return
+
+        self.flush()
+
+    @contextmanager
+    def hold(self):
+        """Defer flushing until the block exits, then flush everything at once"""
+        with self._lock:
+            self._held += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held -= 1
+                release = self._held == 0
+            if release:
+                self.flush()
+
+    def flush(self):
+        """Hand every pending key to the flush callback right away"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                keys = list(self._pending)
+                self._pending.clear()
+
+            if keys:
+                self.flush_callback(keys)
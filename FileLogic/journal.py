@@ -0,0 +1,373 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .json_stream import iter_json_array
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f: TextIO):
+    """Block until this process holds the exclusive lock on f"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass  # LK_LOCK gives up after about 10 seconds; keep waiting
+
+
+def _unlock_file(f: TextIO):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JournalStore:
+    """Keyed record store persisted as a snapshot file plus an append-only log
+
+    Every mutation appends one compact JSON line to the log instead of
+    rewriting the whole snapshot. On load the snapshot is read and the log
+    tail is replayed on top of it. Once the log holds ``compact_threshold``
+    entries, and at least as many as there are records, a background thread
+    folds it into a new snapshot, written to a temp file and renamed into
+    place.
+
+    The snapshot is a JSON list of records. When ``value_field`` is given it
+    is instead a JSON object mapping each key to that single field, which
+    matches flat files such as ``users.json``.
+
+    Several stores, in one process or several, may share the same files.
+    Appends and compaction hold an exclusive lock on a ``.lock`` file next
+    to the journal, and compaction re-reads the files first when anyone
+    else wrote to them, so no writer's records are dropped. ``changed()``
+    tells a store's owner when to reload.
+
+    A load that does not finish (an unreadable snapshot, or a caller that
+    gives up) leaves the files alone: compaction is refused so a partial
+    snapshot never replaces them, and ``rewrite`` first moves them aside.
+
+    Records handed to ``put`` are kept by reference and must not be mutated
+    afterwards.
+    """
+
+    def __init__(self, snapshot_path: str, key_field: str,
+                 log_path: Optional[str] = None, compact_threshold: int = 1000,
+                 value_field: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self.key_field = key_field
+        self.value_field = value_field
+        self.log_path = log_path or os.path.splitext(snapshot_path)[0] + '.journal'
+        self.compact_threshold = compact_threshold
+
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # Guards the in-memory state; taken after _disk_lock when both are needed
+        self._lock = threading.Lock()
+        # Serializes this process's threads on the shared file lock
+        self._disk_mutex = threading.Lock()
+        self._lock_file: Optional[TextIO] = None
+        self._log_file: Optional[TextIO] = None
+        self._log_count = 0
+        self._compacting = False
+        # _disk_signature() of the files _records reflects, None if unknown
+        self._signature: Optional[Tuple] = None
+        # Compaction merged writes of another store into _records
+        self._outside_changes = False
+        # The last load did not finish, so _records is partial
+        self._load_failed = False
+        # Appended since the last load or compaction
+        self._appended = False
+
+    @contextmanager
+    def _disk_lock(self):
+        """Exclusive access to the files across threads and processes"""
+        with self._disk_mutex:
+            if self._lock_file is None:
+                self._lock_file = open(self.log_path + '.lock', 'a+')
+            _lock_file(self._lock_file)
+            try:
+                yield
+            finally:
+                _unlock_file(self._lock_file)
+
+    def _disk_signature(self) -> Tuple:
+        """(inode, mtime, size) of the snapshot and the log; any write to either changes it"""
+        signature = []
+        for path in (self.snapshot_path, self.log_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def changed(self) -> bool:
+        """Whether the files changed other than through this store since the last load"""
+        with self._lock:
+            if self._signature is None or self._outside_changes:
+                return True
+            signature = self._signature
+        return signature != self._disk_signature()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read the snapshot, replay the journal and return all records"""
+        return list(self.iter_load())
+
+    def iter_load(self, stream: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield every record of the snapshot with the journal applied
+
+        The journal is read first, so each snapshot record can be replaced or
+        dropped as it is parsed and callers can build objects while loading.
+        With ``stream`` a list snapshot is parsed a chunk at a time instead
+        of being read whole. The store's contents are replaced once the
+        iteration finishes; it must not be written to meanwhile.
+        """
+        # Cleared only once every record was read
+        self._load_failed = True
+        # Read the logs and open the snapshot under the lock so they match;
+        # the open snapshot stays readable if another store replaces it.
+        with self._disk_lock():
+            signature = self._disk_signature()
+            overrides, log_count = self._read_logs()
+            snapshot_file = open(self.snapshot_path, 'r') if signature[0] is not None else None
+
+        records: Dict[str, Dict[str, Any]] = {}
+        try:
+            for record in self._merge(snapshot_file, overrides, stream):
+                records[record[self.key_field]] = record
+                yield record
+        finally:
+            if snapshot_file is not None:
+                snapshot_file.close()
+
+        with self._lock:
+            self._records = records
+            self._log_count = log_count
+            self._signature = signature
+            self._outside_changes = False
+            self._load_failed = False
+
+    def _read_logs(self) -> Tuple[Dict[str, Optional[Dict[str, Any]]], int]:
+        """Journal entries by key (None = deleted) and how many there were"""
+        overrides: Dict[str, Optional[Dict[str, Any]]] = {}
+        return overrides, self._replay(self.log_path, overrides)
+
+    def _merge(self, snapshot_file: Optional[TextIO], overrides: Dict[str, Optional[Dict[str, Any]]],
+               stream: bool) -> Iterator[Dict[str, Any]]:
+        """Records of the snapshot with the journal entries applied; consumes overrides"""
+        key_field = self.key_field
+        if snapshot_file is not None:
+            for record in self._iter_snapshot(snapshot_file, stream):
+                key = record[key_field]
+                if key in overrides:
+                    record = overrides.pop(key)
+                    if record is None:
+                        continue
+                yield record
+        for record in overrides.values():
+            if record is not None:
+                yield record
+
+    def _iter_snapshot(self, f: TextIO, stream: bool) -> Iterator[Dict[str, Any]]:
+        if stream and self.value_field is None:
+            yield from iter_json_array(f)
+            return
+        snapshot = json.load(f)
+        if isinstance(snapshot, dict):
+            for key, value in snapshot.items():
+                yield {self.key_field: key, self.value_field: value}
+        else:
+            yield from snapshot
+
+    def _replay(self, path: str, overrides: Dict[str, Optional[Dict[str, Any]]]) -> int:
+        """Collect journal entries from path into overrides (None = deleted), stopping at a torn final line"""
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if 'put' in entry:
+                    record = entry['put']
+                    overrides[record[self.key_field]] = record
+                else:
+                    overrides[entry['del']] = None
+                count += 1
+        return count
+
+    def put(self, record: Dict[str, Any]):
+        """Insert or replace a single record"""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        """Insert or replace several records with one journal write"""
+        lines = []
+        with self._disk_lock(), self._lock:
+            for record in records:
+                self._records[record[self.key_field]] = record
+                lines.append(json.dumps({'put': record}, separators=(',', ':')))
+            self._append(lines)
+
+    def delete(self, key: str):
+        """Remove a single record"""
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]):
+        """Remove several records with one journal write"""
+        lines = []
+        with self._disk_lock(), self._lock:
+            for key in keys:
+                if self._records.pop(key, None) is not None:
+                    lines.append(json.dumps({'del': key}, separators=(',', ':')))
+            self._append(lines)
+
+    def _append(self, lines: List[str]):
+        """Write journal lines; caller must hold the disk lock and the lock"""
+        if not lines:
+            return
+        before = self._disk_signature()
+        # Another store may have compacted the log away since it was opened
+        if self._log_file is not None and (before[1] is None
+                                           or os.fstat(self._log_file.fileno()).st_ino != before[1][0]):
+            self._log_file.close()
+            self._log_file = None
+        if self._log_file is None:
+            self._log_file = open(self.log_path, 'a')
+        self._log_file.write('\n'.join(lines) + '\n')
+        self._log_file.flush()
+        self._appended = True
+
+        # Only our own write changed the files if they were as last seen;
+        # otherwise someone else wrote too and _records no longer matches
+        if before == self._signature:
+            stat = os.fstat(self._log_file.fileno())
+            self._signature = (before[0], (stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        else:
+            self._signature = None
+
+        self._log_count += len(lines)
+        # Compaction rewrites every record, so wait until the journal is as
+        # long as the store; that keeps its cost per append constant
+        limit = max(self.compact_threshold, len(self._records))
+        if self._log_count >= limit and not self._compacting and not self._load_failed:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def rewrite(self, records: Iterable[Dict[str, Any]]):
+        """Replace the whole store with records and write a fresh snapshot"""
+        self._compact({record[self.key_field]: record for record in records})
+
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        self._compact()
+
+    def _compact(self, replacement: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Write a snapshot of replacement, or of the current records, and drop the journal
+
+        Holds the disk lock throughout, so appends from any store wait until
+        the snapshot is in place. Writes by other stores that _records does
+        not reflect are read back from the files first.
+        """
+        with self._disk_lock():
+            if self._load_failed:
+                if replacement is None:
+                    print(f"Error compacting journal: {self.snapshot_path} did not load, leaving it as it is")
+                    return
+                self._set_aside()
+            try:
+                with self._lock:
+                    self._compacting = True
+                    if replacement is not None:
+                        self._records = replacement
+                    stale = replacement is None and self._signature != self._disk_signature()
+                if stale:
+                    overrides, _ = self._read_logs()
+                    snapshot_file = open(self.snapshot_path, 'r') if os.path.exists(self.snapshot_path) else None
+                    try:
+                        records = {record[self.key_field]: record
+                                   for record in self._merge(snapshot_file, overrides, False)}
+                    finally:
+                        if snapshot_file is not None:
+                            snapshot_file.close()
+                    with self._lock:
+                        self._records = records
+                        self._outside_changes = True
+
+                self._write_snapshot(list(self._records.values()))
+                with self._lock:
+                    if self._log_file is not None:
+                        self._log_file.close()
+                        self._log_file = None
+                    # A crash before this leaves a log that is already in the
+                    # snapshot; replaying it is harmless as puts carry whole records
+                    if os.path.exists(self.log_path):
+                        os.remove(self.log_path)
+                    self._log_count = 0
+                    self._signature = self._disk_signature()
+                    self._appended = False
+            except Exception as e:
+                print(f"Error compacting journal: {e}")
+            finally:
+                self._compacting = False
+
+    def _set_aside(self):
+        """Rename the files that failed to load, keeping them for recovery; caller holds the disk lock"""
+        suffix = time.strftime('.corrupt-%Y%m%d-%H%M%S')
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        for path in (self.snapshot_path, self.log_path):
+            if os.path.exists(path):
+                os.replace(path, path + suffix)
+                print(f"Moved {path} aside to {path + suffix}")
+        self._load_failed = False
+
+    def _write_snapshot(self, records: List[Dict[str, Any]]):
+        """Atomically replace the snapshot file"""
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-', suffix='.tmp')
+        try:
+            if self.value_field is not None:
+                snapshot = {record[self.key_field]: record[self.value_field] for record in records}
+            else:
+                snapshot = records
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def close(self):
+        """Compact the journal if this store appended to it, and release the log and lock files"""
+        if self._appended:
+            self.compact()
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+        with self._disk_mutex:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
@@ -0,0 +1,68 @@
+import json
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+
+_WHITESPACE = ' \t\n\r'
+# How many earlier '},' positions to try when the last one in the buffer is
+# not between two top-level elements
+_MAX_CUT_ATTEMPTS = 4
+
+
+def _decode_complete(buffer: str, pos: int) -> Optional[Tuple[List[Any], int]]:
+    """
+    Decode every complete object element of an array from buffer[pos:]
+    Cuts the buffer after a '}' that is followed by ',' and decodes the part
+    before it with a single json.loads call. A cut inside a string or a
+    nested value leaves the text unbalanced and fails to parse, so a
+    successful parse always ends on an element boundary.
+    Returns: (elements: list, position after the comma: int) or None
+    """
+    end = len(buffer)
+    for _ in range(_MAX_CUT_ATTEMPTS):
+        cut = buffer.rfind('},', pos, end)
+        if cut == -1:
+            return None
+        try:
+            return json.loads('[' + buffer[pos:cut + 1] + ']'), cut + 2
+        except ValueError:
+            end = cut
+    return None
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without reading the whole file
+
+    The file is read in chunk_size pieces and the complete elements of each
+    piece are decoded together, so only about one chunk of text is held at
+    a time. Arrays of objects, like every snapshot in this repo, are
+    decoded in chunks; other elements are decoded once the whole array has
+    been read. Raises ValueError on malformed input.
+    """
+    buffer = f.read(chunk_size)
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buffer):
+            break
+        buffer = f.read(chunk_size)
+        pos = 0
+        if not buffer:
+            raise ValueError("Expected a JSON array")
+    if buffer[pos] != '[':
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    while True:
+        decoded = _decode_complete(buffer, pos)
+        if decoded is not None:
+            elements, pos = decoded
+            yield from elements
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    # What is left is the last elements and the closing bracket
+    rest: List[Any] = json.loads('[' + buffer[pos:])
+    yield from rest
@@ -0,0 +1,69 @@
+"""One-shot migration of the JSON device and user stores to SQLite
+
+Reads devices.json and users.json with their journals and copies every
+record into the SQLite databases used by DeviceManager(backend="sqlite")
+and UserAuth(backend="sqlite"). The JSON files are left untouched.
+
+Run with: python -m FileLogic.migrate [--force]
+"""
+import argparse
+import os
+import sys
+from typing import Tuple
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from FileLogic.journal import JournalStore
+from FileLogic.sqlite_store import SqliteStore
+
+
+def migrate(source: JournalStore, target: SqliteStore, force: bool = False) -> Tuple[bool, str]:
+    """
+    Copy every record of a JSON store into a SQLite store in one transaction
+    A target that already has records is only replaced when force is set.
+    Returns: (success: bool, message: str)
+    """
+    existing = target.count()
+    if existing and not force:
+        return False, f"{target.path} already has {existing} records; use --force to replace them"
+    try:
+        records = source.load()
+        target.rewrite(records)
+    except Exception as e:
+        return False, f"Error migrating {source.snapshot_path}: {e}"
+    return True, f"Copied {len(records)} records from {source.snapshot_path} to {target.path}"
+
+
+def main():
+    from Devices.device_manager import DEVICE_TABLE, DeviceManager
+    from User.user_auth import USER_TABLE
+
+    user_dir = os.path.join(parent_dir, 'User')
+    parser = argparse.ArgumentParser(description="Copy the JSON device and user stores into SQLite")
+    parser.add_argument('--devices-json', default=DeviceManager.DEVICES_FILE)
+    parser.add_argument('--devices-db', default=DeviceManager.DATABASE_FILE)
+    parser.add_argument('--users-json', default=os.path.join(user_dir, 'users.json'))
+    parser.add_argument('--users-db', default=os.path.join(user_dir, 'users.db'))
+    parser.add_argument('--force', action='store_true', help="replace records already in the databases")
+    args = parser.parse_args()
+
+    jobs = (
+        (JournalStore(args.devices_json, key_field='device_id'), SqliteStore(args.devices_db, DEVICE_TABLE)),
+        (JournalStore(args.users_json, key_field='username', value_field='password'),
+         SqliteStore(args.users_db, USER_TABLE)),
+    )
+    failed = False
+    for source, target in jobs:
+        success, message = migrate(source, target, args.force)
+        target.close()
+        print(message)
+        failed = failed or not success
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class TableSchema(NamedTuple):
+    """How records of one kind map onto a SQLite table
+
+    ``columns`` are record fields stored in their own column, key first.
+    Other record fields are kept as JSON in an ``extra`` column. ``derived``
+    columns are computed from the record on write and only exist for
+    queries (e.g. a lower-cased location). Each entry of ``indexes`` is the
+    tuple of columns of one index.
+    """
+    table: str
+    key_field: str
+    columns: Tuple[str, ...]
+    derived: Tuple[Tuple[str, Callable[[Dict[str, Any]], Any]], ...] = ()
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+
+
+class SqliteStore:
+    """Keyed record store kept in an indexed SQLite table
+
+    A drop-in for JournalStore: same load/put/delete/rewrite/changed/close methods,
+    but every write is its own transaction on a WAL-mode database, so
+    nothing is rewritten wholesale and readers are never blocked by a
+    writer. Batches (put_many, delete_many, rewrite) run as one transaction
+    through executemany, which reuses a single prepared statement.
+
+    One connection is shared by all threads and serialized by a lock.
+    """
+
+    def __init__(self, path: str, schema: TableSchema):
+        self.path = path
+        self.schema = schema
+        self.key_field = schema.key_field
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # data_version as of the last load, None before the first
+        self._loaded_version: Optional[int] = None
+
+        names = schema.columns + tuple(name for name, _ in schema.derived) + ('extra',)
+        self._column_set = frozenset(names)
+        self._stored_fields = frozenset(schema.columns)
+        self._select_sql = f"SELECT {', '.join(schema.columns)}, extra FROM {schema.table}"
+        self._upsert_sql = (f"INSERT OR REPLACE INTO {schema.table} ({', '.join(names)}) "
+                            f"VALUES ({', '.join('?' * len(names))})")
+        self._delete_sql = f"DELETE FROM {schema.table} WHERE {schema.key_field} = ?"
+        with self._lock:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database and create the table on first use; caller holds the lock"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last commits on power loss,
+            # like the JSON journal which is flushed but not fsynced
+            conn.execute("PRAGMA synchronous=NORMAL")
+            schema = self.schema
+            columns = [f"{schema.columns[0]} TEXT PRIMARY KEY"]
+            columns += list(schema.columns[1:]) + [name for name, _ in schema.derived] + ['extra TEXT']
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {schema.table} ({', '.join(columns)})")
+            for index in schema.indexes:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {schema.table}_{'_'.join(index)} "
+                             f"ON {schema.table} ({', '.join(index)})")
+            self._conn = conn
+        return self._conn
+
+    def _row(self, record: Dict[str, Any]) -> Tuple:
+        """Column values for a record, in _upsert_sql order"""
+        extra = {field: value for field, value in record.items() if field not in self._stored_fields}
+        return (tuple(record.get(column) for column in self.schema.columns)
+                + tuple(compute(record) for _, compute in self.schema.derived)
+                + (json.dumps(extra, separators=(',', ':')) if extra else None,))
+
+    def _record(self, row: Tuple) -> Dict[str, Any]:
+        """Rebuild a record from a row of _select_sql, leaving out NULL columns"""
+        record = {column: value for column, value in zip(self.schema.columns, row) if value is not None}
+        if row[-1]:
+            record.update(json.loads(row[-1]))
+        return record
+
+    def _write_many(self, sql: str, rows: List[Tuple], clear: bool = False):
+        """Run sql for every row in one transaction"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if clear:
+                    conn.execute(f"DELETE FROM {self.schema.table}")
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Return all records"""
+        return list(self.iter_load())
+
+    def iter_load(self, stream: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield every record
+
+        With ``stream`` rows are read as they are consumed instead of being
+        fetched all at once.
+        """
+        if not stream:
+            with self._lock:
+                conn = self._connection()
+                self._loaded_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                rows = conn.execute(self._select_sql).fetchall()
+            for row in rows:
+                yield self._record(row)
+            return
+        # A separate connection keeps the shared one free while the caller
+        # consumes rows; WAL gives it a consistent snapshot meanwhile
+        self._loaded_version = self.data_version()
+        conn = sqlite3.connect(self.path)
+        try:
+            for row in conn.execute(self._select_sql):
+                yield self._record(row)
+        finally:
+            conn.close()
+
+    def select(self, **conditions: Any) -> List[Dict[str, Any]]:
+        """Records whose columns equal the given values, e.g. select(type="light")"""
+        unknown = set(conditions) - self._column_set
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+        sql = self._select_sql
+        if conditions:
+            sql += " WHERE " + " AND ".join(f"{column} = ?" for column in conditions)
+        with self._lock:
+            rows = self._connection().execute(sql, tuple(conditions.values())).fetchall()
+        return [self._record(row) for row in rows]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The record stored under key, or None"""
+        records = self.select(**{self.key_field: key})
+        return records[0] if records else None
+
+    def count(self) -> int:
+        """Number of stored records"""
+        with self._lock:
+            return self._connection().execute(f"SELECT COUNT(*) FROM {self.schema.table}").fetchone()[0]
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database"""
+        with self._lock:
+            return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self) -> bool:
+        """Whether another connection committed since the last load"""
+        return self._loaded_version is None or self.data_version() != self._loaded_version
+
+    def put(self, record: Dict[str, Any]):
+        """Insert or replace a single record"""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        """Insert or replace several records in one transaction"""
+        rows = [self._row(record) for record in records]
+        if rows:
+            self._write_many(self._upsert_sql, rows)
+
+    def delete(self, key: str):
+        """Remove a single record"""
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]):
+        """Remove several records in one transaction"""
+        rows = [(key,) for key in keys]
+        if rows:
+            self._write_many(self._delete_sql, rows)
+
+    def rewrite(self, records: Iterable[Dict[str, Any]]):
+        """Replace the whole table with records in one transaction"""
+        self._write_many(self._upsert_sql, [self._row(record) for record in records], clear=True)
+
+    def compact(self):
+        """Fold the write-ahead log back into the database file"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Checkpoint and close the connection; later calls reopen it"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("PRAGMA optimize")
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                self._conn.close()
+                self._conn = None
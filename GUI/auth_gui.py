@@ -2,6 +2,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Tuple
 
 # Add the parent directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,9 +14,19 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 from User.user_auth import UserAuth
-from GUI.modern_home import ModernHomePage
 
 class AuthGUI:
+    """Login and signup window
+
+    The window is shown before anything heavy is imported or loaded: user
+    accounts, the DeviceManager (which reads devices.json) and the dashboard
+    module are loaded on a background thread while the user types. Login
+    waits for that preload only if it has not finished yet.
+
+    Password hashing is deliberately slow, so login and signup run on
+    UserAuth's hashing pool and their results are picked up with
+    root.after polling, keeping the window responsive.
+    """
     def __init__(self):
         # Color scheme for consistency
         self.colors = {
@@ -40,9 +54,49 @@ class AuthGUI:
         y = (self.root.winfo_screenheight() // 2) - (600 // 2)
         self.root.geometry(f"500x600+{x}+{y}")
         
-        self.auth = UserAuth()
+        self._auth: Optional[UserAuth] = None
+        self.preload_seconds: Optional[float] = None
+        self._preload_thread = threading.Thread(target=self._preload, name="startup-preload", daemon=True)
+        self._preload_lock = threading.Lock()
+        self._preload_done = threading.Event()
         self.setup_styles()
         self.create_widgets()
+        # Start loading once the window has been drawn
+        self.root.after_idle(self._start_preload)
+
+    def _start_preload(self):
+        """Start the preload thread unless it already started"""
+        with self._preload_lock:
+            if not self._preload_thread.ident:
+                self._preload_thread.start()
+
+    def _preload(self):
+        """Load users, devices and the dashboard module off the Tk thread"""
+        start = time.perf_counter()
+        try:
+            self._auth = UserAuth()
+            from Devices.device_manager import DeviceManager
+            DeviceManager()
+            import GUI.home_page  # noqa: F401  Warm the import for login
+        except Exception as e:
+            print(f"Error preloading: {e}")
+        self.preload_seconds = time.perf_counter() - start
+        self._preload_done.set()
+
+    @property
+    def auth(self) -> UserAuth:
+        """The user store, waiting for the background preload if needed
+
+        Read before the preload started, it starts the preload itself rather
+        than creating a second UserAuth that the preload would then replace.
+        """
+        if self._auth is None:
+            self._start_preload()
+            self._preload_done.wait()
+            if self._auth is None:
+                # The preload failed; build it here instead
+                self._auth = UserAuth()
+        return self._auth
 
     def setup_styles(self):
         """Configure modern styles for widgets"""
@@ -129,8 +183,8 @@ class AuthGUI:
         self.confirm_password_entry.pack(fill="x", pady=(0, 25))
 
         # Signup Button
-        signup_btn = ttk.Button(self.signup_card, text="📝 Sign Up", command=self.signup, style="Primary.TButton")
-        signup_btn.pack(fill="x", pady=(0, 20))
+        self.signup_btn = ttk.Button(self.signup_card, text="📝 Sign Up", command=self.signup, style="Primary.TButton")
+        self.signup_btn.pack(fill="x", pady=(0, 20))
 
         # Login Link
         login_link = ttk.Label(self.signup_card, text="Already have an account? Login", 
@@ -154,16 +208,38 @@ class AuthGUI:
         self.signup_card.pack_forget()
         self.login_card.pack(fill="x", pady=(0, 20))
 
+    def _when_done(self, future: Future, callback: Callable[[Tuple[bool, str]], None],
+                   interval_ms: int = 20):
+        """Call callback with the (success, message) result of future on the Tk thread"""
+        def check():
+            if not future.done():
+                self.root.after(interval_ms, check)
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                result = (False, f"Error: {e}")
+            callback(result)
+
+        self.root.after(interval_ms, check)
+
     def login(self):
         """Handle login attempt"""
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
 
-        success, message = self.auth.login_user(username, password)
+        self.login_btn.state(["disabled"])
+        self._when_done(self.auth.login_user_async(username, password),
+                        lambda result: self._on_login_result(username, result))
+
+    def _on_login_result(self, username: str, result: Tuple[bool, str]):
+        success, message = result
+        self.login_btn.state(["!disabled"])
         if success:
             messagebox.showinfo("Success", f"Welcome back, {username}!")
             self.root.withdraw()  # Hide the login window
-            home_page = ModernHomePage(username, self.colors)
+            from GUI.home_page import HomePage
+            home_page = HomePage(username)
             home_page.run()
             self.root.destroy()  # Destroy the login window after home page is closed
         else:
@@ -179,7 +255,12 @@ class AuthGUI:
             messagebox.showerror("Error", "Passwords do not match")
             return
 
-        success, message = self.auth.register_user(username, password)
+        self.signup_btn.state(["disabled"])
+        self._when_done(self.auth.register_user_async(username, password), self._on_signup_result)
+
+    def _on_signup_result(self, result: Tuple[bool, str]):
+        success, message = result
+        self.signup_btn.state(["!disabled"])
         if success:
             messagebox.showinfo("Success", message)
             self.show_login()
@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
 # Add the parent directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,23 +13,53 @@ if parent_dir not in sys.path:
 
 from Devices.device_manager import DeviceManager
 from Devices.device import Device, Light, Thermostat, SmartLock
+from Devices.dispatcher import CommandDispatcher, CommandResult
+from Devices.events import DeviceEvent
+from GUI.throttle import RateLimitedCallback
+from GUI.virtual_list import VirtualDeviceList
+from Telemetry.metrics import TkLagMonitor, metrics
+
+REFRESH_SECONDS = metrics.histogram("gui.refresh_seconds")
+BUILD_CARDS_SECONDS = metrics.histogram("gui.build_cards_seconds")
 
 class DeviceControlFrame(ttk.Frame):
     """Frame for controlling individual devices"""
-    def __init__(self, parent, device: Device, **kwargs):
+    # (mode, interval in ms) used to coalesce slider drags per control type;
+    # see RateLimitedCallback for the modes
+    SLIDER_RATE_LIMITS = {
+        "brightness": ("throttle", 100),
+        "temperature": ("debounce", 250),
+    }
+
+    def __init__(self, parent, device: Device, dispatcher: Optional[CommandDispatcher] = None, **kwargs):
         super().__init__(parent, style="DeviceCard.TFrame", padding="15", **kwargs)
         self.device = device
+        self.dispatcher = dispatcher
+        self._commands_in_flight = 0
+        self._slider_callbacks = {
+            control: RateLimitedCallback(self, getattr(self, f"update_{control}"), interval, mode)
+            for control, (mode, interval) in self.SLIDER_RATE_LIMITS.items()
+        }
         self.create_widgets()
+        # The device's cached record is replaced on every change, so comparing
+        # identities tells whether the frame is stale without reading fields
+        self.rendered_record = device.to_record()
+
+    @property
+    def is_stale(self) -> bool:
+        return self.rendered_record is not self.device.to_record()
 
     def create_widgets(self):
         # Device header with name and location
         header_frame = ttk.Frame(self, style="DeviceCard.TFrame")
         header_frame.pack(fill="x", pady=(0, 10))
         
-        ttk.Label(header_frame, text=f"{self.device.name}", 
-                 style="DeviceName.TLabel").pack(side="left")
-        ttk.Label(header_frame, text=f"📍 {self.device.location}", 
-                 style="Location.TLabel").pack(side="right")
+        self.name_label = ttk.Label(header_frame, text=f"{self.device.name}", 
+                                    style="DeviceName.TLabel")
+        self.name_label.pack(side="left")
+        self.location_label = ttk.Label(header_frame, text=f"📍 {self.device.location}", 
+                                        style="Location.TLabel")
+        self.location_label.pack(side="right")
         
         # Status with modern styling
         status_frame = ttk.Frame(self, style="DeviceCard.TFrame")
@@ -73,7 +104,7 @@ class DeviceControlFrame(ttk.Frame):
         ttk.Label(control_frame, text="💡 Brightness:", style="ControlLabel.TLabel").pack(side="left")
         self.brightness_scale = ttk.Scale(control_frame, from_=0, to=100, 
                                         orient="horizontal", length=200,
-                                        command=self.update_brightness)
+                                        command=self._slider_callbacks["brightness"])
         self.brightness_scale.set(self.device.brightness)
         self.brightness_scale.pack(side="left", padx=10)
 
@@ -87,7 +118,7 @@ class DeviceControlFrame(ttk.Frame):
         temp_frame.pack(fill="x", pady=(0, 10))
         ttk.Label(temp_frame, text="🌡️ Temperature:", style="ControlLabel.TLabel").pack(side="left")
         self.temp_scale = ttk.Scale(temp_frame, from_=10, to=30, orient="horizontal",
-                                  length=200, command=self.update_temperature)
+                                  length=200, command=self._slider_callbacks["temperature"])
         self.temp_scale.set(self.device.temperature)
         self.temp_scale.pack(side="left", padx=10)
         
@@ -110,30 +141,41 @@ class DeviceControlFrame(ttk.Frame):
     def update_brightness(self, value):
         """Update light brightness"""
         if isinstance(self.device, Light):
-            self.device.set_brightness(int(float(value)))
-            self.update_status()
+            level = int(float(value))
+            # Scale.set() also lands here; skip values the device already has
+            if level != self.device.brightness:
+                self.run_command("set_brightness", level)
 
     def update_temperature(self, value):
         """Update thermostat temperature"""
         if isinstance(self.device, Thermostat):
-            self.device.set_temperature(float(value))
-            self.update_status()
+            temperature = float(value)
+            if temperature != self.device.temperature:
+                self.run_command("set_temperature", temperature)
 
     def update_mode(self):
         """Update thermostat mode"""
         if isinstance(self.device, Thermostat):
-            self.device.set_mode(self.mode_var.get())
-            self.update_status()
+            self.run_command("set_mode", self.mode_var.get())
 
     def turn_on(self):
         """Turn device on"""
-        self.device.turn_on()
-        self.update_status()
+        self.run_command("turn_on")
 
     def turn_off(self):
         """Turn device off"""
-        self.device.turn_off()
-        self.update_status()
+        self.run_command("turn_off")
+
+    def run_command(self, action: str, *args):
+        """Run a device command, on the dispatcher's workers when one is attached"""
+        if self.dispatcher is not None:
+            # The status is refreshed once the dispatcher reports completion
+            self._commands_in_flight += 1
+            self.dispatcher.submit(self.device.device_id, action, *args,
+                                   callback=self._on_command_done)
+        else:
+            getattr(self.device, action)(*args)
+            self.update_status()
 
     def update_status(self):
         """Update the status display"""
@@ -145,9 +187,61 @@ class DeviceControlFrame(ttk.Frame):
                                            (isinstance(self.device, SmartLock) and self.device.locked)) else "StatusOff.TLabel"
         self.status_label.config(text=f"Status: {status_text}", style=status_style)
 
+    def _on_command_done(self, result: CommandResult):
+        self._commands_in_flight -= 1
+        # A rejected command leaves the device unchanged, so no event will
+        # move the controls back from the value the user picked
+        if (not result.success and result.device_id == self.device.device_id
+                and self.winfo_exists()):
+            self.refresh(force=True)
+
+    def bind_device(self, device: Device):
+        """Point this frame at another device of the same class"""
+        # Deliver pending slider values to the device they were meant for
+        self.flush_pending()
+        self.device = device
+        self.refresh(force=True)
+
+    def flush_pending(self):
+        """Apply slider values still held back by rate limiting"""
+        for callback in self._slider_callbacks.values():
+            callback.flush()
+
+    def destroy(self):
+        self.flush_pending()
+        super().destroy()
+
+    def refresh(self, force: bool = False):
+        """Re-read every displayed field from the device"""
+        self.name_label.config(text=f"{self.device.name}")
+        self.location_label.config(text=f"📍 {self.device.location}")
+        self.update_status()
+        self.rendered_record = self.device.to_record()
+        # While the user's own commands are still queued the device lags
+        # behind the slider; syncing now would yank the slider back mid-drag
+        if self._commands_in_flight and not force:
+            return
+
+        # Scale.set() invokes the command callback, so only move the slider
+        # when the device value actually differs from what is shown
+        if isinstance(self.device, Light):
+            if int(float(self.brightness_scale.get())) != self.device.brightness:
+                self.brightness_scale.set(self.device.brightness)
+        elif isinstance(self.device, Thermostat):
+            if float(self.temp_scale.get()) != self.device.temperature:
+                self.temp_scale.set(self.device.temperature)
+            self.mode_var.set(self.device.mode)
+
 
 class HomePage:
-    def __init__(self, username: str):
+    # Fleets larger than this are shown in a virtualized list
+    VIRTUAL_LIST_THRESHOLD = 200
+    # Device cards are built progressively: a first screenful right away,
+    # then BUILD_BATCH cards per event-loop turn so the window stays responsive
+    FIRST_SCREEN_CARDS = 4
+    BUILD_BATCH = 10
+
+    def __init__(self, username: str, virtualized: Optional[bool] = None):
         self.bg_color = "#ffffff"
         self.card_bg = "#f7f7f7"
         self.text_color = "#222222"
@@ -163,6 +257,20 @@ class HomePage:
         self.username = username
         
         self.device_manager = DeviceManager()
+        self.dispatcher = CommandDispatcher(self.device_manager)
+        self.dispatcher.attach(self.root, self.on_command_result)
+        self.device_events = self.device_manager.events.subscribe()
+        self.device_events.attach(self.root, self.on_device_events)
+        # device_id -> (control frame, separator) currently on screen
+        self._device_frames: Dict[str, Tuple[DeviceControlFrame, ttk.Separator]] = {}
+        # Devices waiting for a card, in display order
+        self._pending_cards: List[Device] = []
+        self._build_after_id: Optional[str] = None
+        self.fully_built = False
+        if virtualized is None:
+            virtualized = len(self.device_manager.get_all_devices()) > self.VIRTUAL_LIST_THRESHOLD
+        self.virtualized = virtualized
+        self.lag_monitor = TkLagMonitor(self.root).start() if metrics.enabled else None
         self.setup_styles()
         self.create_widgets()
         
@@ -230,6 +338,15 @@ class HomePage:
         self.devices_frame = ttk.Frame(self.main_frame, style="Custom.TFrame")
         self.devices_frame.pack(fill=tk.BOTH, expand=True)
         
+        if self.virtualized:
+            self.device_list = VirtualDeviceList(
+                self.devices_frame,
+                lambda parent, device: DeviceControlFrame(parent, device, dispatcher=self.dispatcher),
+                bg=self.bg_color)
+            self.device_list.pack(fill=tk.BOTH, expand=True)
+            self.refresh_devices()
+            return
+
         # Create scrollable canvas for devices
         self.canvas = tk.Canvas(self.devices_frame, bg=self.bg_color, 
                               highlightthickness=0)
@@ -253,6 +370,10 @@ class HomePage:
     def logout(self):
         """Handle logout functionality"""
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
+            self.dispatcher.shutdown(wait=False)
+            self.device_events.close()
+            if self.lag_monitor is not None:
+                self.lag_monitor.stop()
             self.root.destroy()
             # Reopen the auth GUI
             from GUI.auth_gui import AuthGUI
@@ -260,16 +381,88 @@ class HomePage:
             auth_app.run()
 
     def refresh_devices(self):
-        """Refresh the devices display"""
-        # Clear existing devices
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        # Add device controls
-        for device in self.device_manager.get_all_devices():
-            device_frame = DeviceControlFrame(self.scrollable_frame, device)
+        """Sync the devices display with the device manager
+
+        Frames are keyed by device_id: only new devices get a frame, frames of
+        removed devices are destroyed, and changed devices are updated in place.
+        New frames are built progressively by _build_cards.
+        """
+        start = time.perf_counter() if metrics.enabled else None
+        devices = self.device_manager.get_all_devices()
+        if self.virtualized:
+            self.device_list.set_devices(devices)
+            self.device_list.refresh()
+            self.fully_built = True
+        else:
+            self._sync_cards(devices)
+        if start is not None:
+            REFRESH_SECONDS.observe(time.perf_counter() - start)
+
+    def _sync_cards(self, devices: List[Device]):
+        """Drop cards of removed devices, refresh stale ones and queue new ones"""
+        current = {device.device_id: device for device in devices}
+
+        for device_id, (device_frame, separator) in list(self._device_frames.items()):
+            if current.get(device_id) is not device_frame.device:
+                device_frame.destroy()
+                separator.destroy()
+                del self._device_frames[device_id]
+
+        pending = []
+        for device in devices:
+            entry = self._device_frames.get(device.device_id)
+            if entry is None:
+                pending.append(device)
+            elif entry[0].is_stale:
+                entry[0].refresh()
+        self._pending_cards = pending
+        self.fully_built = False
+        if self._build_after_id is None:
+            self._build_cards(self.FIRST_SCREEN_CARDS if not self._device_frames else self.BUILD_BATCH)
+
+    def _build_cards(self, count: int):
+        """Create cards for up to count pending devices, then yield to the event loop"""
+        start = time.perf_counter() if metrics.enabled else None
+        self._build_after_id = None
+        batch, self._pending_cards = self._pending_cards[:count], self._pending_cards[count:]
+        for device in batch:
+            if device.device_id in self._device_frames:
+                continue
+            device_frame = DeviceControlFrame(self.scrollable_frame, device, dispatcher=self.dispatcher)
             device_frame.pack(fill="x", pady=10, padx=5)
-            ttk.Separator(self.scrollable_frame, orient="horizontal").pack(fill="x", pady=5)
+            separator = ttk.Separator(self.scrollable_frame, orient="horizontal")
+            separator.pack(fill="x", pady=5)
+            self._device_frames[device.device_id] = (device_frame, separator)
+
+        if self._pending_cards:
+            self._build_after_id = self.root.after(1, self._build_cards, self.BUILD_BATCH)
+        else:
+            self.fully_built = True
+        if start is not None:
+            BUILD_CARDS_SECONDS.observe(time.perf_counter() - start)
+
+    def on_command_result(self, result: CommandResult):
+        """Handle a finished device command on the Tk thread"""
+        if not result.success:
+            print(f"Command {result.action} on {result.device_id} failed: {result.message}")
+
+    def on_device_events(self, events: List[DeviceEvent]):
+        """Apply a batch of device events to the display"""
+        if self.device_events.dropped:
+            # Events were lost; fall back to a full resync
+            self.device_events.dropped = 0
+            self.refresh_devices()
+            return
+        if any(event.kind != "changed" for event in events):
+            self.refresh_devices()
+            return
+        if self.virtualized:
+            self.device_list.refresh()
+            return
+        for device_id in {event.device_id for event in events}:
+            entry = self._device_frames.get(device_id)
+            if entry is not None and entry[0].is_stale:
+                entry[0].refresh()
 
     def show_add_device_dialog(self):
         """Show dialog to add a new device"""
@@ -360,8 +553,7 @@ class HomePage:
             ("lock", "front_door", "Front Door Lock", "Entrance")
         ]
 
-        for dtype, device_id, name, location in sample_devices:
-            self.device_manager.add_device(dtype, device_id, name, location)
+        self.device_manager.add_devices(sample_devices)
         self.refresh_devices()
 
     def run(self):
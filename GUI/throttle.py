@@ -0,0 +1,75 @@
+import time
+import tkinter as tk
+from typing import Callable, Optional, Tuple
+
+
+class RateLimitedCallback:
+    """Coalesces rapid Tk callbacks such as ttk.Scale commands
+
+    In "throttle" mode the first call runs immediately and further calls run
+    at most once per ``interval_ms``; in "debounce" mode a call only runs
+    once no new call has arrived for ``interval_ms``. Either way,
+    intermediate arguments are dropped and the most recent arguments are
+    always delivered. Timers are scheduled with ``widget.after`` so the
+    callback runs on the Tk thread.
+    """
+
+    MODES = ("throttle", "debounce")
+
+    def __init__(self, widget: tk.Misc, callback: Callable, interval_ms: int = 100,
+                 mode: str = "throttle"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown rate limit mode: {mode}")
+        self.widget = widget
+        self.callback = callback
+        self.interval_ms = interval_ms
+        self.mode = mode
+
+        self._pending_args: Optional[Tuple] = None
+        self._after_id: Optional[str] = None
+        self._last_run = 0.0
+
+    def __call__(self, *args):
+        self._pending_args = args
+        if self.interval_ms <= 0:
+            self.flush()
+            return
+
+        if self.mode == "debounce":
+            self._cancel_timer()
+            self._after_id = self.widget.after(self.interval_ms, self._on_timer)
+            return
+
+        if self._after_id is not None:
+            return  # A trailing call is already scheduled
+        elapsed_ms = (time.monotonic() - self._last_run) * 1000
+        if elapsed_ms >= self.interval_ms:
+            self._run()
+        else:
+            self._after_id = self.widget.after(int(self.interval_ms - elapsed_ms), self._on_timer)
+
+    def _on_timer(self):
+        self._after_id = None
+        self._run()
+
+    def _run(self):
+        if self._pending_args is None:
+            return
+        args, self._pending_args = self._pending_args, None
+        self._last_run = time.monotonic()
+        self.callback(*args)
+
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Deliver any pending call right away"""
+        self._cancel_timer()
+        self._run()
+
+    def cancel(self):
+        """Drop any pending call"""
+        self._cancel_timer()
+        self._pending_args = None
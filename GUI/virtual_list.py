@@ -0,0 +1,159 @@
+import tkinter as tk
+from tkinter import ttk
+import os
+import sys
+from bisect import bisect_right
+from typing import Callable, Dict, List, Tuple, Type
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Devices.device import Device
+
+
+class VirtualDeviceList(ttk.Frame):
+    """Scrollable device list that only builds frames for visible rows
+
+    Frames of one device class all have the same height, measured from the
+    first frame built for that class, so the top of every row is known up
+    front and the rows intersecting the canvas viewport (plus ``overscan``
+    rows on each side) are found by bisecting on the scroll offset. Frames
+    that scroll out of view are parked in a pool per device class and
+    rebound to the next device of that class that scrolls in, keeping the
+    widget count constant regardless of fleet size.
+    """
+    # Space left between consecutive rows
+    ROW_GAP = 10
+    # Pixels scrolled per mouse wheel step
+    WHEEL_STEP = 75
+
+    def __init__(self, parent, frame_factory: Callable[[tk.Widget, Device], ttk.Frame],
+                 overscan: int = 2, bg: str = "#ffffff", **kwargs):
+        super().__init__(parent, style="Custom.TFrame", **kwargs)
+        self.frame_factory = frame_factory
+        self.overscan = overscan
+
+        self._devices: List[Device] = []
+        # Row pitch (frame height plus ROW_GAP) per device class
+        self._row_heights: Dict[Type[Device], int] = {}
+        # Top of every row, plus the bottom of the last one
+        self._offsets: List[int] = [0]
+        # row index -> (frame, canvas window id)
+        self._visible: Dict[int, Tuple[ttk.Frame, int]] = {}
+        self._free: Dict[Type[Device], List[Tuple[ttk.Frame, int]]] = {}
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set, yscrollincrement=1)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        # Bound on the toplevel because its bindtag is shared by every row widget
+        toplevel = self.winfo_toplevel()
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            toplevel.bind(sequence, self._on_mousewheel, add="+")
+
+    @property
+    def widget_count(self) -> int:
+        """Number of device frames currently alive, visible or pooled"""
+        return len(self._visible) + sum(len(pool) for pool in self._free.values())
+
+    def set_devices(self, devices: List[Device]):
+        """Replace the list contents and re-render the viewport"""
+        self._devices = list(devices)
+        for index in list(self._visible):
+            self._release(index)
+        for device in self._devices:
+            if type(device) not in self._row_heights:
+                self._measure(device)
+        offsets = [0]
+        for device in self._devices:
+            offsets.append(offsets[-1] + self._row_heights[type(device)])
+        self._offsets = offsets
+        self._update_scrollregion()
+        self.render()
+
+    def refresh(self):
+        """Update visible frames whose device changed since they were drawn"""
+        for frame, _ in self._visible.values():
+            if frame.is_stale:
+                frame.refresh()
+
+    def _measure(self, device: Device):
+        """Record the row height of device's class from a frame built for it
+
+        The frame goes straight into the pool, so measuring costs no extra widget.
+        """
+        frame = self.frame_factory(self.canvas, device)
+        frame.update_idletasks()
+        height = frame.winfo_reqheight()
+        window = self.canvas.create_window(0, 0, window=frame, anchor="nw", height=height, state="hidden")
+        self._row_heights[type(device)] = height + self.ROW_GAP
+        self._free.setdefault(type(device), []).append((frame, window))
+
+    def _update_scrollregion(self):
+        width = self.canvas.winfo_width()
+        self.canvas.configure(scrollregion=(0, 0, width, self._offsets[-1]))
+
+    def _visible_range(self) -> range:
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), 1)
+        first = max(0, bisect_right(self._offsets, top) - 1 - self.overscan)
+        last = min(len(self._devices), bisect_right(self._offsets, top + height) + self.overscan)
+        return range(first, last)
+
+    def render(self):
+        """Bind frames to the rows in the viewport and recycle the rest"""
+        wanted = self._visible_range()
+        for index in list(self._visible):
+            if index not in wanted:
+                self._release(index)
+
+        width = self.canvas.winfo_width()
+        for index in wanted:
+            if index not in self._visible:
+                self._visible[index] = self._acquire(self._devices[index], index, width)
+
+    def _acquire(self, device: Device, index: int, width: int) -> Tuple[ttk.Frame, int]:
+        """Reuse a pooled frame for device or build a new one"""
+        y = self._offsets[index]
+        pool = self._free.get(type(device))
+        if pool:
+            frame, window = pool.pop()
+            frame.bind_device(device)
+            self.canvas.coords(window, 0, y)
+            self.canvas.itemconfigure(window, state="normal", width=width)
+        else:
+            frame = self.frame_factory(self.canvas, device)
+            window = self.canvas.create_window(0, y, window=frame, anchor="nw", width=width,
+                                               height=self._row_heights[type(device)] - self.ROW_GAP)
+        return frame, window
+
+    def _release(self, index: int):
+        frame, window = self._visible.pop(index)
+        self.canvas.itemconfigure(window, state="hidden")
+        self._free.setdefault(type(frame.device), []).append((frame, window))
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def _on_configure(self, event):
+        for frame, window in self._visible.values():
+            self.canvas.itemconfigure(window, width=event.width)
+        self._update_scrollregion()
+        self.render()
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(delta * self.WHEEL_STEP, "units")
+        self.render()
@@ -0,0 +1 @@
+"""Telemetry package for device state history and derived metrics"""
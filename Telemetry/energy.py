@@ -0,0 +1,263 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Devices.device_manager import DeviceManager
+from Devices.events import DeviceEvent, Subscription
+from Telemetry.history import HistoryStore, state_from_record
+
+# Power draw of each device type at full output, in watts
+RATED_WATTS = {"light": 10.0, "thermostat": 1500.0, "smartlock": 0.5}
+
+# Device attributes the power estimate depends on
+POWER_ATTRIBUTES = ("status", "brightness", "temperature", "mode")
+
+WATT_SECONDS_PER_KWH = 3.6e6
+
+# Called as power_model(device_type, state) -> watts
+PowerModel = Callable[[str, Dict[str, Any]], float]
+
+
+def estimate_power(device_type: str, state: Dict[str, Any]) -> float:
+    """Estimated draw in watts of a device in the given state"""
+    rated = RATED_WATTS.get(device_type, 0.0)
+    if device_type == "light":
+        if not state.get("status"):
+            return 0.0
+        return rated * (state.get("brightness") or 0) / 100
+    if device_type == "thermostat":
+        mode = state.get("mode")
+        if not state.get("status") or mode not in ("HEAT", "COOL"):
+            return 0.0
+        # Duty cycle grows as the setpoint moves further from a mild 20°C
+        temperature = state.get("temperature") or 20.0
+        offset = temperature - 20.0 if mode == "HEAT" else 20.0 - temperature
+        return rated * min(1.0, max(0.1, 0.5 + 0.05 * offset))
+    return rated
+
+
+class _Total:
+    """Running energy of a group of devices
+
+    Energy at time t is ``settled + power * t - weighted``, where power is
+    the group's current draw and weighted is the sum of each member's draw
+    times the moment it started, so a member changing state is O(1).
+    """
+    __slots__ = ('settled', 'power', 'weighted')
+
+    def __init__(self):
+        self.settled = 0.0
+        self.power = 0.0
+        self.weighted = 0.0
+
+    def add(self, power: float, since: float):
+        self.power += power
+        self.weighted += power * since
+
+    def remove(self, power: float, since: float, now: float):
+        self.settled += power * (now - since)
+        self.power -= power
+        self.weighted -= power * since
+
+    def energy(self, now: float) -> float:
+        return self.settled + self.power * now - self.weighted
+
+
+class _Meter:
+    """Per-device power and energy bookkeeping"""
+    __slots__ = ('device_type', 'location', 'state', 'power', 'since', 'settled')
+
+    def __init__(self, device_type: str, location: str, state: Dict[str, Any]):
+        self.device_type = device_type
+        self.location = location
+        self.state = state
+        self.power = 0.0
+        self.since = 0.0
+        self.settled = 0.0
+
+
+class EnergyMeter:
+    """Live energy estimates per device, per location and for the whole home
+
+    Running totals are updated from the DeviceManager's change events, so
+    reading any total costs the same regardless of how long the meter has
+    been running or how many devices the home has. Totals count from when
+    the meter was started.
+
+    Consumption over an arbitrary past window is computed from a
+    HistoryStore instead, by integrating the power estimate over the
+    recorded state changes of each device in the window.
+
+    Energies are reported in kWh and power in watts.
+    """
+
+    def __init__(self, device_manager: DeviceManager, history: Optional[HistoryStore] = None,
+                 power_model: PowerModel = estimate_power):
+        self.device_manager = device_manager
+        self.history = history
+        self.power_model = power_model
+
+        # Times are kept relative to the meter's start so the running sums stay precise
+        self._origin = time.time()
+        self._meters: Dict[str, _Meter] = {}
+        self._home = _Total()
+        self._locations: Dict[str, _Total] = {}
+        self._lock = threading.Lock()
+        self._subscription: Optional[Subscription] = None
+
+    def _now(self, timestamp: Optional[float] = None) -> float:
+        return (time.time() if timestamp is None else timestamp) - self._origin
+
+    def _totals(self, location: str) -> List[_Total]:
+        key = location.lower()
+        total = self._locations.get(key)
+        if total is None:
+            total = self._locations[key] = _Total()
+        return [self._home, total]
+
+    def _track(self, device_id: str, record: Dict[str, Any], now: float):
+        """Start metering a device from its record; caller holds the lock"""
+        if device_id in self._meters:
+            self._untrack(device_id, now)
+        meter = _Meter(record.get("type", ""), record.get("location", ""), state_from_record(record))
+        meter.power = self.power_model(meter.device_type, meter.state)
+        meter.since = now
+        for total in self._totals(meter.location):
+            total.add(meter.power, now)
+        self._meters[device_id] = meter
+
+    def _untrack(self, device_id: str, now: float):
+        meter = self._meters.pop(device_id, None)
+        if meter is not None:
+            for total in self._totals(meter.location):
+                total.remove(meter.power, meter.since, max(now, meter.since))
+
+    def _apply(self, device_id: str, changes: Dict[str, Any], now: float):
+        """Settle a device's energy up to now, then apply its state change"""
+        meter = self._meters.get(device_id)
+        if meter is None:
+            return
+        now = max(now, meter.since)  # Events from different threads can arrive slightly out of order
+        for total in self._totals(meter.location):
+            total.remove(meter.power, meter.since, now)
+        meter.settled += meter.power * (now - meter.since)
+
+        meter.state.update(changes)
+        if "location" in changes:
+            meter.location = changes["location"]
+        meter.power = self.power_model(meter.device_type, meter.state)
+        meter.since = now
+        for total in self._totals(meter.location):
+            total.add(meter.power, now)
+
+    def handle_events(self, events: List[DeviceEvent]):
+        """Update running totals from a batch of device events"""
+        with self._lock:
+            for event in events:
+                now = event.timestamp - self._origin
+                if event.kind == "changed":
+                    self._apply(event.device_id, event.changes, now)
+                elif event.kind == "added":
+                    self._track(event.device_id, event.changes, now)
+                elif event.kind == "removed":
+                    self._untrack(event.device_id, now)
+
+    def start(self):
+        """Meter the manager's current devices and follow their changes"""
+        if self._subscription is not None:
+            return
+        self._subscription = self.device_manager.events.subscribe(self.handle_events, max_queue=200000,
+                                                                  batch_size=4096)
+        now = self._now()
+        with self._lock:
+            for device in self.device_manager.get_all_devices():
+                if device.device_id not in self._meters:
+                    self._track(device.device_id, device.to_record(), now)
+
+    def stop(self):
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+    def device_power(self, device_id: str) -> float:
+        """Current estimated draw of a device in watts"""
+        meter = self._meters.get(device_id)
+        return meter.power if meter is not None else 0.0
+
+    def device_energy(self, device_id: str) -> float:
+        """kWh used by a device since the meter started"""
+        with self._lock:
+            meter = self._meters.get(device_id)
+            if meter is None:
+                return 0.0
+            watt_seconds = meter.settled + meter.power * (self._now() - meter.since)
+        return watt_seconds / WATT_SECONDS_PER_KWH
+
+    def location_power(self, location: str) -> float:
+        total = self._locations.get(location.lower())
+        return total.power if total is not None else 0.0
+
+    def location_energy(self, location: str) -> float:
+        """kWh used by devices in a location since the meter started"""
+        with self._lock:
+            total = self._locations.get(location.lower())
+            return total.energy(self._now()) / WATT_SECONDS_PER_KWH if total is not None else 0.0
+
+    def home_power(self) -> float:
+        return self._home.power
+
+    def home_energy(self) -> float:
+        """kWh used by the whole home since the meter started"""
+        with self._lock:
+            return self._home.energy(self._now()) / WATT_SECONDS_PER_KWH
+
+    def location_energies(self) -> Dict[str, float]:
+        """kWh per location key since the meter started"""
+        with self._lock:
+            now = self._now()
+            return {location: total.energy(now) / WATT_SECONDS_PER_KWH
+                    for location, total in self._locations.items()}
+
+    def window_energy(self, device_id: str, start: float, end: Optional[float] = None) -> float:
+        """kWh used by a device between two epoch timestamps, from its recorded history"""
+        if self.history is None:
+            raise ValueError("Window queries need a HistoryStore")
+        end = time.time() if end is None else end
+        meter = self._meters.get(device_id)
+        device_type = meter.device_type if meter is not None else ""
+        if end <= start or meter is None:
+            return 0.0
+
+        state = {attribute: self.history.value_at(device_id, attribute, start)
+                 for attribute in POWER_ATTRIBUTES}
+        changes = sorted((timestamp, attribute, value) for attribute in POWER_ATTRIBUTES
+                         for timestamp, value in self.history.query(device_id, attribute, start, end))
+        watt_seconds = 0.0
+        previous = start
+        power = self.power_model(device_type, state)
+        for timestamp, attribute, value in changes:
+            watt_seconds += power * (timestamp - previous)
+            state[attribute] = value
+            power = self.power_model(device_type, state)
+            previous = timestamp
+        watt_seconds += power * (end - previous)
+        return watt_seconds / WATT_SECONDS_PER_KWH
+
+    def window_location_energy(self, location: str, start: float, end: Optional[float] = None) -> float:
+        """kWh used by the devices currently in a location between two epoch timestamps"""
+        key = location.lower()
+        device_ids = [device_id for device_id, meter in list(self._meters.items())
+                      if meter.location.lower() == key]
+        return sum(self.window_energy(device_id, start, end) for device_id in device_ids)
+
+    def window_home_energy(self, start: float, end: Optional[float] = None) -> float:
+        """kWh used by all current devices between two epoch timestamps"""
+        return sum(self.window_energy(device_id, start, end) for device_id in list(self._meters))
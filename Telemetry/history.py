@@ -0,0 +1,400 @@
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Devices.device_manager import DeviceManager
+from Devices.events import DeviceEvent, Subscription
+
+# Attributes recorded by default; names and locations are not telemetry
+DEFAULT_ATTRIBUTES = ("status", "brightness", "temperature", "mode", "locked")
+
+# How a series encodes its values as doubles
+NUMBER, BOOL, SYMBOL = "number", "bool", "symbol"
+
+
+def state_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate a device record ("ON", "LOCKED", ...) into change-style values"""
+    state = dict(record)
+    status = record.get("status")
+    if status is not None:
+        state["status"] = status in ("ON", "LOCKED")
+        if status in ("LOCKED", "UNLOCKED"):
+            state["locked"] = state["status"]
+    return state
+
+
+class Bucket(NamedTuple):
+    """Downsampled samples whose timestamps fall in [start, start + width)"""
+    start: float
+    count: int
+    min: float
+    max: float
+    avg: float
+
+
+class TimeSeries:
+    """Timestamps and values of one device attribute, stored as two double columns
+
+    New samples are appended to an in-memory tail of at most ``capacity``
+    samples. When the tail fills up, its older half is either appended to
+    the series' column files on disk (``<path>.t`` and ``<path>.v``) or, for
+    memory-only series, discarded. Spilled samples are read back through
+    mmap without copying the files.
+
+    Not thread-safe; HistoryStore serializes access.
+    """
+    __slots__ = ('kind', 'capacity', 'path', '_times', '_values', '_disk_count', '_mapped')
+
+    def __init__(self, kind: str, capacity: int, path: Optional[str] = None):
+        self.kind = kind
+        self.capacity = max(2, capacity)
+        self.path = path
+        self._times = array('d')
+        self._values = array('d')
+        self._disk_count = 0
+        self._mapped = None  # (mmaps, time view, value view) while mapped
+        if path is not None:
+            sizes = [os.path.getsize(path + suffix) if os.path.exists(path + suffix) else 0
+                     for suffix in ('.t', '.v')]
+            # A crash between the two column writes leaves one column longer
+            self._disk_count = min(sizes) // 8
+
+    def __len__(self) -> int:
+        return self._disk_count + len(self._times)
+
+    def append(self, timestamp: float, value: float) -> bool:
+        """Add a sample; returns True when this moved older samples out of memory"""
+        self._times.append(timestamp)
+        self._values.append(value)
+        if len(self._times) >= self.capacity:
+            self._spill(self.capacity // 2)
+            return True
+        return False
+
+    def _spill(self, count: int):
+        """Move the oldest count in-memory samples to disk, or drop them"""
+        if self.path is not None:
+            self._unmap()
+            for suffix, column in (('.t', self._times), ('.v', self._values)):
+                with open(self.path + suffix, 'r+b' if os.path.exists(self.path + suffix) else 'wb') as f:
+                    # Overwrite any torn tail left past the last complete sample
+                    f.seek(self._disk_count * 8)
+                    column[:count].tofile(f)
+                    f.truncate()
+            self._disk_count += count
+        del self._times[:count]
+        del self._values[:count]
+
+    def flush(self):
+        """Write the whole in-memory tail to disk"""
+        if self.path is not None and self._times:
+            self._spill(len(self._times))
+
+    def _disk_columns(self) -> Tuple[Any, Any]:
+        """Memory-mapped (times, values) views of the spilled samples"""
+        if not self._disk_count:
+            return (), ()
+        if self._mapped is None:
+            maps = []
+            for suffix in ('.t', '.v'):
+                with open(self.path + suffix, 'rb') as f:
+                    maps.append(mmap.mmap(f.fileno(), self._disk_count * 8, access=mmap.ACCESS_READ))
+            views = [memoryview(m).cast('d') for m in maps]
+            self._mapped = (maps, views[0], views[1])
+        return self._mapped[1], self._mapped[2]
+
+    def _unmap(self):
+        if self._mapped is not None:
+            maps, times, values = self._mapped
+            self._mapped = None
+            times.release()
+            values.release()
+            for m in maps:
+                m.close()
+
+    def close(self):
+        self.flush()
+        self._unmap()
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """The most recent (timestamp, value), if any"""
+        if self._times:
+            return self._times[-1], self._values[-1]
+        if self._disk_count:
+            times, values = self._disk_columns()
+            return times[-1], values[-1]
+        return None
+
+    def value_at(self, timestamp: float) -> Optional[float]:
+        """The value in effect at timestamp: the last sample at or before it"""
+        index = bisect_right(self._times, timestamp)
+        if index:
+            return self._values[index - 1]
+        times, values = self._disk_columns()
+        index = bisect_right(times, timestamp)
+        return values[index - 1] if index else None
+
+    def range(self, start: float, end: float) -> Tuple[array, array]:
+        """Copies of the (times, values) columns for start <= t < end"""
+        times_out, values_out = array('d'), array('d')
+        for times, values in (self._disk_columns(), (self._times, self._values)):
+            lo = bisect_left(times, start)
+            hi = bisect_left(times, end, lo)
+            if lo < hi:
+                # Byte views copy both in-memory arrays and mmapped columns in one memcpy
+                times_out.frombytes(memoryview(times[lo:hi]).cast('B'))
+                values_out.frombytes(memoryview(values[lo:hi]).cast('B'))
+        return times_out, values_out
+
+    def aggregate(self, start: float, end: float, width: float) -> List[Bucket]:
+        """Min/max/avg of the samples in each width-second bucket from start to end"""
+        times, values = self.range(start, end)
+        buckets = []
+        lo = 0
+        while lo < len(times):
+            # Jump straight to the bucket holding the next sample, skipping empty ones
+            bucket_start = start + (times[lo] - start) // width * width
+            hi = bisect_left(times, bucket_start + width, lo)
+            chunk = values[lo:hi]
+            buckets.append(Bucket(bucket_start, hi - lo, min(chunk), max(chunk), sum(chunk) / (hi - lo)))
+            lo = hi
+        return buckets
+
+
+class HistoryStore:
+    """Per-device, per-attribute state history fed from the DeviceManager's events
+
+    Each (device_id, attribute) pair gets its own TimeSeries. Values are
+    stored as doubles: booleans as 0/1 and strings such as thermostat modes
+    as codes into a symbol table, decoded again by query().
+
+    With a ``directory`` the history survives restarts: spilled samples live
+    in per-series column files and ``index.json`` records the series kinds
+    and symbol table. Without one only the last ``capacity`` samples of each
+    series are kept.
+
+    Example: "brightness of bedroom_light over the last 24h"
+        history.query("bedroom_light", "brightness", last=24 * 3600)
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, directory: Optional[str] = None, capacity: int = 4096,
+                 attributes: Iterable[str] = DEFAULT_ATTRIBUTES):
+        self.directory = directory
+        self.capacity = capacity
+        self.attributes = frozenset(attributes)
+
+        self._series: Dict[Tuple[str, str], TimeSeries] = {}
+        self._symbols: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self._index_dirty = False
+        self._lock = threading.Lock()
+        self._subscription: Optional[Subscription] = None
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def _series_path(self, device_id: str, attribute: str) -> Optional[str]:
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{quote(device_id, safe='')}.{attribute}")
+
+    def _load_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                index = json.load(f)
+        except Exception as e:
+            print(f"Error loading history index: {e}")
+            return
+        self._symbols = index.get("symbols", [])
+        self._symbol_codes = {symbol: code for code, symbol in enumerate(self._symbols)}
+        for device_id, attribute, kind in index.get("series", []):
+            self._series[(device_id, attribute)] = TimeSeries(
+                kind, self.capacity, self._series_path(device_id, attribute))
+
+    def _save_index(self):
+        """Write the series kinds and symbol table; caller holds the lock"""
+        index = {"symbols": self._symbols,
+                 "series": [[device_id, attribute, series.kind]
+                            for (device_id, attribute), series in self._series.items()]}
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._index_dirty = False
+
+    def _encode(self, value: Any) -> Tuple[str, float]:
+        if value is True or value is False:
+            return BOOL, float(value)
+        if isinstance(value, (int, float)):
+            return NUMBER, float(value)
+        symbol = str(value)
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            self._index_dirty = True
+        return SYMBOL, float(code)
+
+    def _decode(self, kind: str, value: float) -> Any:
+        if kind == BOOL:
+            return value != 0.0
+        if kind == SYMBOL:
+            return self._symbols[int(value)]
+        return value
+
+    def _record(self, device_id: str, attribute: str, value: Any, timestamp: float):
+        """Append one sample; caller holds the lock"""
+        kind, encoded = self._encode(value)
+        key = (device_id, attribute)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = TimeSeries(kind, self.capacity,
+                                                    self._series_path(device_id, attribute))
+            self._index_dirty = True
+        if series.append(timestamp, encoded) and self._index_dirty and self.directory is not None:
+            # Spilled samples must never refer to series or symbols the index lacks
+            self._save_index()
+
+    def record(self, device_id: str, changes: Dict[str, Any], timestamp: Optional[float] = None):
+        """Record the tracked attributes in a change dict"""
+        timestamp = time.time() if timestamp is None else timestamp
+        attributes = self.attributes
+        with self._lock:
+            for attribute, value in changes.items():
+                if attribute in attributes:
+                    self._record(device_id, attribute, value, timestamp)
+
+    def handle_events(self, events: List[DeviceEvent]):
+        """Record a batch of device events"""
+        attributes = self.attributes
+        with self._lock:
+            for event in events:
+                changes = event.changes
+                if event.kind == "added":
+                    changes = state_from_record(changes)
+                elif event.kind != "changed":
+                    continue
+                for attribute, value in changes.items():
+                    if attribute in attributes:
+                        self._record(event.device_id, attribute, value, event.timestamp)
+
+    def record_snapshot(self, devices: Iterable, timestamp: Optional[float] = None):
+        """Record the current state of devices wherever it differs from the latest sample"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for device in devices:
+                state = state_from_record(device.to_record())
+                for attribute in self.attributes.intersection(state):
+                    series = self._series.get((device.device_id, attribute))
+                    latest = series.latest() if series is not None else None
+                    kind, encoded = self._encode(state[attribute])
+                    if latest is None or latest[1] != encoded:
+                        self._record(device.device_id, attribute, state[attribute], timestamp)
+
+    def attach(self, device_manager: DeviceManager, max_queue: int = 200000):
+        """Record the manager's current device states, then follow its change events"""
+        if self._subscription is not None:
+            return
+        self._subscription = device_manager.events.subscribe(
+            self.handle_events, max_queue=max_queue, batch_size=4096, kinds=("changed", "added"))
+        self.record_snapshot(device_manager.get_all_devices())
+
+    def detach(self):
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+    def series(self, device_id: str, attribute: str) -> Optional[TimeSeries]:
+        """The raw series, for callers that hold the store's lock themselves"""
+        return self._series.get((device_id, attribute))
+
+    def series_keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._series)
+
+    @staticmethod
+    def _window(start: Optional[float], end: Optional[float], last: Optional[float]) -> Tuple[float, float]:
+        end = time.time() if end is None else end
+        if last is not None:
+            start = end - last
+        return (float('-inf') if start is None else start), end
+
+    def query(self, device_id: str, attribute: str, start: Optional[float] = None,
+              end: Optional[float] = None, last: Optional[float] = None) -> List[Tuple[float, Any]]:
+        """
+        (timestamp, value) samples in [start, end), or in the last `last` seconds before end
+        end defaults to now; values are decoded back to bools and strings.
+        """
+        start, end = self._window(start, end, last)
+        with self._lock:
+            series = self._series.get((device_id, attribute))
+            if series is None:
+                return []
+            times, values = series.range(start, end)
+            if series.kind == NUMBER:
+                return list(zip(times, values))
+            return [(t, self._decode(series.kind, v)) for t, v in zip(times, values)]
+
+    def value_at(self, device_id: str, attribute: str, timestamp: float) -> Any:
+        """The decoded value of an attribute at a point in time, or None if unknown"""
+        with self._lock:
+            series = self._series.get((device_id, attribute))
+            if series is None:
+                return None
+            value = series.value_at(timestamp)
+            return None if value is None else self._decode(series.kind, value)
+
+    def aggregate(self, device_id: str, attribute: str, width: float, start: Optional[float] = None,
+                  end: Optional[float] = None, last: Optional[float] = None) -> List[Bucket]:
+        """Downsample a numeric or boolean attribute into min/max/avg buckets of width seconds"""
+        start, end = self._window(start, end, last)
+        with self._lock:
+            series = self._series.get((device_id, attribute))
+            if series is None:
+                return []
+            if series.kind == SYMBOL:
+                raise ValueError(f"Cannot aggregate symbolic attribute {attribute}")
+            if start == float('-inf'):
+                first = series.range(start, end)[0]
+                if not first:
+                    return []
+                start = first[0]
+            return series.aggregate(start, end, width)
+
+    def flush(self):
+        """Write every in-memory tail and the index to disk"""
+        if self.directory is None:
+            return
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+            self._save_index()
+
+    def close(self):
+        """Stop following events and persist everything recorded so far"""
+        self.detach()
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            if self.directory is not None:
+                self._save_index()
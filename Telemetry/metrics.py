@@ -0,0 +1,305 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import get_ident
+from typing import Any, Dict, List, Tuple
+
+# Latency bucket upper bounds in seconds: 1 us to about 16 s, doubling
+LATENCY_BUCKETS = tuple(1e-6 * 2 ** i for i in range(25))
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Counter:
+    """Monotonic count, sharded per thread so increments take no lock
+
+    Each thread only ever writes its own shard; reading sums the shards.
+    """
+    __slots__ = ('name', '_shards')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._shards: Dict[int, List[float]] = {}
+
+    def inc(self, amount: float = 1):
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._shards[get_ident()] = [0]
+        shard[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+    def reset(self):
+        self._shards = {}
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, sharded per thread like Counter
+
+    A shard holds one count per bucket plus an overflow count, then the sum
+    and the maximum of the values it observed.
+    """
+    __slots__ = ('name', 'bounds', '_shards')
+
+    def __init__(self, name: str, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.bounds = bounds
+        self._shards: Dict[int, List[float]] = {}
+
+    def observe(self, value: float):
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._shards[get_ident()] = [0] * (len(self.bounds) + 1) + [0.0, 0.0]
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-2] += value
+        if value > shard[-1]:
+            shard[-1] = value
+
+    def summary(self) -> Dict[str, float]:
+        """count, sum, mean, max and bucket-resolution quantiles (p50, p90, p99)"""
+        buckets = len(self.bounds) + 1
+        counts = [0] * buckets
+        total = maximum = 0.0
+        for shard in list(self._shards.values()):
+            for i in range(buckets):
+                counts[i] += shard[i]
+            total += shard[-2]
+            maximum = max(maximum, shard[-1])
+
+        count = sum(counts)
+        summary = {"count": count, "sum": total, "mean": total / count if count else 0.0, "max": maximum}
+        for quantile in QUANTILES:
+            summary[f"p{round(quantile * 100)}"] = self._quantile(counts, count, quantile, maximum)
+        return summary
+
+    def _quantile(self, counts: List[int], count: int, quantile: float, maximum: float) -> float:
+        """Upper bound of the bucket holding the quantile, capped at the maximum"""
+        if not count:
+            return 0.0
+        rank = quantile * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.bounds[i], maximum) if i < len(self.bounds) else maximum
+        return maximum
+
+    def reset(self):
+        self._shards = {}
+
+
+class Metrics:
+    """Named counters and histograms, switched off unless enabled
+
+    Instrumented code checks ``enabled`` before doing anything else, so
+    disabled instrumentation costs one attribute lookup:
+
+        start = time.perf_counter() if metrics.enabled else None
+        ...
+        if start is not None:
+            LOAD_SECONDS.observe(time.perf_counter() - start)
+
+    Metric objects are created once (usually at import) and kept; creation
+    takes a lock, recording never does.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter(name))
+        return counter
+
+    def histogram(self, name: str, bounds: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name, bounds))
+        return histogram
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Zero every metric"""
+        for metric in list(self._counters.values()) + list(self._histograms.values()):
+            metric.reset()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every metric as plain JSON-ready values"""
+        return {
+            "timestamp": time.time(),
+            "enabled": self.enabled,
+            "counters": {name: counter.value for name, counter in sorted(self._counters.items())},
+            "histograms": {name: histogram.summary() for name, histogram in sorted(self._histograms.items())},
+        }
+
+    def to_text(self) -> str:
+        """Every metric as one "name value" line each, in Prometheus text style"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{_text_name(name)} {value}")
+        for name, summary in snapshot["histograms"].items():
+            base = _text_name(name)
+            for quantile in QUANTILES:
+                lines.append(f'{base}{{quantile="{quantile}"}} {summary[f"p{round(quantile * 100)}"]}')
+            lines.append(f"{base}_sum {summary['sum']}")
+            lines.append(f"{base}_count {summary['count']}")
+            lines.append(f"{base}_max {summary['max']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str):
+        """Atomically write the snapshot to path"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _text_name(name: str) -> str:
+    return name.replace('.', '_').replace('-', '_')
+
+
+# The process-wide registry; SMART_HOME_METRICS=1 turns it on at start-up
+metrics = Metrics(enabled=os.environ.get("SMART_HOME_METRICS", "") not in ("", "0"))
+
+
+class MetricsFileExporter:
+    """Rewrites a JSON snapshot of the registry every interval seconds on a daemon thread"""
+
+    def __init__(self, path: str, interval: float = 10.0, registry: Metrics = metrics):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    def start(self) -> 'MetricsFileExporter':
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            self.registry.write_json(self.path)
+        except Exception as e:
+            print(f"Error exporting metrics: {e}")
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.export()
+
+
+def serve_metrics(host: str = "127.0.0.1", port: int = 9464, registry: Metrics = metrics) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics (text) and GET /metrics.json on a daemon thread
+    Call shutdown() on the returned server to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = registry.to_text().encode(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(registry.snapshot()).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood stderr
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_exporters_from_env() -> List[Any]:
+    """
+    Start the exporters requested by SMART_HOME_METRICS_FILE (a JSON path)
+    and SMART_HOME_METRICS_PORT; either one also enables the registry
+    Returns: the started exporters and servers
+    """
+    started = []
+    path = os.environ.get("SMART_HOME_METRICS_FILE")
+    port = os.environ.get("SMART_HOME_METRICS_PORT")
+    if path:
+        metrics.enable()
+        started.append(MetricsFileExporter(path).start())
+    if port:
+        metrics.enable()
+        try:
+            started.append(serve_metrics(port=int(port)))
+        except (OSError, ValueError) as e:
+            print(f"Error starting metrics endpoint: {e}")
+    return started
+
+
+class TkLagMonitor:
+    """Measures how late Tk runs a root.after timer, i.e. event-loop lag
+
+    A timer is scheduled every interval_ms and the delay beyond that is
+    recorded in the gui.event_loop_lag_seconds histogram. Lag shows how long
+    the window could not react to input.
+    """
+
+    def __init__(self, root, interval_ms: int = 100, registry: Metrics = metrics):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.registry = registry
+        self.histogram = registry.histogram("gui.event_loop_lag_seconds")
+        self._expected = 0.0
+        self._after_id = None
+
+    def start(self) -> 'TkLagMonitor':
+        self._schedule()
+        return self
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        if self.registry.enabled:
+            self.histogram.observe(max(0.0, time.perf_counter() - self._expected))
+        self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass  # The window is already gone
+            self._after_id = None
@@ -1,12 +1,81 @@
 import json
 import os
 import hashlib
-from typing import Tuple, Optional
+import hmac
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from FileLogic.journal import JournalStore
+from FileLogic.sqlite_store import SqliteStore, TableSchema
+
+USER_TABLE = TableSchema(table="users", key_field="username", columns=("username", "password"))
+
+HASH_SCHEME = "pbkdf2_sha256"
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _hash_pool() -> ThreadPoolExecutor:
+    """Threads for password hashing, shared by every UserAuth
+
+    hashlib runs PBKDF2 without holding the GIL, so threads hash in
+    parallel and the Tk thread stays responsive meanwhile.
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                    thread_name_prefix="password-hash")
+    return _hash_executor
+
+
+def hash_password(password: str, iterations: int) -> str:
+    """Hash password with a fresh salt as pbkdf2_sha256$iterations$salt$hash"""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
 
 class UserAuth:
-    def __init__(self):
-        self.users_file = os.path.join(os.path.dirname(__file__), 'users.json')
-        self._ensure_users_file()
+    """User registration and login backed by an in-memory user table
+
+    The table is loaded once and only reloaded when another writer changed
+    users.json or its journal, so logins do no file reads. Registrations are
+    appended to the journal instead of rewriting users.json; instances and
+    processes sharing the file coordinate through the journal's file lock.
+
+    With backend="sqlite" users live in a WAL-mode SQLite table instead
+    (users_file then defaults to users.db) and the table is reloaded when
+    another connection commits to it.
+
+    Passwords are stored as salted PBKDF2-HMAC-SHA256 hashes. The cost is
+    set per instance with ``iterations``; hashes made with another cost or
+    with the old unsalted SHA-256 still verify and are rehashed on the next
+    successful login. The *_async methods run hashing on a shared thread
+    pool and return a Future of the usual (success, message) result.
+    """
+    # PBKDF2 iterations for new hashes
+    HASH_ITERATIONS = 600_000
+
+    def __init__(self, users_file: Optional[str] = None, backend: str = "json",
+                 iterations: Optional[int] = None):
+        self.iterations = iterations or self.HASH_ITERATIONS
+        # Guards the user table; never held while hashing
+        self._lock = threading.Lock()
+        if backend == "json":
+            self.users_file = users_file or os.path.join(os.path.dirname(__file__), 'users.json')
+            self._ensure_users_file()
+            self._store = JournalStore(self.users_file, key_field='username', value_field='password')
+        elif backend == "sqlite":
+            self.users_file = users_file or os.path.join(os.path.dirname(__file__), 'users.db')
+            self._store = SqliteStore(self.users_file, USER_TABLE)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        self._users: Dict[str, str] = {}
+        self._refresh_users()
 
     def _ensure_users_file(self):
         """Create users.json file if it doesn't exist"""
@@ -14,9 +83,38 @@ class UserAuth:
             with open(self.users_file, 'w') as f:
                 json.dump({}, f)
 
+    def _refresh_users(self):
+        """Reload the user table if another writer changed it since it was read"""
+        if not self._store.changed():
+            return
+        self._users = {record['username']: record['password'] for record in self._store.load()}
+
     def _hash_password(self, password: str) -> str:
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        return hash_password(password, self.iterations)
+
+    @staticmethod
+    def _verify_password(password: str, stored: str) -> bool:
+        """Check password against a stored PBKDF2 or legacy SHA-256 hash"""
+        if '$' not in stored:
+            return hmac.compare_digest(stored.encode(), hashlib.sha256(password.encode()).hexdigest().encode())
+        try:
+            scheme, iterations, salt, digest = stored.split('$')
+            if scheme != HASH_SCHEME:
+                return False
+            candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(candidate.hex(), digest)
+
+    def _needs_rehash(self, stored: str) -> bool:
+        return not stored.startswith(f"{HASH_SCHEME}${self.iterations}$")
+
+    def _store_password(self, username: str, hashed_password: str):
+        """Persist a user's hash; caller holds the lock"""
+        # The store notes whether anyone else wrote before this append, in
+        # which case the next _refresh_users reloads
+        self._store.put({'username': username, 'password': hashed_password})
+        self._users[username] = hashed_password
 
     def register_user(self, username: str, password: str) -> Tuple[bool, str]:
         """
@@ -29,17 +127,18 @@ class UserAuth:
         if len(password) < 6:
             return False, "Password must be at least 6 characters long"
 
-        with open(self.users_file, 'r') as f:
-            users = json.load(f)
-
-        if username in users:
-            return False, "Username already exists"
+        with self._lock:
+            self._refresh_users()
+            if username in self._users:
+                return False, "Username already exists"
 
         hashed_password = self._hash_password(password)
-        users[username] = hashed_password
-
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=4)
+        with self._lock:
+            # Someone may have taken the name while we were hashing
+            self._refresh_users()
+            if username in self._users:
+                return False, "Username already exists"
+            self._store_password(username, hashed_password)
 
         return True, "Registration successful"
 
@@ -51,14 +150,31 @@ class UserAuth:
         if not username or not password:
             return False, "Username and password cannot be empty"
 
-        with open(self.users_file, 'r') as f:
-            users = json.load(f)
-
-        if username not in users:
+        with self._lock:
+            self._refresh_users()
+            stored = self._users.get(username)
+        if stored is None:
             return False, "User not found"
 
-        hashed_password = self._hash_password(password)
-        if users[username] != hashed_password:
+        if not self._verify_password(password, stored):
             return False, "Invalid password"
 
-        return True, "Login successful" 
\ No newline at end of file
+        if self._needs_rehash(stored):
+            upgraded = self._hash_password(password)
+            with self._lock:
+                # Skip the upgrade if the password changed meanwhile
+                if self._users.get(username) == stored:
+                    try:
+                        self._store_password(username, upgraded)
+                    except Exception as e:
+                        print(f"Error upgrading password hash for {username}: {e}")
+
+        return True, "Login successful"
+
+    def register_user_async(self, username: str, password: str) -> Future:
+        """register_user() on the hashing pool; the Future holds (success, message)"""
+        return _hash_pool().submit(self.register_user, username, password)
+
+    def login_user_async(self, username: str, password: str) -> Future:
+        """login_user() on the hashing pool; the Future holds (success, message)"""
+        return _hash_pool().submit(self.login_user, username, password)
@@ -0,0 +1 @@
+"""Benchmarks package for measuring smart home performance"""
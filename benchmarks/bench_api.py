@@ -0,0 +1,124 @@
+"""API server request throughput and WebSocket fan-out
+
+Starts an ApiServer on localhost for an isolated fleet, then:
+- issues keep-alive GET /devices/<id> and batched POST /commands requests
+  from CONNECTIONS concurrent connections and reports requests per second;
+- connects each of SUBSCRIBER_COUNTS WebSocket subscribers, changes a
+  device and reports how long until every subscriber has the event.
+
+Run with: python -m benchmarks.bench_api
+"""
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import format_seconds
+from Api.server import ApiServer
+from Api.websocket import MessageReader, new_key
+from Devices.device_manager import DeviceManager
+
+DEVICES = 1_000
+CONNECTIONS = 32
+REQUESTS_PER_CONNECTION = 300
+BATCH = 50
+SUBSCRIBER_COUNTS = (100, 1_000, 5_000)
+ROUNDS = 5
+
+
+async def http_client(host: str, port: int, requests: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    for request in requests:
+        writer.write(request)
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+        await reader.readexactly(length)
+    writer.close()
+
+
+def get_request(path: str) -> bytes:
+    return f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode()
+
+
+def post_request(path: str, payload) -> bytes:
+    body = json.dumps(payload).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def bench_http(host: str, port: int):
+    gets = [[get_request(f"/devices/light_{(c * 7 + i) % DEVICES}") for i in range(REQUESTS_PER_CONNECTION)]
+            for c in range(CONNECTIONS)]
+    start = time.perf_counter()
+    await asyncio.gather(*(http_client(host, port, requests) for requests in gets))
+    elapsed = time.perf_counter() - start
+    print(f"GET /devices/<id>: {CONNECTIONS * REQUESTS_PER_CONNECTION / elapsed:,.0f} req/s "
+          f"over {CONNECTIONS} connections")
+
+    batch = [{"device_id": f"light_{i}", "action": "set_brightness", "args": [i % 100]} for i in range(BATCH)]
+    posts = [[post_request("/commands", batch)] * (REQUESTS_PER_CONNECTION // 10) for _ in range(CONNECTIONS)]
+    start = time.perf_counter()
+    await asyncio.gather(*(http_client(host, port, requests) for requests in posts))
+    elapsed = time.perf_counter() - start
+    commands = CONNECTIONS * (REQUESTS_PER_CONNECTION // 10) * BATCH
+    print(f"POST /commands ({BATCH} per batch): {commands / elapsed:,.0f} commands/s")
+
+
+async def ws_subscriber(host: str, port: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /ws HTTP/1.1\r\nHost: bench\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 f"Sec-WebSocket-Key: {new_key()}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    await reader.readuntil(b'\r\n\r\n')
+    messages = MessageReader(reader)
+    await messages.read()  # Snapshot
+    return messages, writer
+
+
+async def bench_websocket(host: str, port: int, manager, subscribers: int):
+    clients = []
+    for start in range(0, subscribers, 500):
+        clients.extend(await asyncio.gather(*(ws_subscriber(host, port)
+                                              for _ in range(min(500, subscribers - start)))))
+    device = manager.get_device("light_0")
+    latencies = []
+    loop = asyncio.get_running_loop()
+    for round_number in range(ROUNDS):
+        sent = time.perf_counter()
+        await loop.run_in_executor(None, device.set_brightness, round_number + 1)
+        await asyncio.gather(*(messages.read() for messages, _ in clients))
+        latencies.append(time.perf_counter() - sent)
+    for _, writer in clients:
+        writer.close()
+    latencies.sort()
+    print(f"{subscribers:>6} subscribers: all notified in {format_seconds(latencies[len(latencies) // 2])} "
+          f"(median), {format_seconds(latencies[-1])} (max)")
+
+
+async def run(server: ApiServer, manager):
+    host, port = server.address
+    await bench_http(host, port)
+    for subscribers in SUBSCRIBER_COUNTS:
+        await bench_websocket(host, port, manager, subscribers)
+        await asyncio.sleep(0.2)  # Let the server drop the closed connections
+
+
+def main():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = max(SUBSCRIBER_COUNTS) * 2 + 1000
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        manager.add_devices([("light", f"light_{i}", f"Light {i}", f"Room {i % 20}") for i in range(DEVICES)])
+        server = ApiServer(manager, port=0).start_in_thread()
+        try:
+            asyncio.run(run(server, manager))
+        finally:
+            server.stop_thread()
+            manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""UserAuth login/register latency with a large user table
+
+Compares the in-memory UserAuth against the previous behaviour of
+re-reading (and for registrations rewriting) users.json on every call,
+with hashing cost minimized to isolate the table access. Then measures
+logins per second at the default PBKDF2 cost with several concurrent
+attempts on the hashing pool, and how long a login blocks its caller
+(the Tk thread) with login_user vs. login_user_async.
+
+Run with: python -m benchmarks.bench_auth
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import best_of, format_seconds
+from User.user_auth import UserAuth
+
+USERS = 100_000
+PASSWORD = "secret123"
+CONCURRENCY = (1, 4, 16)
+ATTEMPTS = 16
+
+
+def legacy_login(users_file: str, username: str, password: str) -> bool:
+    with open(users_file, 'r') as f:
+        users = json.load(f)
+    return users.get(username) == hashlib.sha256(password.encode()).hexdigest()
+
+
+def legacy_register(users_file: str, username: str, password: str) -> bool:
+    with open(users_file, 'r') as f:
+        users = json.load(f)
+    users[username] = hashlib.sha256(password.encode()).hexdigest()
+    with open(users_file, 'w') as f:
+        json.dump(users, f, indent=4)
+    return True
+
+
+def main():
+    hashed = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    with tempfile.TemporaryDirectory() as tmp:
+        users_file = os.path.join(tmp, 'users.json')
+        legacy_file = os.path.join(tmp, 'legacy_users.json')
+        users = {f"user_{i}": hashed for i in range(USERS)}
+        for path in (users_file, legacy_file):
+            with open(path, 'w') as f:
+                json.dump(users, f, indent=4)
+
+        # One PBKDF2 iteration, so the numbers measure the user table
+        auth = UserAuth(users_file, iterations=1)
+        counter = iter(range(10 ** 9))
+
+        results = [
+            ("login", best_of(lambda: auth.login_user("user_500", PASSWORD), number=1000),
+             best_of(lambda: legacy_login(legacy_file, "user_500", PASSWORD), repeat=3)),
+            ("register", best_of(lambda: auth.register_user(f"new_{next(counter)}", PASSWORD), number=200),
+             best_of(lambda: legacy_register(legacy_file, f"new_{next(counter)}", PASSWORD), repeat=3)),
+        ]
+        print(f"{USERS} users")
+        print(f"{'operation':<10} {'in-memory':>11} {'legacy':>11}")
+        for label, current, legacy in results:
+            print(f"{label:<10} {format_seconds(current)} {format_seconds(legacy)}")
+
+        # Another process registering a user is picked up through mtime/size
+        other = UserAuth(users_file)
+        other.register_user("from_other_process", PASSWORD)
+        print("sees outside registration:", auth.login_user("from_other_process", PASSWORD)[0])
+
+        bench_hashing(users_file)
+
+
+def bench_hashing(users_file: str):
+    auth = UserAuth(users_file)
+    print(f"\nPBKDF2-SHA256 with {auth.iterations:,} iterations, {os.cpu_count()} CPU(s)")
+    # Upgrade the legacy hashes of the users logging in below first
+    for i in range(max(CONCURRENCY)):
+        auth.login_user(f"user_{i}", PASSWORD)
+
+    blocking = best_of(lambda: auth.login_user("user_0", PASSWORD), repeat=3)
+    start = time.perf_counter()
+    future = auth.login_user_async("user_0", PASSWORD)
+    submitted = time.perf_counter() - start
+    future.result()
+    print(f"caller blocked: login_user {format_seconds(blocking)}, login_user_async {format_seconds(submitted)}")
+
+    for concurrency in CONCURRENCY:
+        start = time.perf_counter()
+        futures = [auth.login_user_async(f"user_{i % concurrency}", PASSWORD) for i in range(ATTEMPTS)]
+        assert all(future.result()[0] for future in futures)
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>3} concurrent users: {ATTEMPTS / elapsed:6.1f} logins/s")
+
+
+if __name__ == "__main__":
+    main()
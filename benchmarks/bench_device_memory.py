@@ -0,0 +1,86 @@
+"""Device memory footprint and serialization throughput
+
+Compares the current __slots__ devices with cached records against a copy
+of the previous dict-based Light that rebuilt its status dict on every call.
+
+Run with: python -m benchmarks.bench_device_memory
+"""
+import gc
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.common import best_of, format_seconds
+from Devices.device import Light
+
+COUNT = 100_000
+SAVES = 5
+
+
+class LegacyLight:
+    """Pre-__slots__ Light: per-instance __dict__, datetime, no cache"""
+    def __init__(self, device_id: str, name: str, location: str, brightness: int = 100):
+        self._device_id = device_id
+        self._name = name
+        self._location = location
+        self._status = False
+        self._last_updated = datetime.now()
+        self._brightness = brightness
+
+    def get_status_details(self):
+        return {
+            "device_id": self._device_id,
+            "name": self._name,
+            "location": self._location,
+            "status": "ON" if self._status else "OFF",
+            "brightness": self._brightness,
+            "last_updated": self._last_updated.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+
+def legacy_record(device):
+    record = device.get_status_details()
+    record['type'] = 'light'
+    return record
+
+
+def measure_memory(factory) -> float:
+    """Return bytes allocated per device object, excluding its strings"""
+    names = [(f"light_{i}", f"Light {i}", f"Room {i % 500}") for i in range(COUNT)]
+    gc.collect()
+    tracemalloc.start()
+    devices = [factory(*args) for args in names]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del devices
+    return current / COUNT
+
+
+def measure_saves(devices, serialize) -> float:
+    """Return seconds per full serialization pass when one device in 100 changes"""
+    def save_pass():
+        for i in range(0, len(devices), 100):
+            devices[i]._status = not devices[i]._status
+            if hasattr(devices[i], 'update_timestamp'):
+                devices[i].update_timestamp()
+        return [serialize(device) for device in devices]
+
+    save_pass()
+    return best_of(save_pass, repeat=SAVES)
+
+
+def main():
+    legacy_bytes = measure_memory(LegacyLight)
+    slots_bytes = measure_memory(Light)
+    print(f"memory per device  legacy {legacy_bytes:7.0f} B   slots {slots_bytes:7.0f} B"
+          f"   ({legacy_bytes / slots_bytes:.2f}x)")
+
+    legacy = [LegacyLight(f"light_{i}", f"Light {i}", "Room") for i in range(COUNT)]
+    current = [Light(f"light_{i}", f"Light {i}", "Room") for i in range(COUNT)]
+    legacy_time = measure_saves(legacy, legacy_record)
+    current_time = measure_saves(current, Light.to_record)
+    print(f"save pass ({COUNT} devices)  legacy {format_seconds(legacy_time)}"
+          f"   cached {format_seconds(current_time)}   ({legacy_time / current_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
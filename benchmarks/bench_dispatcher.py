@@ -0,0 +1,82 @@
+"""Command dispatcher isolation: a slow device must not delay the others
+
+A fake backend makes one light take SLOW_DELAY seconds per command while
+the rest respond instantly. Commands for the fast lights should complete in
+milliseconds even while the slow light's queue is still draining.
+
+Run with: python -m benchmarks.bench_dispatcher
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import format_seconds
+from Devices.device import Light
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+
+SLOW_DELAY = 0.5
+FAST_DEVICES = 50
+SLOW_COMMANDS = 4
+
+
+class SlowLight(Light):
+    """Fake device backend whose every command blocks for a fixed delay"""
+    __slots__ = ('delay',)
+
+    def __init__(self, *args, delay: float = SLOW_DELAY, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+
+    def turn_on(self) -> bool:
+        time.sleep(self.delay)
+        return super().turn_on()
+
+    def set_brightness(self, level: int) -> bool:
+        time.sleep(self.delay)
+        return super().set_brightness(level)
+
+
+def wait_for(dispatcher: CommandDispatcher, command_ids, timeout: float = 30.0):
+    """Poll until every command finished; return completion time per command"""
+    pending = set(command_ids)
+    finished = {}
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        for result in dispatcher.poll():
+            if result.command_id in pending:
+                pending.discard(result.command_id)
+                finished[result.command_id] = (time.perf_counter(), result)
+        time.sleep(0.001)
+    return finished
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        manager._device_types["slowlight"] = SlowLight
+        manager.add_device("slowlight", "slow_light", "Slow Light", "Garage")
+        manager.add_devices([("light", f"light_{i}", f"Light {i}", "Hall") for i in range(FAST_DEVICES)])
+
+        dispatcher = CommandDispatcher(manager, max_workers=4)
+        start = time.perf_counter()
+        slow_ids = [dispatcher.submit("slow_light", "set_brightness", level)
+                    for level in range(10, 10 + SLOW_COMMANDS)]
+        fast_ids = [dispatcher.submit(f"light_{i}", "turn_on") for i in range(FAST_DEVICES)]
+        finished = wait_for(dispatcher, slow_ids + fast_ids)
+
+        fast_done = max(finished[i][0] for i in fast_ids) - start
+        slow_done = max(finished[i][0] for i in slow_ids) - start
+        slow_levels = [finished[i][1].success for i in slow_ids]
+        print(f"{FAST_DEVICES} fast commands done after {format_seconds(fast_done)}")
+        print(f"{SLOW_COMMANDS} slow commands done after {format_seconds(slow_done)}"
+              f" (expected >= {SLOW_DELAY * SLOW_COMMANDS:.1f} s, all ok: {all(slow_levels)})")
+        print(f"slow light brightness: {manager.get_device('slow_light').brightness}"
+              f" (last submitted {10 + SLOW_COMMANDS - 1})")
+
+        dispatcher.shutdown()
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
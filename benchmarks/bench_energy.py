@@ -0,0 +1,77 @@
+"""Energy meter update and read costs
+
+Meters DEVICES synthetic devices spread over LOCATIONS rooms, feeds EVENTS
+state changes through EnergyMeter.handle_events, then times reading the
+live home and per-location totals and an hour-long window computed from
+recorded history.
+
+Run with: python -m benchmarks.bench_energy
+"""
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import best_of, format_seconds
+from Devices.device_manager import DeviceManager
+from Devices.events import DeviceEvent
+from Telemetry.energy import EnergyMeter
+from Telemetry.history import HistoryStore
+
+DEVICES = 10_000
+LOCATIONS = 50
+EVENTS = 500_000
+BATCH = 4096
+
+
+def main():
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        history = HistoryStore()
+        meter = EnergyMeter(manager, history)
+
+        start = time.time() - 3600
+        added = []
+        for i in range(DEVICES):
+            device_type = ("light", "thermostat", "smartlock")[i % 3]
+            record = {"type": device_type, "location": f"Room {i % LOCATIONS}", "status": "OFF",
+                      "brightness": 100, "temperature": 21.0, "mode": "OFF"}
+            added.append(DeviceEvent("added", f"device_{i}", record, start))
+        meter.handle_events(added)
+        history.handle_events(added)
+
+        events = []
+        for n in range(EVENTS):
+            i = rng.randrange(DEVICES)
+            if i % 3 == 1:
+                changes = rng.choice(({"status": True, "mode": "HEAT"}, {"status": False, "mode": "OFF"},
+                                      {"temperature": rng.randrange(16, 26)}))
+            else:
+                changes = rng.choice(({"status": True}, {"status": False}, {"brightness": rng.randrange(101)}))
+            events.append(DeviceEvent("changed", f"device_{i}", changes, start + n * 3600 / EVENTS))
+        batches = [events[i:i + BATCH] for i in range(0, len(events), BATCH)]
+
+        began = time.perf_counter()
+        for batch in batches:
+            meter.handle_events(batch)
+        elapsed = time.perf_counter() - began
+        for batch in batches:
+            history.handle_events(batch)
+
+        end = start + 3600
+        running = meter.home_energy()
+        windowed = meter.window_home_energy(start, end)
+        print(f"update: {EVENTS / elapsed:,.0f} events/s across {DEVICES} devices")
+        print(f"home total: {format_seconds(best_of(meter.home_energy, number=1000))} "
+              f"({running:.2f} kWh live, {windowed:.2f} kWh for the replayed hour)")
+        print(f"all {LOCATIONS} locations: {format_seconds(best_of(meter.location_energies, number=100))}")
+        print(f"1h window, one device: "
+              f"{format_seconds(best_of(lambda: meter.window_energy('device_1', start, end), number=100))}")
+        print(f"1h window, whole home from history: "
+              f"{format_seconds(best_of(lambda: meter.window_home_energy(start, end), repeat=1))}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Telemetry history ingest rate and query latency
+
+Feeds synthetic change events for DEVICES devices into a disk-backed
+HistoryStore in event-bus sized batches and reports events per second,
+then times a 24h range query and an hourly min/max/avg downsample on one
+device holding a week of once-a-second samples.
+
+Run with: python -m benchmarks.bench_history
+"""
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import best_of, format_seconds
+from Devices.events import DeviceEvent
+from Telemetry.history import HistoryStore
+
+DEVICES = 1_000
+EVENTS = 1_000_000
+BATCH = 4096
+WEEK = 7 * 24 * 3600
+
+
+def synthetic_events(count: int, rng: random.Random, start: float):
+    for i in range(count):
+        device = rng.randrange(DEVICES)
+        kind = device % 3
+        if kind == 0:
+            changes = {"brightness": rng.randrange(101)}
+        elif kind == 1:
+            changes = {"status": rng.random() < 0.5, "mode": rng.choice(("HEAT", "COOL", "OFF"))}
+        else:
+            changes = {"temperature": 18 + rng.random() * 6}
+        yield DeviceEvent("changed", f"device_{device}", changes, start + i * 0.001)
+
+
+def main():
+    rng = random.Random(42)
+    start = time.time() - EVENTS * 0.001
+    events = list(synthetic_events(EVENTS, rng, start))
+    batches = [events[i:i + BATCH] for i in range(0, len(events), BATCH)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = HistoryStore(os.path.join(tmp, 'history'))
+        began = time.perf_counter()
+        for batch in batches:
+            history.handle_events(batch)
+        elapsed = time.perf_counter() - began
+        history.close()
+        print(f"ingest: {EVENTS / elapsed:,.0f} events/s ({len(history.series_keys())} series, disk-backed)")
+
+        history = HistoryStore(os.path.join(tmp, 'week'))
+        now = time.time()
+        for second in range(WEEK):
+            history.record("bedroom_light", {"brightness": second % 101}, now - WEEK + second)
+        history.flush()
+
+        samples = len(history.query("bedroom_light", "brightness", last=24 * 3600, end=now))
+        query = best_of(lambda: history.query("bedroom_light", "brightness", last=24 * 3600, end=now))
+        buckets = best_of(lambda: history.aggregate("bedroom_light", "brightness", 3600,
+                                                    last=24 * 3600, end=now))
+        print(f"24h range query ({samples} samples of {WEEK}): {format_seconds(query)}")
+        print(f"24h hourly min/max/avg: {format_seconds(buckets)}")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Multi-home throughput: one process vs. homes sharded over worker processes
+
+Creates HOMES homes of DEVICES_PER_HOME devices, then runs ROUNDS bulk
+brightness changes on every home, first through an in-process
+HomeRegistry and then through HomeShardPool with 1, 2, ... cpu_count()
+shards. Sharding only pays off with more than one core.
+
+Run with: python -m benchmarks.bench_homes
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import format_seconds
+from Devices.home_registry import HomeRegistry, HomeShardPool
+
+HOMES = 16
+DEVICES_PER_HOME = 2_000
+ROUNDS = 5
+
+
+def home_ids():
+    return [f"home_{h}" for h in range(HOMES)]
+
+
+def populate(root: str):
+    registry = HomeRegistry(root)
+    for home_id in home_ids():
+        registry.get(home_id).add_devices([("light", f"light_{i}", f"Light {i}", f"Room {i % 20}")
+                                           for i in range(DEVICES_PER_HOME)])
+    registry.close()
+
+
+def run_local(root: str) -> float:
+    registry = HomeRegistry(root)
+    for home_id in home_ids():
+        registry.get(home_id)
+    start = time.perf_counter()
+    for level in range(ROUNDS):
+        for home_id in home_ids():
+            registry.get(home_id).apply({"type": "light"}, "set_brightness", level=level)
+    elapsed = time.perf_counter() - start
+    registry.close()
+    return elapsed
+
+
+def run_sharded(root: str, shards: int) -> float:
+    pool = HomeShardPool(shards, root=root)
+    # Load every home and start the workers before timing
+    for future in [pool.submit(home_id, "flush") for home_id in home_ids()]:
+        future.result()
+    start = time.perf_counter()
+    futures = [pool.submit(home_id, "apply", {"type": "light"}, "set_brightness", level=level)
+               for level in range(ROUNDS) for home_id in home_ids()]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+def main():
+    changes = HOMES * DEVICES_PER_HOME * ROUNDS
+    print(f"{HOMES} homes x {DEVICES_PER_HOME} devices, {ROUNDS} bulk updates per home, "
+          f"{os.cpu_count()} CPU(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        populate(tmp)
+        elapsed = run_local(tmp)
+        print(f"{'in-process':<12} {format_seconds(elapsed)}  {changes / elapsed:>10,.0f} changes/s")
+        shards = 1
+        while shards <= (os.cpu_count() or 1):
+            elapsed = run_sharded(tmp, shards)
+            print(f"{shards:>2} shard(s)  {format_seconds(elapsed)}  {changes / elapsed:>10,.0f} changes/s")
+            shards *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""DeviceManager load time at 1k and 100k devices
+
+Writes a snapshot of mixed lights, thermostats and locks and times
+DeviceManager start-up with the previous loader (json.load, constructor
+plus turn_on/turn_off per record, an "added" event per device) against
+the current one (chunked parsing and from_record). Peak traced memory is
+reported from a separate run of each, as tracing slows loading down.
+
+Run with: python -m benchmarks.bench_load
+"""
+import atexit
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import best_of, format_seconds
+from Devices.device_manager import DeviceManager
+
+SIZES = (1_000, 100_000)
+
+
+def write_snapshot(path: str, count: int):
+    records = []
+    for i in range(count):
+        base = {"device_id": f"device_{i}", "name": f"Device {i}", "location": f"Room {i % 50}",
+                "last_updated": "2025-01-01 12:00:00"}
+        kind = i % 3
+        if kind == 0:
+            records.append(dict(base, status="ON", brightness=i % 101, type="light"))
+        elif kind == 1:
+            records.append(dict(base, status="ON", temperature=21, mode="COOL", type="thermostat"))
+        else:
+            records.append(dict(base, status="UNLOCKED", type="smartlock"))
+    with open(path, 'w') as f:
+        json.dump(records, f, separators=(',', ':'))
+
+
+class LegacyLoadManager(DeviceManager):
+    """DeviceManager with the loader used before from_record"""
+
+    def _load_devices(self):
+        for record in self._store.load():
+            device_data = dict(record)
+            device_type = device_data.pop('type')
+            status = device_data.pop('status', 'OFF')
+            device_data.pop('last_updated', None)
+            # The old loader passed mode to Thermostat() and failed on it
+            device_data.pop('mode', None)
+            device = self._device_types[device_type](**device_data)
+            if device_type == "lock":
+                device.turn_on() if status == "LOCKED" else device.turn_off()
+            else:
+                device.turn_on() if status == "ON" else device.turn_off()
+            with self._lock.write():
+                self._register_device(device)
+                self.events.publish("added", device.device_id, device.to_record())
+
+
+def load(base: type, path: str) -> DeviceManager:
+    manager = base.create(path, "json")
+    # Skip the compaction close() would run at exit
+    atexit.unregister(manager.close)
+    return manager
+
+
+def peak_memory(base: type, path: str) -> float:
+    tracemalloc.start()
+    load(base, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    print(f"{'devices':>8} {'legacy':>10} {'current':>10} {'speedup':>8} {'legacy MB':>10} {'current MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SIZES:
+            path = os.path.join(tmp, f'devices_{count}.json')
+            write_snapshot(path, count)
+            assert len(load(DeviceManager, path).get_all_devices()) == count
+
+            legacy = best_of(lambda: load(LegacyLoadManager, path), repeat=3)
+            current = best_of(lambda: load(DeviceManager, path), repeat=3)
+            print(f"{count:>8} {format_seconds(legacy):>10} {format_seconds(current):>10} "
+                  f"{legacy / current:>7.1f}x {peak_memory(LegacyLoadManager, path):>10.1f} "
+                  f"{peak_memory(DeviceManager, path):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cost of the metrics instrumentation
+
+Reports the per-call cost of an instrumented block with metrics disabled
+(one attribute check) and enabled (two clock reads and a histogram
+observation), then CommandDispatcher throughput with metrics off and on.
+
+Run with: python -m benchmarks.bench_metrics
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import best_of
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+from Telemetry.metrics import metrics
+
+CALLS = 200_000
+DEVICES = 100
+COMMANDS = 20_000
+
+HISTOGRAM = metrics.histogram("bench.seconds")
+
+
+def bare():
+    pass
+
+
+def instrumented():
+    start = time.perf_counter() if metrics.enabled else None
+    if start is not None:
+        HISTOGRAM.observe(time.perf_counter() - start)
+
+
+def per_call(func) -> float:
+    def loop():
+        for _ in range(CALLS):
+            func()
+    return best_of(loop, repeat=5) / CALLS
+
+
+def dispatch(dispatcher: CommandDispatcher) -> float:
+    start = time.perf_counter()
+    futures = [dispatcher.execute(f"light_{i % DEVICES}", "set_brightness", i % 100) for i in range(COMMANDS)]
+    for future in futures:
+        future.result()
+    return COMMANDS / (time.perf_counter() - start)
+
+
+def main():
+    metrics.disable()
+    baseline = per_call(bare)
+    disabled = per_call(instrumented)
+    metrics.enable()
+    enabled = per_call(instrumented)
+    print(f"instrumented block: disabled +{(disabled - baseline) * 1e9:.0f} ns, "
+          f"enabled +{(enabled - baseline) * 1e9:.0f} ns per call")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        manager.add_devices([("light", f"light_{i}", f"Light {i}", "Room") for i in range(DEVICES)])
+        dispatcher = CommandDispatcher(manager)
+        for enabled_now in (False, True, False, True):
+            metrics.enabled = enabled_now
+            rate = dispatch(dispatcher)
+            print(f"dispatcher, metrics {'on ' if enabled_now else 'off'}: {rate:10,.0f} commands/s")
+        dispatcher.shutdown()
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Type and location query latency: secondary indexes vs. linear scans
+
+Run with: python -m benchmarks.bench_queries
+"""
+import tempfile
+import os
+from typing import List
+
+from benchmarks.common import best_of, format_seconds
+from Devices.device import Device
+from Devices.device_manager import DeviceManager
+
+SIZES = (100, 10_000, 100_000)
+DEVICES_PER_ROOM = 20
+TYPES = ("light", "thermostat", "lock")
+
+
+def populate(manager, count: int):
+    """Add count devices spread over count / DEVICES_PER_ROOM rooms"""
+    rooms = max(1, count // DEVICES_PER_ROOM)
+    manager._store.compact_threshold = count + 1
+    for i in range(count):
+        manager.add_device(TYPES[i % len(TYPES)], f"device_{i}", f"Device {i}", f"Room {i % rooms}")
+
+
+def scan_by_type(devices: List[Device], device_type: str) -> List[Device]:
+    return [d for d in devices if d.__class__.__name__.lower() == device_type]
+
+
+def scan_by_location(devices: List[Device], location: str) -> List[Device]:
+    return [d for d in devices if d.location.lower() == location.lower()]
+
+
+def main():
+    print(f"{'devices':>8} {'query':<18} {'indexed':>11} {'scan':>11}")
+    for count in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+            populate(manager, count)
+            devices = manager.get_all_devices()
+            number = max(1, 100_000 // count)
+
+            cases = [
+                ("by type",
+                 lambda: manager.get_devices_by_type("thermostat"),
+                 lambda: scan_by_type(devices, "thermostat")),
+                ("by location",
+                 lambda: manager.get_devices_by_location("room 0"),
+                 lambda: scan_by_location(devices, "room 0")),
+                ("type + location",
+                 lambda: manager.get_devices_by_type_and_location("light", "room 0"),
+                 lambda: scan_by_type(scan_by_location(devices, "room 0"), "light")),
+            ]
+            for label, indexed, scan in cases:
+                indexed_time = best_of(indexed, number=number)
+                scan_time = best_of(scan, number=max(1, number // 10))
+                print(f"{count:>8} {label:<18} {format_seconds(indexed_time)} {format_seconds(scan_time)}")
+            manager.close()
+
+
+if __name__ == "__main__":
+    main()
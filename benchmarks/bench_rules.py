@@ -0,0 +1,79 @@
+"""Rules engine evaluation latency with synthetic rule sets
+
+Each rule watches one of DEVICES lights: a mix of equality triggers on
+status/brightness and range triggers on brightness, some with time windows.
+Per-event latency of the indexed engine is compared to scanning every rule.
+
+Run with: python -m benchmarks.bench_rules
+"""
+import os
+import random
+import tempfile
+from datetime import datetime
+
+from benchmarks.common import best_of, format_seconds
+from Automation.rules import Action, OPERATORS, Rule, RulesEngine, TimeWindow, Trigger
+from Devices.device_manager import DeviceManager
+
+DEVICES = 1_000
+RULE_COUNTS = (1_000, 10_000, 100_000)
+EVENTS = 1_000
+
+
+def synthetic_rules(count: int, rng: random.Random):
+    window = TimeWindow.parse("22:00", "06:00")
+    for i in range(count):
+        device_id = f"light_{rng.randrange(DEVICES)}"
+        kind = i % 3
+        if kind == 0:
+            trigger = Trigger(device_id, "status", "==", bool(i % 2))
+        elif kind == 1:
+            trigger = Trigger(device_id, "brightness", "==", rng.randrange(101))
+        else:
+            trigger = Trigger(device_id, "brightness", rng.choice((">", "<")), rng.randrange(101))
+        action = Action(f"light_{rng.randrange(DEVICES)}", "turn_on")
+        yield Rule(f"rule_{i}", trigger, (action,), window if i % 4 == 0 else None)
+
+
+def scan_match(rules, device_id, changes, now):
+    """Reference: test every rule against the event"""
+    matched = []
+    for rule in rules:
+        trigger = rule.trigger
+        if trigger.device_id != device_id or trigger.attribute not in changes:
+            continue
+        if OPERATORS[trigger.op](changes[trigger.attribute], trigger.value):
+            if rule.time_window is None or rule.time_window.contains(now):
+                matched.append(rule)
+    return matched
+
+
+def main():
+    rng = random.Random(42)
+    events = [(f"light_{rng.randrange(DEVICES)}",
+               {"status": True} if rng.random() < 0.5 else {"brightness": rng.randrange(101)})
+              for _ in range(EVENTS)]
+    now = datetime(2025, 1, 1, 23, 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        print(f"{'rules':>8} {'indexed/event':>14} {'scan/event':>12} {'fired':>7}")
+        for count in RULE_COUNTS:
+            rules = list(synthetic_rules(count, rng))
+            engine = RulesEngine(manager)
+            engine.add_rules(rules)
+
+            fired = sum(len(engine.match(device_id, changes, now)) for device_id, changes in events)
+            expected = sum(len(scan_match(rules, device_id, changes, now)) for device_id, changes in events)
+            assert fired == expected, (fired, expected)
+
+            indexed = best_of(lambda: [engine.match(d, c, now) for d, c in events]) / EVENTS
+            scan_events = events[:max(1, EVENTS * 1000 // count)]
+            scan = best_of(lambda: [scan_match(rules, d, c, now) for d, c in scan_events],
+                           repeat=1) / len(scan_events)
+            print(f"{count:>8} {format_seconds(indexed):>14} {format_seconds(scan):>12} {fired:>7}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
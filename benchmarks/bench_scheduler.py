@@ -0,0 +1,72 @@
+"""Scheduler insert, cancel, dispatch and restore costs
+
+Builds schedulers holding up to 300k daily jobs and times adding jobs,
+cancelling half of them, draining due jobs and restoring from disk. Restore
+is compared to recomputing every job's next occurrence from its schedule.
+
+Run with: python -m benchmarks.bench_scheduler
+"""
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import format_seconds
+from Automation.scheduler import Job, Schedule, Scheduler
+from Devices.device_manager import DeviceManager
+
+JOB_COUNTS = (10_000, 100_000, 300_000)
+DUE = 1_000
+
+
+def synthetic_jobs(count: int, rng: random.Random):
+    days = ("daily", "weekdays", "weekends", "mon,wed,fri")
+    for i in range(count):
+        schedule = Schedule.parse(f"{rng.randrange(24):02d}:{rng.randrange(60):02d}", rng.choice(days))
+        yield Job(f"job_{i}", f"light_{i % 100}", rng.choice(("turn_on", "turn_off")), (), schedule)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'jobs':>8} {'add/job':>11} {'cancel/job':>11} {'run/job':>11} "
+          f"{'restore':>11} {'recompute all':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        for i in range(100):
+            manager.add_device('light', f"light_{i}", f"Light {i}", "Bench")
+
+        for count in JOB_COUNTS:
+            jobs_file = os.path.join(tmp, f'schedules_{count}.json')
+            jobs = list(synthetic_jobs(count, rng))
+            scheduler = Scheduler(manager, jobs_file=jobs_file)
+
+            add, _ = timed(lambda: [scheduler.add_job(job) for job in jobs])
+            victims = [job.job_id for job in jobs[::2]]
+            cancel, _ = timed(lambda: [scheduler.cancel(job_id) for job_id in victims])
+
+            # Force the DUE earliest jobs to be due now
+            pending = sorted(scheduler.get_all_jobs(), key=lambda job: job.next_run)
+            run, ran = timed(lambda: scheduler.run_pending(pending[DUE - 1].next_run))
+            assert ran >= DUE, ran
+            scheduler.close()
+
+            restore, restored = timed(lambda: Scheduler(manager, jobs_file=jobs_file))
+            assert len(restored) == count - len(victims)
+            now = time.time()
+            recompute, _ = timed(lambda: [job.schedule.next_after(now) for job in restored.get_all_jobs()])
+            restored.close()
+
+            print(f"{count:>8} {format_seconds(add / count):>11} {format_seconds(cancel / len(victims)):>11} "
+                  f"{format_seconds(run / ran):>11} {format_seconds(restore):>11} "
+                  f"{format_seconds(recompute):>14}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
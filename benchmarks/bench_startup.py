@@ -0,0 +1,89 @@
+"""GUI startup: time-to-first-window and time-to-interactive
+
+Each measurement runs in a fresh interpreter so import costs are included.
+The child shows the login window (first window), waits for the background
+preload, then opens the dashboard for a synthetic fleet and reports when
+the first screenful is drawn (interactive) and when every card exists.
+Progressive card building is compared with building every card up front.
+
+Needs a display; prints a notice and exits otherwise.
+Run with: python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import format_seconds, has_display, parent_dir
+
+FLEET_SIZES = (20, 150, 1_000)
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from Devices.device_manager import DeviceManager
+DeviceManager.DEVICES_FILE = {devices_file!r}
+from GUI.auth_gui import AuthGUI
+
+app = AuthGUI()
+app.root.update()
+first_window = time.perf_counter() - start
+
+while app.preload_seconds is None:
+    app.root.update()
+    time.sleep(0.001)
+
+from GUI.home_page import HomePage
+if {eager!r}:
+    HomePage.FIRST_SCREEN_CARDS = 10 ** 9
+app.root.withdraw()
+login = time.perf_counter()
+home = HomePage("bench")
+home.root.update()
+interactive = time.perf_counter() - login
+while not home.fully_built:
+    home.root.update()
+built = time.perf_counter() - login
+print(json.dumps({{"first_window": first_window, "preload": app.preload_seconds,
+                  "interactive": interactive, "built": built}}))
+home.root.destroy()
+app.root.destroy()
+'''
+
+
+def write_fleet(path: str, count: int):
+    records = [{"type": "light", "device_id": f"light_{i}", "name": f"Light {i}",
+                "location": f"Room {i % 20}", "status": "ON" if i % 2 else "OFF", "brightness": 50}
+               for i in range(count)]
+    with open(path, 'w') as f:
+        json.dump(records, f)
+
+
+def measure(devices_file: str, eager: bool) -> dict:
+    code = CHILD.format(root=parent_dir, devices_file=devices_file, eager=eager)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if not has_display():
+        print("bench_startup skipped: no display available")
+        return
+
+    print(f"{'devices':>8} {'build':>12} {'first window':>13} {'preload':>11} "
+          f"{'interactive':>12} {'all cards':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in FLEET_SIZES:
+            for eager in (True, False):
+                devices_file = os.path.join(tmp, f'devices_{count}_{eager}.json')
+                write_fleet(devices_file, count)
+                result = measure(devices_file, eager)
+                print(f"{count:>8} {'eager' if eager else 'progressive':>12} "
+                      f"{format_seconds(result['first_window']):>13} {format_seconds(result['preload']):>11} "
+                      f"{format_seconds(result['interactive']):>12} {format_seconds(result['built']):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""JSON journal vs. SQLite storage backends
+
+For a fleet of DEVICES devices, compares per backend:
+- DeviceManager start-up (loading every device);
+- journaling a batch of BATCH changed devices (one coalesced flush);
+- adding and removing single devices;
+- reading the stored records of one type in one room without building
+  devices: a SQL query on the indexed columns vs. loading and filtering
+  the JSON store.
+
+Run with: python -m benchmarks.bench_storage
+"""
+import atexit
+import os
+import tempfile
+
+from benchmarks.common import best_of, format_seconds
+from Devices.device_manager import DEVICE_TABLE, DeviceManager
+from FileLogic.journal import JournalStore
+from FileLogic.sqlite_store import SqliteStore
+
+DEVICES = 100_000
+ROOMS = 5_000
+BATCH = 500
+TYPES = ("light", "thermostat", "lock")
+
+
+def open_manager(tmp: str, backend: str) -> DeviceManager:
+    filename = 'devices.db' if backend == "sqlite" else 'devices.json'
+    manager = DeviceManager.create(os.path.join(tmp, filename), backend)
+    atexit.unregister(manager.close)
+    return manager
+
+
+def bench_backend(tmp: str, backend: str):
+    manager = open_manager(tmp, backend)
+    if isinstance(manager._store, JournalStore):
+        manager._store.compact_threshold = DEVICES * 4
+    manager.add_devices([(TYPES[i % 3], f"device_{i}", f"Device {i}", f"Room {i % ROOMS}")
+                         for i in range(DEVICES)])
+    manager.close()
+
+    load = best_of(lambda: open_manager(tmp, backend), repeat=3)
+    manager = open_manager(tmp, backend)
+
+    lights = manager.get_devices_by_type("light")[:BATCH]
+    level = iter(range(10**9))
+
+    def flush_batch():
+        value = next(level) % 100
+        for device in lights:
+            device.set_brightness(value)
+        manager.flush()
+
+    flush = best_of(flush_batch, repeat=5)
+    counter = iter(range(10**9))
+
+    def add_remove():
+        device_id = f"extra_{next(counter)}"
+        manager.add_device("light", device_id, "Extra", "Room 1")
+        manager.remove_device(device_id)
+
+    churn = best_of(add_remove, repeat=5, number=100)
+    manager.close()
+    return load, flush, churn
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {backend: bench_backend(tmp, backend) for backend in ("json", "sqlite")}
+        print(f"{DEVICES:,} devices")
+        print(f"{'':<28} {'json':>11} {'sqlite':>11}")
+        labels = ("load", f"flush {BATCH} changes", "add + remove one device")
+        for position, label in enumerate(labels):
+            print(f"{label:<28} {format_seconds(results['json'][position]):>11} "
+                  f"{format_seconds(results['sqlite'][position]):>11}")
+
+        journal = JournalStore(os.path.join(tmp, 'devices.json'), key_field='device_id')
+        database = SqliteStore(os.path.join(tmp, 'devices.db'), DEVICE_TABLE)
+        scan = best_of(lambda: [record for record in journal.load() if record['type'] == "light"
+                                and record['location'].lower() == "room 3"], repeat=3)
+        query = best_of(lambda: database.select(type="light", location_key="room 3"), repeat=5, number=100)
+        print(f"{'stored lights in one room':<28} {format_seconds(scan):>11} {format_seconds(query):>11}")
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
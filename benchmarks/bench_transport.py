@@ -0,0 +1,67 @@
+"""Load test of DeviceManager commands over simulated device transports
+
+Commands are dispatched through CommandDispatcher while every device talks
+to either the in-process simulator or a SocketTransport connected to a local
+SimulatorServer, both with realistic latency, jitter and failure rate.
+
+Run with: python -m benchmarks.bench_transport
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import format_seconds
+from Devices.device_manager import DeviceManager
+from Devices.dispatcher import CommandDispatcher
+from Devices.transport import LocalSimulatorTransport, SimulatorServer, SocketTransport
+
+DEVICES = 1_000
+COMMANDS = 2_000
+WORKERS = 32
+LATENCY = 0.005
+JITTER = 0.002
+FAILURE_RATE = 0.01
+
+
+def run_load(manager, transport, label: str):
+    manager.set_transport(transport)
+    dispatcher = CommandDispatcher(manager, max_workers=WORKERS)
+    start = time.perf_counter()
+    for i in range(COMMANDS):
+        dispatcher.submit(f"light_{i % DEVICES}", "set_brightness", i % 101)
+
+    done = failed = 0
+    while done < COMMANDS:
+        for result in dispatcher.poll():
+            done += 1
+            failed += not result.success
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    dispatcher.shutdown()
+    print(f"{label:<22} {COMMANDS / elapsed:8.0f} cmd/s   total {format_seconds(elapsed)}"
+          f"   failed {failed} ({failed / COMMANDS:.1%})")
+
+
+def main():
+    print(f"{DEVICES} devices, {COMMANDS} commands, {WORKERS} workers, "
+          f"latency {LATENCY * 1000:.0f}+-{JITTER * 1000:.0f} ms, failure rate {FAILURE_RATE:.0%}")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DeviceManager.create(os.path.join(tmp, 'devices.json'))
+        manager.add_devices([("light", f"light_{i}", f"Light {i}", f"Room {i % 50}") for i in range(DEVICES)])
+
+        run_load(manager, None, "no transport")
+        run_load(manager, LocalSimulatorTransport(LATENCY, JITTER, FAILURE_RATE, seed=1), "local simulator")
+
+        server = SimulatorServer(LocalSimulatorTransport(LATENCY, JITTER, FAILURE_RATE, seed=1)).start()
+        for pool_size in (1, 8, WORKERS):
+            transport = SocketTransport(server.address, pool_size=pool_size)
+            run_load(manager, transport, f"tcp, pool of {pool_size}")
+            transport.close()
+        server.stop()
+
+        manager.set_transport(None)
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
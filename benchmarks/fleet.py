@@ -0,0 +1,75 @@
+"""Synthetic homes for benchmarks: devices spread over locations, plus users
+
+Everything is derived from a seed, so the same arguments always produce
+the same fleet and results can be compared run to run.
+"""
+import json
+import os
+import random
+from typing import Any, Dict, List, NamedTuple
+
+from User.user_auth import hash_password
+
+# Share of each device type in a generated fleet
+DEVICE_MIX = (("light", 0.5), ("thermostat", 0.25), ("smartlock", 0.25))
+THERMOSTAT_MODES = ("HEAT", "COOL", "OFF")
+PASSWORD = "secret123"
+LAST_UPDATED = "2025-01-01 12:00:00"
+
+
+class FleetFiles(NamedTuple):
+    devices_file: str
+    users_file: str
+
+
+def location_names(count: int) -> List[str]:
+    return [f"Room {i}" for i in range(count)]
+
+
+def device_records(count: int, locations: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """count device records, as DeviceManager stores them, over locations rooms"""
+    rng = random.Random(seed)
+    rooms = location_names(max(1, locations))
+    types = rng.choices([device_type for device_type, _ in DEVICE_MIX],
+                        weights=[share for _, share in DEVICE_MIX], k=count)
+    records = []
+    for i, device_type in enumerate(types):
+        record = {"device_id": f"{device_type}_{i}", "name": f"{device_type.title()} {i}",
+                  "location": rooms[i % len(rooms)], "last_updated": LAST_UPDATED, "type": device_type}
+        if device_type == "light":
+            record.update(status=rng.choice(("ON", "OFF")), brightness=rng.randint(0, 100))
+        elif device_type == "thermostat":
+            mode = rng.choice(THERMOSTAT_MODES)
+            record.update(status="OFF" if mode == "OFF" else "ON", temperature=rng.randint(16, 28), mode=mode)
+        else:
+            record.update(status=rng.choice(("LOCKED", "UNLOCKED")))
+        records.append(record)
+    return records
+
+
+def user_table(count: int, iterations: int = 1, password: str = PASSWORD) -> Dict[str, str]:
+    """users.json contents for user_0 ... user_<count-1>, all with password
+
+    The users share one hash, so even a realistic cost is paid only once.
+    """
+    hashed = hash_password(password, iterations)
+    return {f"user_{i}": hashed for i in range(count)}
+
+
+def write_devices(path: str, count: int, locations: int, seed: int = 0) -> str:
+    with open(path, 'w') as f:
+        json.dump(device_records(count, locations, seed), f, separators=(',', ':'))
+    return path
+
+
+def write_users(path: str, count: int, iterations: int = 1) -> str:
+    with open(path, 'w') as f:
+        json.dump(user_table(count, iterations), f, separators=(',', ':'))
+    return path
+
+
+def write_fleet(directory: str, devices: int, locations: int, users: int,
+                seed: int = 0, iterations: int = 1) -> FleetFiles:
+    """Write devices.json and users.json for one synthetic home into directory"""
+    return FleetFiles(write_devices(os.path.join(directory, 'devices.json'), devices, locations, seed),
+                      write_users(os.path.join(directory, 'users.json'), users, iterations))
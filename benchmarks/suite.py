@@ -0,0 +1,360 @@
+"""Reproducible benchmark suite over synthetic homes at several scales
+
+For every scale a seeded fleet is generated (devices spread over rooms,
+plus users) and each case below is timed. Results are printed and
+written as JSON, and can be compared with an earlier run:
+
+    devices.load              DeviceManager start-up on the fleet
+    devices.save              a full snapshot of every device
+    devices.add_remove        add_device then remove_device of one device
+    devices.bulk_add_remove   add_devices then remove_devices of BULK devices
+    queries.by_type           get_devices_by_type
+    queries.by_location       get_devices_by_location
+    queries.by_type_location  get_devices_by_type_and_location
+    auth.login                UserAuth.login_user
+    auth.register             UserAuth.register_user
+    gui.open                  HomePage start-up until every card is built
+    gui.refresh               HomePage.refresh_devices until every card is built
+
+The GUI case runs in a child interpreter and needs a display; without one
+it uses Xvfb when installed and is recorded as skipped otherwise.
+Password hashing runs one PBKDF2 iteration by default so auth cases time
+the user table; pass --hash-iterations to include the real cost.
+
+Run with: python -m benchmarks.suite --scales 1000,10000 --output results.json
+Compare:  python -m benchmarks.suite --output new.json --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.common import format_seconds, has_display, parent_dir
+from benchmarks.fleet import PASSWORD, location_names, write_fleet
+from Devices.device_manager import DEVICE_TABLE, DeviceManager
+from FileLogic.journal import JournalStore
+from FileLogic.migrate import migrate
+from FileLogic.sqlite_store import SqliteStore
+from Telemetry.metrics import metrics
+from User.user_auth import USER_TABLE, UserAuth
+
+DEFAULT_SCALES = (1_000, 10_000)
+# Devices per room and users per device in a generated home
+DEVICES_PER_LOCATION = 50
+USERS_PER_DEVICE = 1
+BULK = 100
+RESULTS_VERSION = 1
+# Cases measured by bench_gui; all are recorded as skipped when it cannot run
+GUI_CASES = ("gui.open", "gui.refresh")
+
+GUI_CHILD = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+from Devices.device_manager import DeviceManager
+DeviceManager.DEVICES_FILE = {devices_file!r}
+DeviceManager.DATABASE_FILE = {devices_file!r}
+DeviceManager.BACKEND = {backend!r}
+from GUI.home_page import HomePage
+
+start = time.perf_counter()
+home = HomePage("bench")
+home.root.withdraw()
+while not home.fully_built:
+    home.root.update()
+opened = time.perf_counter() - start
+
+def refresh():
+    start = time.perf_counter()
+    home.refresh_devices()
+    while not home.fully_built:
+        home.root.update()
+    return time.perf_counter() - start
+
+runs = [refresh() for _ in range({repeat!r})]
+print(json.dumps({{"opened": opened, "runs": runs, "virtualized": home.virtualized}}))
+home.root.destroy()
+'''
+
+
+def measure(func: Callable[[], object], repeat: int = 5, number: int = 1,
+            setup: Optional[Callable[[], object]] = None,
+            teardown: Optional[Callable[[object], object]] = None) -> Dict[str, Any]:
+    """
+    Time func over repeat rounds of number calls each
+    setup runs before every round, outside the timing, and its result is
+    passed to teardown afterwards.
+    Returns: best and mean seconds per call plus every round's time
+    """
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+        if teardown:
+            teardown(state)
+    return {"best": min(runs), "mean": sum(runs) / len(runs), "number": number, "runs": runs}
+
+
+def skipped(reason: str) -> Dict[str, Any]:
+    return {"skipped": reason}
+
+
+def skipped_gui(reason: str) -> Dict[str, Dict[str, Any]]:
+    return {case: skipped(reason) for case in GUI_CASES}
+
+
+def bench_devices(devices_path: str, backend: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    loaded = []
+    results["devices.load"] = measure(
+        lambda: loaded.append(DeviceManager.create(devices_path, backend)),
+        repeat=repeat, teardown=lambda _: loaded.pop().close())
+
+    manager = DeviceManager.create(devices_path, backend)
+    try:
+        results["devices.save"] = measure(manager._save_devices, repeat=repeat)
+
+        def add_remove():
+            manager.add_device("light", "bench_light", "Bench Light", "Bench Room")
+            manager.remove_device("bench_light")
+        results["devices.add_remove"] = measure(add_remove, repeat=repeat, number=50)
+
+        bulk = [("light", f"bulk_{i}", f"Bulk {i}", "Bench Room") for i in range(BULK)]
+        bulk_ids = [item[1] for item in bulk]
+
+        def bulk_add_remove():
+            manager.add_devices(bulk)
+            manager.remove_devices(bulk_ids)
+        results["devices.bulk_add_remove"] = measure(bulk_add_remove, repeat=repeat, number=5)
+
+        device_type, location = "light", location_names(1)[0]
+        results["queries.by_type"] = measure(
+            lambda: manager.get_devices_by_type(device_type), repeat=repeat, number=200)
+        results["queries.by_location"] = measure(
+            lambda: manager.get_devices_by_location(location), repeat=repeat, number=200)
+        results["queries.by_type_location"] = measure(
+            lambda: manager.get_devices_by_type_and_location(device_type, location), repeat=repeat, number=200)
+    finally:
+        manager.close()
+    return results
+
+
+def bench_auth(users_path: str, backend: str, users: int, iterations: int,
+               repeat: int) -> Dict[str, Dict[str, Any]]:
+    auth = UserAuth(users_path, backend=backend, iterations=iterations)
+    username = f"user_{users // 2}"
+    counter = iter(range(10 ** 9))
+    return {
+        "auth.login": measure(lambda: auth.login_user(username, PASSWORD), repeat=repeat, number=20),
+        "auth.register": measure(lambda: auth.register_user(f"new_{next(counter)}", PASSWORD),
+                                 repeat=repeat, number=10),
+    }
+
+
+def start_virtual_display() -> Optional[subprocess.Popen]:
+    """Start Xvfb on a free display number and point DISPLAY at it, if Xvfb is installed"""
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ["DISPLAY"] = f":{number}"
+        for _ in range(50):
+            if has_display():
+                return process
+            time.sleep(0.1)
+        process.terminate()
+    return None
+
+
+def bench_gui(devices_path: str, backend: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    code = GUI_CHILD.format(root=parent_dir, devices_file=devices_path, backend=backend, repeat=repeat)
+    try:
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, timeout=600)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+    except (subprocess.SubprocessError, ValueError, IndexError) as e:
+        return skipped_gui(f"child failed: {e}")
+    runs = result["runs"]
+    return {
+        "gui.open": {"best": result["opened"], "mean": result["opened"], "number": 1,
+                     "runs": [result["opened"]]},
+        "gui.refresh": {"best": min(runs), "mean": sum(runs) / len(runs), "number": 1, "runs": runs,
+                        "virtualized": result["virtualized"]},
+    }
+
+
+def prepare_backend(files, backend: str, directory: str):
+    """Return the devices and users paths for backend, migrating the JSON fleet to SQLite if needed"""
+    if backend == "json":
+        return files.devices_file, files.users_file
+    devices_db = os.path.join(directory, 'devices.db')
+    users_db = os.path.join(directory, 'users.db')
+    jobs = (
+        (JournalStore(files.devices_file, key_field='device_id'), SqliteStore(devices_db, DEVICE_TABLE)),
+        (JournalStore(files.users_file, key_field='username', value_field='password'),
+         SqliteStore(users_db, USER_TABLE)),
+    )
+    for source, target in jobs:
+        success, message = migrate(source, target)
+        target.close()
+        if not success:
+            raise RuntimeError(message)
+    return devices_db, users_db
+
+
+def run_scale(scale: int, args, gui: bool) -> Dict[str, Dict[str, Any]]:
+    locations = max(1, scale // DEVICES_PER_LOCATION)
+    users = max(1, scale * USERS_PER_DEVICE)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_fleet(tmp, scale, locations, users, seed=args.seed, iterations=args.hash_iterations)
+        devices_path, users_path = prepare_backend(files, args.backend, tmp)
+        results = {}
+        results.update(bench_devices(devices_path, args.backend, args.repeat))
+        results.update(bench_auth(users_path, args.backend, users, args.hash_iterations, args.repeat))
+        if gui:
+            results.update(bench_gui(devices_path, args.backend, args.repeat))
+        else:
+            results.update(skipped_gui("no display"))
+        return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=parent_dir, capture_output=True,
+                                text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args) -> Dict[str, Any]:
+    metrics.disable()
+    display = None
+    gui = not args.no_gui and has_display()
+    if not args.no_gui and not gui:
+        display = start_virtual_display()
+        gui = display is not None
+    try:
+        results = []
+        for scale in args.scales:
+            print(f"\n{scale:,} devices")
+            for case, result in run_scale(scale, args, gui).items():
+                results.append({"case": case, "scale": scale, **result})
+                if "skipped" in result:
+                    print(f"  {case:<26} skipped: {result['skipped']}")
+                else:
+                    print(f"  {case:<26} {format_seconds(result['best'])} best  "
+                          f"{format_seconds(result['mean'])} mean")
+    finally:
+        if display is not None:
+            display.terminate()
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": args.backend,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "hash_iterations": args.hash_iterations,
+            "scales": list(args.scales),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print the best time of every case next to the baseline's
+    Returns: the cases slower than baseline by more than threshold (a fraction)
+    """
+    previous = {(result["case"], result["scale"]): result for result in baseline["results"]}
+    regressions = []
+    for field in ("backend", "hash_iterations", "seed"):
+        if baseline["meta"].get(field) != current["meta"][field]:
+            print(f"\nwarning: baseline {field} is {baseline['meta'].get(field)!r}, "
+                  f"this run used {current['meta'][field]!r}")
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp')})")
+    print(f"{'case':<26} {'scale':>8} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for result in current["results"]:
+        key = (result["case"], result["scale"])
+        before = previous.get(key)
+        if before is None:
+            print(f"{key[0]:<26} {key[1]:>8} not in baseline")
+            continue
+        if "skipped" in result or "skipped" in before:
+            print(f"{key[0]:<26} {key[1]:>8} skipped: {result.get('skipped') or before.get('skipped')}")
+            continue
+        ratio = result["best"] / before["best"] if before["best"] else float('inf')
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{key[0]}@{key[1]}")
+        print(f"{key[0]:<26} {key[1]:>8} {format_seconds(before['best'])} "
+              f"{format_seconds(result['best'])} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def parse_scales(value: str) -> List[int]:
+    try:
+        scales = [int(part.replace('_', '')) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a comma-separated list of integers: {value}")
+    if not scales or min(scales) < 1:
+        raise argparse.ArgumentTypeError("scales must be positive")
+    return scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the smart home over synthetic fleets")
+    parser.add_argument('--scales', type=parse_scales, default=list(DEFAULT_SCALES),
+                        help="comma-separated device counts (default: %(default)s)")
+    parser.add_argument('--backend', choices=("json", "sqlite"), default="json")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="timed rounds per case")
+    parser.add_argument('--hash-iterations', type=int, default=1, help="PBKDF2 iterations for users")
+    parser.add_argument('--no-gui', action='store_true', help="skip the HomePage case")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    parser.add_argument('--compare', help="results JSON of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown counted as a regression, as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,13 @@ if current_dir not in sys.path:
     sys.path.append(current_dir)
 
 from GUI.auth_gui import AuthGUI
+from Telemetry.metrics import start_exporters_from_env
 
 def main():
     """Main entry point for the Smart Home Control System"""
     print("🏠 Starting Smart Home Control System...")
+    # SMART_HOME_METRICS_FILE / SMART_HOME_METRICS_PORT export timing metrics
+    start_exporters_from_env()
     
     # Start the authentication GUI
     app = AuthGUI()
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import struct
+import sys
+import unittest
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from Api.websocket import CONTINUATION, PING, TEXT, MessageReader, WebSocketError, encode_frame
+
+
+def frame(opcode: int, payload: bytes, final: bool = True) -> bytes:
+    """An unmasked frame, which encode_frame cannot build when it is not final"""
+    return struct.pack('!BB', (0x80 if final else 0) | opcode, len(payload)) + payload
+
+
+def read_all(data: bytes, count: int):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        messages = MessageReader(reader)
+        return [await messages.read() for _ in range(count)]
+    return asyncio.run(run())
+
+
+class MessageReaderTest(unittest.TestCase):
+    def test_ping_between_fragments(self):
+        data = (frame(TEXT, b'hel', final=False) + frame(PING, b'p')
+                + frame(CONTINUATION, b'lo', final=False) + frame(CONTINUATION, b'!'))
+        self.assertEqual(read_all(data, 2), [(PING, b'p'), (TEXT, b'hello!')])
+
+    def test_messages_after_a_fragmented_one(self):
+        data = frame(TEXT, b'a', final=False) + frame(CONTINUATION, b'b') + encode_frame(TEXT, b'c')
+        self.assertEqual(read_all(data, 2), [(TEXT, b'ab'), (TEXT, b'c')])
+
+    def test_continuation_without_message(self):
+        with self.assertRaises(WebSocketError):
+            read_all(frame(CONTINUATION, b'x'), 1)
+
+    def test_new_message_inside_fragmented_one(self):
+        with self.assertRaises(WebSocketError):
+            read_all(frame(TEXT, b'a', final=False) + frame(TEXT, b'b'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()